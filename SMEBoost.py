@@ -1,16 +1,22 @@
 import streamlit as st
-from openai import OpenAI
+from openai import OpenAI, DefaultHttpxClient, RateLimitError, APITimeoutError, APIConnectionError, InternalServerError, NotFoundError, PermissionDeniedError
+import httpx
 import datetime
 import os
 from reportlab.lib import colors
 from reportlab.lib.pagesizes import letter
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, PageBreak, Image
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, PageBreak
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.enums import TA_CENTER, TA_JUSTIFY
 from reportlab.lib.units import inch
 from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_JUSTIFY
 import io
 import json
+import sys
+import csv
+import random
+import logging
+import argparse
 import smtplib
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
@@ -18,9 +24,38 @@ from email.mime.base import MIMEBase
 from email import encoders
 from reportlab.pdfbase import pdfmetrics
 from reportlab.pdfbase.ttfonts import TTFont
-from reportlab.platypus import PageTemplate, Frame
+from reportlab.platypus import PageTemplate, Frame, Flowable
+from reportlab.lib.utils import ImageReader
+from pypdf import PdfReader, PdfWriter
 from reportlab.lib.pagesizes import letter
+import numpy as np
 import re
+import threading
+import queue
+import time
+import uuid
+import heapq
+import hashlib
+import itertools
+import functools
+import copy
+import math
+import zlib
+import contextvars
+import signal
+import asyncio
+from dataclasses import dataclass, field, replace
+from typing import Optional
+import sqlite3
+from collections import Counter, OrderedDict, deque, namedtuple
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed, TimeoutError as FuturesTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+import multiprocessing
+import importlib
+import tempfile
+import contextlib
+import abc
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 
 # Constants
 BUSINESS_OPTIONS = {
@@ -35,34 +70,1003 @@ BUSINESS_OPTIONS = {
     "Succession Planning": "I want to prepare for future leadership transitions, ensuring the right people continue my business legacy."
 }
 
-def get_openai_response(prompt, system_content, api_key):
-    """Get response from OpenAI API with error handling"""
+logger = logging.getLogger("smeboost")
+
+# Business profile fields collected by render_business_profile_form
+PROFILE_FIELDS = [
+    "revenue_range",
+    "staff_strength",
+    "customer_base",
+    "business_model",
+    "industry",
+    "products_services",
+    "differentiation"
+]
+
+# Choices offered for the profile's radio fields
+REVENUE_RANGES = ["Below RM 1 Million", "RM 1-5 Million", "RM 5-10 Million", "RM 10-50 Million", "Above RM 50 Million"]
+STAFF_STRENGTHS = ["1-10", "11-50", "51-200", "201-500", "500+"]
+CUSTOMER_BASES = ["Only Domestic", "Only off-shore", "Mixed"]
+
+# Maximum number of business area analyses requested from OpenAI at the same time
+MAX_CONCURRENT_REQUESTS = int(os.environ.get("SMEBOOST_MAX_CONCURRENT_REQUESTS", "4"))
+
+# Shared OpenAI HTTP connection pool settings
+OPENAI_CLIENT_CACHE_SIZE = int(os.environ.get("SMEBOOST_CLIENT_CACHE_SIZE", "32"))
+OPENAI_MAX_CONNECTIONS = int(os.environ.get("SMEBOOST_MAX_CONNECTIONS", "20"))
+OPENAI_MAX_KEEPALIVE_CONNECTIONS = int(os.environ.get("SMEBOOST_MAX_KEEPALIVE_CONNECTIONS", "10"))
+OPENAI_KEEPALIVE_EXPIRY = float(os.environ.get("SMEBOOST_KEEPALIVE_EXPIRY", "60"))
+
+# Report pipeline: "sequential" (default) waits for the full company summary before the comprehensive analysis.
+# The opt-in modes trade analysis quality for latency: "overlap" starts it from the first PIPELINE_OVERLAP_CHARS
+# of the summary and "speculative" starts it immediately from the profile alone
+PIPELINE_MODE = os.environ.get("SMEBOOST_PIPELINE_MODE", "sequential")
+PIPELINE_OVERLAP_CHARS = int(os.environ.get("SMEBOOST_PIPELINE_OVERLAP_CHARS", "4000"))
+
+# Report generation: "background" runs it as a job on a worker pool, "inline" in the script thread
+REPORT_MODE = os.environ.get("SMEBOOST_REPORT_MODE", "background")
+REPORT_JOB_WORKERS = int(os.environ.get("SMEBOOST_REPORT_JOB_WORKERS", "4"))
+REPORT_JOB_TTL = float(os.environ.get("SMEBOOST_REPORT_JOB_TTL", str(60 * 60)))
+REPORT_JOB_POLL_INTERVAL = float(os.environ.get("SMEBOOST_REPORT_JOB_POLL_INTERVAL", "1"))
+
+# Errors reported while serving an SMEBoostService request, returned to its caller instead of shown on the page
+service_errors = contextvars.ContextVar("service_errors", default=None)
+
+def report_error(message):
+    """Log an error and collect it for the current service request, whose caller shows it on the page"""
+    errors = service_errors.get()
+    if errors is not None:
+        errors.append(message)
+    logger.error(message)
+
+# LLM backend: "openai" calls the API, "replay" answers in process with recorded completions from REPLAY_PATH
+# (or deterministic synthetic ones) at simulated latency, so the app can be load tested without API spend
+LLM_BACKEND = os.environ.get("SMEBOOST_LLM_BACKEND", "openai")
+REPLAY_PATH = os.environ.get("SMEBOOST_REPLAY_PATH", "")
+# Append every completion served by the API to this JSONL file, for later replay
+REPLAY_RECORD_PATH = os.environ.get("SMEBOOST_REPLAY_RECORD_PATH", "")
+REPLAY_SEED = int(os.environ.get("SMEBOOST_REPLAY_SEED", "0"))
+# Time to first token in ms: "fixed:<ms>", "uniform:<low>:<high>" or "lognormal:<median>:<sigma>"
+REPLAY_LATENCY = os.environ.get("SMEBOOST_REPLAY_LATENCY", "lognormal:600:0.5")
+REPLAY_TOKENS_PER_SECOND = float(os.environ.get("SMEBOOST_REPLAY_TOKENS_PER_SECOND", "80"))
+REPLAY_CHUNK_WORDS = int(os.environ.get("SMEBOOST_REPLAY_CHUNK_WORDS", "3"))
+REPLAY_WORDS = int(os.environ.get("SMEBOOST_REPLAY_WORDS", "400"))
+# Fraction of requests answered with an injected error, by HTTP status
+REPLAY_ERROR_RATES = {
+    429: float(os.environ.get("SMEBOOST_REPLAY_429_RATE", "0")),
+    500: float(os.environ.get("SMEBOOST_REPLAY_500_RATE", "0")),
+}
+
+REPLAY_VOCABULARY = (
+    "revenue growth customers market strategy cash flow margin pricing supply chain digital team leadership "
+    "investment capital partners expansion efficiency operations brand risk financing valuation productivity"
+).split()
+
+def sample_latency(spec, rng):
+    """Sample a latency in seconds from a "fixed", "uniform" or "lognormal" millisecond spec"""
+    kind, *params = spec.split(":")
+    params = [float(p) for p in params]
+    if kind == "uniform":
+        return rng.uniform(*params) / 1000
+    if kind == "lognormal":
+        return rng.lognormvariate(math.log(params[0]), params[1]) / 1000
+    return params[0] / 1000
+
+def synthetic_completion(rng, words, json_output=False):
+    """A deterministic completion shaped like the comprehensive analysis, so every parser has its sections to find"""
+    def sentence(count=12):
+        text = " ".join(rng.choice(REPLAY_VOCABULARY) for _ in range(count))
+        return text[0].upper() + text[1:] + "."
+
+    per_part = max(1, words // 40)
+    summary = " ".join(sentence() for _ in range(per_part))
+    reasons = [sentence() for _ in range(5)]
+    solutions = [{"category": f"{rng.choice(REPLAY_VOCABULARY).title()} Plan", "points": [sentence() for _ in range(3)]}
+                 for _ in range(3)]
+    kpis = {period: [sentence(8) for _ in range(3)] for period in ("short", "medium", "long")}
+    if json_output:
+        return json.dumps({"summary": summary, "reasons": reasons, "solutions": solutions, "kpis": kpis})
+
+    lines = ["1. Synthesized company summary and priorities", summary, "2. 5 specific reasons for needing an advisor/coach"]
+    lines += [f"{i}. {reason}" for i, reason in enumerate(reasons, 1)]
+    lines.append("3. Detailed advisor/coach solutions for key pain points")
+    for solution in solutions:
+        lines.append(solution["category"])
+        lines += [f"- {point}" for point in solution["points"]]
+    lines.append("4. Specific KPIs")
+    for period, heading in (("short", "Short term (3 months)"), ("medium", "Medium term (3-6 months)"), ("long", "Long term (6-12 months)")):
+        lines.append(heading)
+        lines += [f"• {kpi}" for kpi in kpis[period]]
+    return "\n".join(lines)
+
+replay_record_lock = threading.Lock()
+
+# The replay transport and its responses must come from the HTTP package the OpenAI SDK's client is built on
+SDK_HTTP = sys.modules[DefaultHttpxClient.__bases__[0].__module__.split(".")[0]]
+
+def record_completion(model, system_content, prompt, max_tokens, content):
+    """Append an API completion to REPLAY_RECORD_PATH under the key the replay backend looks it up by"""
+    if not REPLAY_RECORD_PATH or LLM_BACKEND == "replay" or not content:
+        return
+    line = json.dumps({"key": response_cache_key(model, system_content, prompt, max_tokens), "content": content}, ensure_ascii=False)
+    with replay_record_lock, open(REPLAY_RECORD_PATH, "a", encoding="utf-8") as f:
+        f.write(line + "\n")
+
+class ReplayBackend:
+    """In-process stand-in for the chat completions endpoint, plugged into the OpenAI client as its httpx transport.
+
+    Each answer is seeded from the request and how often it was seen, so runs are reproducible
+    while a retried request can still succeed after an injected error.
+    """
+
+    def __init__(self, path=REPLAY_PATH, seed=REPLAY_SEED, latency=REPLAY_LATENCY, tokens_per_second=REPLAY_TOKENS_PER_SECOND,
+                 chunk_words=REPLAY_CHUNK_WORDS, words=REPLAY_WORDS, error_rates=REPLAY_ERROR_RATES):
+        self.recordings = {}
+        if path:
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        record = json.loads(line)
+                        self.recordings[record["key"]] = record["content"]
+        self.seed = seed
+        self.latency = latency
+        self.tokens_per_second = tokens_per_second
+        self.chunk_words = max(1, chunk_words)
+        self.words = words
+        self.error_rates = error_rates
+        self._occurrences = Counter()
+        self._lock = threading.Lock()
+
+    def transport(self):
+        return SDK_HTTP.MockTransport(self.handle)
+
+    def handle(self, request):
+        body = json.loads(request.content)
+        messages = body["messages"]
+        key = response_cache_key(body["model"], messages[0]["content"], messages[-1]["content"], body.get("max_tokens"))
+        with self._lock:
+            occurrence = self._occurrences[key]
+            self._occurrences[key] += 1
+        rng = random.Random(f"{self.seed}:{key}:{occurrence}")
+
+        ttft = sample_latency(self.latency, rng)
+        for status, rate in self.error_rates.items():
+            if rng.random() < rate:
+                time.sleep(ttft)
+                return self._error(status)
+
+        words = self.words
+        if body.get("max_tokens"):
+            words = min(words, body["max_tokens"] * 3 // 4)
+        content = self.recordings.get(key) or synthetic_completion(rng, words, json_output=bool(body.get("response_format")))
+        prompt_tokens = sum(estimate_tokens(message["content"]) for message in messages)
+        completion_tokens = estimate_tokens(content)
+        usage = {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens, "total_tokens": prompt_tokens + completion_tokens}
+
+        if body.get("stream"):
+            include_usage = (body.get("stream_options") or {}).get("include_usage")
+            return SDK_HTTP.Response(
+                200, headers={"content-type": "text/event-stream"},
+                content=self._events(body["model"], content, ttft, completion_tokens, usage if include_usage else None)
+            )
+        time.sleep(ttft + completion_tokens / self.tokens_per_second)
+        return SDK_HTTP.Response(200, json={
+            "id": f"chatcmpl-replay-{key[:12]}", "object": "chat.completion", "created": int(time.time()), "model": body["model"],
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": usage
+        })
+
+    def _events(self, model, content, ttft, completion_tokens, usage):
+        pieces = re.findall(r'^\s+|\S+\s*', content)
+        chunks = ["".join(pieces[i:i + self.chunk_words]) for i in range(0, len(pieces), self.chunk_words)]
+        delay = completion_tokens / self.tokens_per_second / max(1, len(chunks))
+
+        def event(choices, **extra):
+            payload = {"id": "chatcmpl-replay", "object": "chat.completion.chunk", "created": int(time.time()), "model": model,
+                       "choices": choices, **extra}
+            return f"data: {json.dumps(payload)}\n\n".encode("utf-8")
+
+        time.sleep(ttft)
+        for chunk in chunks:
+            yield event([{"index": 0, "delta": {"content": chunk}, "finish_reason": None}])
+            time.sleep(delay)
+        yield event([{"index": 0, "delta": {}, "finish_reason": "stop"}])
+        if usage:
+            yield event([], usage=usage)
+        yield b"data: [DONE]\n\n"
+
+    def _error(self, status):
+        message = "Rate limit reached (replay)" if status == 429 else "Server error (replay)"
+        headers = {"retry-after-ms": "200"} if status == 429 else {}
+        return SDK_HTTP.Response(status, headers=headers, json={"error": {"message": message, "type": "replay", "code": str(status)}})
+
+@st.cache_resource(show_spinner=False)
+def get_replay_backend():
+    """Return the replay backend shared by every client in this process"""
+    return ReplayBackend()
+
+@st.cache_resource(max_entries=OPENAI_CLIENT_CACHE_SIZE, show_spinner=False)
+def get_openai_client(api_key):
+    """Return the shared OpenAI client for an API key, keeping one warm HTTP connection pool per key"""
+    http_client = DefaultHttpxClient(
+        transport=get_replay_backend().transport() if LLM_BACKEND == "replay" else None,
+        limits=httpx.Limits(
+            max_connections=OPENAI_MAX_CONNECTIONS,
+            max_keepalive_connections=OPENAI_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=OPENAI_KEEPALIVE_EXPIRY
+        )
+    )
+    # Retries are handled by call_openai_with_retries so they go through the shared rate limiter
+    return OpenAI(api_key=api_key, http_client=http_client, max_retries=0)
+
+# Model used for every completion request
+OPENAI_MODEL = "gpt-4-turbo-preview"
+
+# Structured output for the comprehensive analysis: "off" asks for free text parsed by parse_content_sections,
+# "json_object" asks for JSON (any chat model), "json_schema" enforces COMPREHENSIVE_ANALYSIS_SCHEMA (models with structured outputs)
+STRUCTURED_ANALYSIS = os.environ.get("SMEBOOST_STRUCTURED_ANALYSIS", "off")
+
+# LLM response cache settings: backend is one of "memory", "sqlite", "disk" or "none"
+RESPONSE_CACHE_BACKEND = os.environ.get("SMEBOOST_CACHE_BACKEND", "memory")
+RESPONSE_CACHE_TTL = float(os.environ.get("SMEBOOST_CACHE_TTL", str(24 * 60 * 60)))
+RESPONSE_CACHE_MAX_ENTRIES = int(os.environ.get("SMEBOOST_CACHE_MAX_ENTRIES", "1000"))
+RESPONSE_CACHE_PATH = os.environ.get("SMEBOOST_CACHE_PATH", ".smeboost_cache")
+
+class ResponseCache:
+    """Base class for LLM response caches with TTL expiry, size-bounded eviction and hit/miss counters"""
+
+    def __init__(self, ttl=RESPONSE_CACHE_TTL, max_entries=RESPONSE_CACHE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return the cached response for key, or None when missing or expired"""
+        with self._lock:
+            value = self._get(key, time.time())
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return value
+
+    def set(self, key, value):
+        """Store a response, evicting the least recently used entries past max_entries"""
+        with self._lock:
+            self._set(key, value, time.time())
+
+    def stats(self):
+        """Return hit and miss counters"""
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses}
+
+    def _get(self, key, now):
+        return None
+
+    def _set(self, key, value, now):
+        pass
+
+class MemoryResponseCache(ResponseCache):
+    """Per-process in-memory LRU response cache"""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self._entries = OrderedDict()
+
+    def _get(self, key, now):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        created, value = entry
+        if now - created > self.ttl:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def _set(self, key, value, now):
+        self._entries[key] = (now, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+class SQLiteResponseCache(ResponseCache):
+    """Response cache persisted in a SQLite database shared by all sessions"""
+
+    def __init__(self, path, **kwargs):
+        super().__init__(**kwargs)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses "
+            "(key TEXT PRIMARY KEY, value TEXT NOT NULL, created REAL NOT NULL, accessed REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def _get(self, key, now):
+        row = self._conn.execute("SELECT value, created FROM responses WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        value, created = row
+        if now - created > self.ttl:
+            self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            self._conn.commit()
+            return None
+        self._conn.execute("UPDATE responses SET accessed = ? WHERE key = ?", (now, key))
+        self._conn.commit()
+        return value
+
+    def _set(self, key, value, now):
+        self._conn.execute(
+            "INSERT OR REPLACE INTO responses (key, value, created, accessed) VALUES (?, ?, ?, ?)",
+            (key, value, now, now)
+        )
+        self._conn.execute(
+            "DELETE FROM responses WHERE key IN "
+            "(SELECT key FROM responses ORDER BY accessed DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,)
+        )
+        self._conn.commit()
+
+class DiskResponseCache(ResponseCache):
+    """Response cache stored as one JSON file per entry in a directory"""
+
+    def __init__(self, directory, **kwargs):
+        super().__init__(**kwargs)
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.json")
+
+    def _get(self, key, now):
+        path = self._path(key)
+        try:
+            with open(path, encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if now - entry["created"] > self.ttl:
+            os.remove(path)
+            return None
+        os.utime(path)
+        return entry["value"]
+
+    def _set(self, key, value, now):
+        path = self._path(key)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"created": now, "value": value}, f)
+        os.replace(tmp_path, path)
+
+        entries = [os.path.join(self.directory, name) for name in os.listdir(self.directory) if name.endswith(".json")]
+        if len(entries) > self.max_entries:
+            entries.sort(key=os.path.getmtime)
+            for stale_path in entries[:len(entries) - self.max_entries]:
+                os.remove(stale_path)
+
+@st.cache_resource(show_spinner=False)
+def get_response_cache(backend=RESPONSE_CACHE_BACKEND):
+    """Return the process-wide LLM response cache for the configured backend"""
+    if backend == "sqlite":
+        return SQLiteResponseCache(f"{RESPONSE_CACHE_PATH}.sqlite3")
+    if backend == "disk":
+        return DiskResponseCache(RESPONSE_CACHE_PATH)
+    if backend == "none":
+        return ResponseCache()
+    return MemoryResponseCache()
+
+def response_cache_key(model, system_content, prompt, max_tokens=None):
+    """Content-addressed cache key for a completion request"""
+    # max_tokens only joins the key when set, so keys of uncapped requests stay unchanged
+    request = [model, system_content, prompt] + ([max_tokens] if max_tokens else [])
+    payload = json.dumps(request, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+# OpenAI rate limits shared by every session in this process; updated from the API's rate limit headers
+OPENAI_RPM_LIMIT = int(os.environ.get("SMEBOOST_RPM_LIMIT", "500"))
+OPENAI_TPM_LIMIT = int(os.environ.get("SMEBOOST_TPM_LIMIT", "150000"))
+OPENAI_EXPECTED_COMPLETION_TOKENS = int(os.environ.get("SMEBOOST_EXPECTED_COMPLETION_TOKENS", "1000"))
+OPENAI_MAX_RETRIES = int(os.environ.get("SMEBOOST_MAX_RETRIES", "5"))
+OPENAI_RETRY_BASE_DELAY = float(os.environ.get("SMEBOOST_RETRY_BASE_DELAY", "1"))
+OPENAI_RETRY_MAX_DELAY = float(os.environ.get("SMEBOOST_RETRY_MAX_DELAY", "60"))
+
+# Request priorities: lower values are served first when the rate limiter is saturated
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BATCH = 10
+PRIORITY_PREFETCH = 20
+request_priority = contextvars.ContextVar("request_priority", default=PRIORITY_INTERACTIVE)
+
+RETRYABLE_ERRORS = (RateLimitError, APITimeoutError, APIConnectionError, InternalServerError)
+# Errors after which a routed request moves on to the task's next model
+FALLBACK_ERRORS = RETRYABLE_ERRORS + (NotFoundError, PermissionDeniedError)
+
+def parse_reset_duration(value):
+    """Parse rate limit reset durations such as '1s', '20ms' or '6m0s' into seconds"""
+    seconds = 0.0
+    for amount, unit in re.findall(r'(\d+(?:\.\d+)?)(ms|h|m|s)', value or ''):
+        seconds += float(amount) * {'ms': 0.001, 's': 1, 'm': 60, 'h': 3600}[unit]
+    return seconds
+
+def estimate_tokens(text):
+    """Rough token count for rate limiting, at about four characters per token"""
+    return len(text) // 4 + 1
+
+# Per-task token budgets, e.g. SMEBOOST_MAX_TOKENS_COMPREHENSIVE_SUMMARY=2500 caps the completion and
+# SMEBOOST_PROMPT_BUDGET_COMPREHENSIVE_SUMMARY=3000 trims the bulky inputs of the prompt; unset or 0 means unlimited
+LLM_TASKS = (
+    "business_priority", "area_analysis", "company_summary", "comprehensive_summary", "context_digest",
+    "area_template", "area_personalization"
+)
+
+def task_limit(kind, task):
+    """Read a per-task token limit from SMEBOOST_<kind>_<TASK>, returning None when unlimited"""
+    return int(os.environ.get(f"SMEBOOST_{kind}_{task.upper()}", "0")) or None
+
+TASK_MAX_TOKENS = {task: task_limit("MAX_TOKENS", task) for task in LLM_TASKS}
+TASK_PROMPT_BUDGETS = {task: task_limit("PROMPT_BUDGET", task) for task in LLM_TASKS}
+
+# Model routing: each task tries its models in order, moving on to the next one when a model keeps timing out,
+# is rate limited or is unavailable. Short prompts go to LIGHT_MODEL so the full model's quota is kept for the
+# long analyses; override per task with a comma separated list, e.g. SMEBOOST_MODEL_AREA_ANALYSIS="gpt-4o-mini,gpt-4o"
+LIGHT_MODEL = os.environ.get("SMEBOOST_LIGHT_MODEL", "gpt-4o-mini")
+DEFAULT_TASK_MODELS = {
+    "business_priority": (LIGHT_MODEL, OPENAI_MODEL),
+    "area_analysis": (LIGHT_MODEL, OPENAI_MODEL),
+    "area_personalization": (LIGHT_MODEL, OPENAI_MODEL),
+    "context_digest": (LIGHT_MODEL,),
+}
+# Retries on a model before falling back to the next one; the last model gets the full OPENAI_MAX_RETRIES
+MODEL_FALLBACK_RETRIES = int(os.environ.get("SMEBOOST_MODEL_FALLBACK_RETRIES", "1"))
+
+def task_models(task):
+    """Read the routing order for a task from SMEBOOST_MODEL_<TASK>, defaulting to DEFAULT_TASK_MODELS"""
+    value = os.environ.get(f"SMEBOOST_MODEL_{task.upper()}", "")
+    return tuple(model.strip() for model in value.split(",") if model.strip()) or DEFAULT_TASK_MODELS.get(task, (OPENAI_MODEL,))
+
+TASK_MODELS = {task: task_models(task) for task in LLM_TASKS}
+
+# USD per million (prompt, completion) tokens for the per-model cost stats; add or override models with
+# SMEBOOST_MODEL_PRICES, e.g. '{"gpt-4o": [2.5, 10]}'
+MODEL_PRICES = {
+    "gpt-4-turbo-preview": (10.0, 30.0),
+    "gpt-4-turbo": (10.0, 30.0),
+    "gpt-4o": (2.5, 10.0),
+    "gpt-4o-mini": (0.15, 0.6),
+    **json.loads(os.environ.get("SMEBOOST_MODEL_PRICES", "{}"))
+}
+
+def completion_cost(model, prompt_tokens, completion_tokens):
+    """Estimated USD cost of a completion, or None for models without a known price"""
+    if model not in MODEL_PRICES:
+        return None
+    prompt_price, completion_price = MODEL_PRICES[model]
+    return (prompt_tokens * prompt_price + completion_tokens * completion_price) / 1_000_000
+
+def fit_prompt_to_budget(task, build_prompt, text):
+    """Build a prompt around text, trimming text at a word boundary so the prompt fits the task's prompt budget"""
+    prompt = build_prompt(text)
+    budget = TASK_PROMPT_BUDGETS.get(task)
+    if not budget or not text or estimate_tokens(prompt) <= budget:
+        return prompt
+    # text may be embedded more than once, e.g. the business priorities in the area analysis prompt
+    occurrences = max(1, prompt.count(text))
+    keep_chars = max(0, (budget - estimate_tokens(build_prompt(""))) * 4 // occurrences)
+    # Drop the word cut off at keep_chars; a slice of only whitespace leaves nothing
+    parts = text[:keep_chars].rsplit(None, 1)
+    trimmed = parts[0] if parts else ""
+    logger.info("Trimmed %s prompt input from %d to %d tokens", task, estimate_tokens(text), estimate_tokens(trimmed))
+    return build_prompt(trimmed + " ...")
+
+class RateLimiter:
+    """Token buckets for requests and tokens per minute, granting capacity to waiting callers in priority order"""
+
+    def __init__(self, requests_per_minute=OPENAI_RPM_LIMIT, tokens_per_minute=OPENAI_TPM_LIMIT):
+        self.request_capacity = float(requests_per_minute)
+        self.token_capacity = float(tokens_per_minute)
+        self.available_requests = self.request_capacity
+        self.available_tokens = self.token_capacity
+        self.paused_until = 0.0
+        self._updated = time.monotonic()
+        self._waiters = []
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+
+    def _refill(self, now):
+        elapsed = now - self._updated
+        self._updated = now
+        self.available_requests = min(self.request_capacity, self.available_requests + elapsed * self.request_capacity / 60)
+        self.available_tokens = min(self.token_capacity, self.available_tokens + elapsed * self.token_capacity / 60)
+
+    def acquire(self, tokens, priority=PRIORITY_INTERACTIVE):
+        """Block until one request and the given number of tokens are available and no higher priority caller is waiting"""
+        tokens = min(tokens, self.token_capacity)
+        with self._condition:
+            entry = (priority, next(self._sequence))
+            heapq.heappush(self._waiters, entry)
+            try:
+                while True:
+                    now = time.monotonic()
+                    self._refill(now)
+                    if self._waiters[0] == entry and now >= self.paused_until \
+                            and self.available_requests >= 1 and self.available_tokens >= tokens:
+                        self.available_requests -= 1
+                        self.available_tokens -= tokens
+                        return
+                    wait = max(
+                        self.paused_until - now,
+                        (1 - self.available_requests) * 60 / self.request_capacity,
+                        (tokens - self.available_tokens) * 60 / self.token_capacity,
+                        0.01
+                    )
+                    self._condition.wait(min(wait, 1.0))
+            finally:
+                self._waiters.remove(entry)
+                heapq.heapify(self._waiters)
+                self._condition.notify_all()
+
+    def release_tokens(self, estimated, actual):
+        """Correct the token bucket once the real token usage of a request is known"""
+        with self._condition:
+            self.available_tokens = min(self.token_capacity, self.available_tokens + estimated - actual)
+            self._condition.notify_all()
+
+    def update_from_headers(self, headers):
+        """Adapt limits and remaining capacity to the x-ratelimit-* headers of an API response"""
+        with self._condition:
+            self._refill(time.monotonic())
+            if headers.get("x-ratelimit-limit-requests"):
+                self.request_capacity = float(headers["x-ratelimit-limit-requests"])
+            if headers.get("x-ratelimit-limit-tokens"):
+                self.token_capacity = float(headers["x-ratelimit-limit-tokens"])
+            if headers.get("x-ratelimit-remaining-requests"):
+                self.available_requests = min(self.available_requests, float(headers["x-ratelimit-remaining-requests"]))
+            if headers.get("x-ratelimit-remaining-tokens"):
+                self.available_tokens = min(self.available_tokens, float(headers["x-ratelimit-remaining-tokens"]))
+            self._condition.notify_all()
+
+    def pause(self, seconds):
+        """Hold back every caller for the given number of seconds, e.g. after a 429"""
+        with self._condition:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+            self._condition.notify_all()
+
+@st.cache_resource(show_spinner=False)
+def get_rate_limiter():
+    """Return the rate limiter shared by every session in this server process"""
+    return RateLimiter()
+
+def retry_delay(attempt, error=None):
+    """Full-jitter exponential backoff, honouring any retry-after hint from the API"""
+    delay = random.uniform(0, min(OPENAI_RETRY_MAX_DELAY, OPENAI_RETRY_BASE_DELAY * (2 ** attempt)))
+    response = getattr(error, "response", None)
+    if response is not None:
+        headers = response.headers
+        if headers.get("retry-after-ms"):
+            delay = max(delay, float(headers["retry-after-ms"]) / 1000)
+        elif headers.get("retry-after", "").replace(".", "", 1).isdigit():
+            delay = max(delay, float(headers["retry-after"]))
+        else:
+            delay = max(delay, parse_reset_duration(headers.get("x-ratelimit-reset-requests")))
+    return delay
+
+# LLM call metrics: one JSON log line per call on the "smeboost.llm" logger, plus Prometheus text exposition
+# written to METRICS_FILE and/or served on METRICS_PORT at /metrics when set
+METRICS_FILE = os.environ.get("SMEBOOST_METRICS_FILE", "")
+METRICS_PORT = int(os.environ.get("SMEBOOST_METRICS_PORT", "0"))
+
+llm_logger = logging.getLogger("smeboost.llm")
+
+class LLMMetrics:
+    """Counters and histograms over LLM calls by task, model and cache status"""
+
+    LATENCY_BUCKETS = (0.25, 0.5, 1, 2.5, 5, 10, 20, 40, 80, 160)
+    TOKEN_BUCKETS = (100, 250, 500, 1000, 2000, 4000, 8000, 16000)
+    HISTOGRAMS = {
+        "smeboost_llm_latency_seconds": LATENCY_BUCKETS,
+        "smeboost_llm_time_to_first_token_seconds": LATENCY_BUCKETS,
+        "smeboost_llm_prompt_tokens": TOKEN_BUCKETS,
+        "smeboost_llm_completion_tokens": TOKEN_BUCKETS
+    }
+
+    def __init__(self, path=METRICS_FILE):
+        self.path = path
+        self._counters = {}
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def record(self, task, model, cache, status, latency, ttft=None, prompt_tokens=None, completion_tokens=None, prompt_chars=None):
+        """Record one LLM call; token counts come from the API usage field and are None for cache hits"""
+        cost = None
+        if prompt_tokens is not None and completion_tokens is not None:
+            cost = completion_cost(model, prompt_tokens, completion_tokens)
+        llm_logger.info(json.dumps({
+            "event": "llm_call", "task": task, "model": model, "cache": cache, "status": status,
+            "latency_ms": round(latency * 1000, 1), "ttft_ms": None if ttft is None else round(ttft * 1000, 1),
+            "prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens, "prompt_chars": prompt_chars,
+            "cost_usd": cost
+        }))
+        labels = (("task", task), ("model", model), ("cache", cache))
+        with self._lock:
+            self._increment("smeboost_llm_requests_total", labels + (("status", status),))
+            self._observe("smeboost_llm_latency_seconds", labels, latency)
+            if ttft is not None:
+                self._observe("smeboost_llm_time_to_first_token_seconds", labels, ttft)
+            if prompt_tokens is not None:
+                self._increment("smeboost_llm_prompt_tokens_total", labels, prompt_tokens)
+                self._observe("smeboost_llm_prompt_tokens", labels, prompt_tokens)
+            if completion_tokens is not None:
+                self._increment("smeboost_llm_completion_tokens_total", labels, completion_tokens)
+                self._observe("smeboost_llm_completion_tokens", labels, completion_tokens)
+            if cost is not None:
+                self._increment("smeboost_llm_cost_usd_total", labels, cost)
+            text = self._render() if self.path else None
+        if text is not None:
+            self._write(text)
+
+    def record_fallback(self, task, from_model, to_model, error):
+        """Record a routed request moving on from one model to the next"""
+        llm_logger.info(json.dumps({
+            "event": "llm_fallback", "task": task, "from_model": from_model, "to_model": to_model, "error": type(error).__name__
+        }))
+        with self._lock:
+            self._increment("smeboost_llm_fallbacks_total", (("task", task), ("from_model", from_model), ("to_model", to_model)))
+
+    def model_summary(self):
+        """Return {model: (calls, mean latency in seconds, cost in USD)} over the calls that reached the API"""
+        summary = {}
+        with self._lock:
+            for (name, labels), (_, total) in self._histograms.items():
+                label = dict(labels)
+                if name != "smeboost_llm_latency_seconds" or label["cache"] != "miss":
+                    continue
+                calls, latency, cost = summary.get(label["model"], (0, 0.0, 0.0))
+                summary[label["model"]] = (
+                    calls + self._counters[name + "_count", labels],
+                    latency + total,
+                    cost + self._counters.get(("smeboost_llm_cost_usd_total", labels), 0.0)
+                )
+        return {model: (calls, latency / calls, cost) for model, (calls, latency, cost) in summary.items()}
+
+    def _increment(self, name, labels, amount=1):
+        self._counters[name, labels] = self._counters.get((name, labels), 0) + amount
+
+    def _observe(self, name, labels, value):
+        buckets = self.HISTOGRAMS[name]
+        counts, total = self._histograms.get((name, labels), ([0] * len(buckets), 0.0))
+        for i, bound in enumerate(buckets):
+            if value <= bound:
+                counts[i] += 1
+        self._histograms[name, labels] = (counts, total + value)
+        self._increment(name + "_count", labels)
+
+    def render(self):
+        """Render every metric in the Prometheus text exposition format"""
+        with self._lock:
+            return self._render()
+
+    def _render(self):
+        def label_text(labels):
+            return ",".join(f'{key}="{value}"' for key, value in labels)
+
+        lines = []
+        for name in sorted({name for name, _ in self._counters if not name.endswith("_count")}):
+            lines.append(f"# TYPE {name} counter")
+            lines += [f"{name}{{{label_text(labels)}}} {value:g}" for (n, labels), value in sorted(self._counters.items()) if n == name]
+        for name, buckets in self.HISTOGRAMS.items():
+            series = sorted((labels, data) for (n, labels), data in self._histograms.items() if n == name)
+            if not series:
+                continue
+            lines.append(f"# TYPE {name} histogram")
+            for labels, (counts, total) in series:
+                for bound, count in zip(buckets, counts):
+                    lines.append(f'{name}_bucket{{{label_text(labels + (("le", f"{bound:g}"),))}}} {count}')
+                count = self._counters[name + "_count", labels]
+                lines.append(f'{name}_bucket{{{label_text(labels + (("le", "+Inf"),))}}} {count}')
+                lines.append(f"{name}_sum{{{label_text(labels)}}} {total:g}")
+                lines.append(f"{name}_count{{{label_text(labels)}}} {count}")
+        return "\n".join(lines) + "\n"
+
+    def _write(self, text):
+        tmp_path = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(text)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning("Could not write LLM metrics to %s: %s", self.path, e)
+
+def serve_metrics(metrics, port):
+    """Serve the metrics at http://<host>:<port>/metrics from a daemon thread"""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = metrics.render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(("", port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+@st.cache_resource(show_spinner=False)
+def get_llm_metrics():
+    """Return the LLM metrics shared by every session in this server process, starting the endpoint if configured"""
+    metrics = LLMMetrics()
+    if METRICS_PORT:
+        try:
+            serve_metrics(metrics, METRICS_PORT)
+        except OSError as e:
+            logger.warning("Could not serve LLM metrics on port %d: %s", METRICS_PORT, e)
+    return metrics
+
+def call_openai_with_retries(api_key, messages, stream=False, response_format=None, max_tokens=None, model=OPENAI_MODEL,
+                             max_retries=OPENAI_MAX_RETRIES):
+    """Create a chat completion through the shared rate limiter, retrying rate limits and transient errors.
+
+    Returns the parsed completion (or stream) and the number of tokens reserved for it.
+    """
+    options = {"response_format": response_format} if response_format else {}
+    if max_tokens:
+        options["max_tokens"] = max_tokens
+    if stream:
+        # The final chunk then carries the usage field for metrics and the rate limiter
+        options["stream_options"] = {"include_usage": True}
+    limiter = get_rate_limiter()
+    estimated_tokens = sum(estimate_tokens(message["content"]) for message in messages) + (max_tokens or OPENAI_EXPECTED_COMPLETION_TOKENS)
+    client = get_openai_client(api_key)
+
+    for attempt in range(max_retries + 1):
+        limiter.acquire(estimated_tokens, request_priority.get())
+        try:
+            raw_response = client.chat.completions.with_raw_response.create(
+                model=model,
+                messages=messages,
+                stream=stream,
+                **options
+            )
+            limiter.update_from_headers(raw_response.headers)
+            return raw_response.parse(), estimated_tokens
+        except RETRYABLE_ERRORS as e:
+            # The failed request used none of its tokens, and the next attempt reserves them again
+            limiter.release_tokens(estimated_tokens, 0)
+            if attempt == max_retries:
+                raise
+            delay = retry_delay(attempt, e)
+            if isinstance(e, RateLimitError):
+                limiter.pause(delay)
+            logger.warning("OpenAI request failed (%s), retrying in %.1fs", e, delay)
+            time.sleep(delay)
+
+def call_routed_openai(api_key, messages, task="default", stream=False, response_format=None, max_tokens=None, attempted=None):
+    """Create a chat completion on the task's models in routing order, falling back on FALLBACK_ERRORS.
+
+    Returns the parsed completion (or stream), the number of tokens reserved for it and the model that served it.
+    Each model is appended to attempted, when given, before it is tried.
+    """
+    models = TASK_MODELS.get(task, (OPENAI_MODEL,))
+    for index, model in enumerate(models):
+        last = index == len(models) - 1
+        if attempted is not None:
+            attempted.append(model)
+        try:
+            result, estimated_tokens = call_openai_with_retries(
+                api_key, messages, stream, response_format, max_tokens, model,
+                max_retries=OPENAI_MAX_RETRIES if last else MODEL_FALLBACK_RETRIES
+            )
+            return result, estimated_tokens, model
+        except FALLBACK_ERRORS as e:
+            if last:
+                raise
+            logger.warning("Model %s failed for %s (%s), falling back to %s", model, task, e, models[index + 1])
+            get_llm_metrics().record_fallback(task, model, models[index + 1], e)
+
+def is_cacheable_response(content, response_format=None):
+    """Whether a response is complete enough to cache; JSON responses must parse"""
+    if not content:
+        return False
+    if response_format is None:
+        return True
     try:
-        client = OpenAI(api_key=api_key)
-        completion = client.chat.completions.create(
-            model="gpt-4-turbo-preview",
-            messages=[
+        json.loads(content)
+    except ValueError:
+        return False
+    return True
+
+def lookup_routed_response(task, system_content, prompt, max_tokens=None):
+    """Return (model, content) for the first of the task's models in routing order with a cached response, else (None, None)"""
+    cache = get_response_cache()
+    for model in TASK_MODELS.get(task, (OPENAI_MODEL,)):
+        cached = cache.get(response_cache_key(model, system_content, prompt, max_tokens))
+        if cached is not None:
+            return model, cached
+    return None, None
+
+def stream_openai_response(prompt, system_content, api_key, response_format=None, task="default"):
+    """Yield response text from OpenAI chunk by chunk as it arrives, caching the assembled text"""
+    max_tokens = TASK_MAX_TOKENS.get(task)
+    # Responses are cached under the model that served them and looked up in the task's routing order
+    metrics = get_llm_metrics()
+    start = time.monotonic()
+    cached_model, cached = lookup_routed_response(task, system_content, prompt, max_tokens)
+    if cached is not None:
+        metrics.record(task, cached_model, "hit", "ok", time.monotonic() - start, prompt_chars=len(prompt))
+        yield cached
+        return
+
+    ttft = None
+    served_model = None
+    attempted = []
+    try:
+        stream, estimated_tokens, served_model = call_routed_openai(
+            api_key,
+            [
+                {"role": "system", "content": system_content},
+                {"role": "user", "content": prompt}
+            ],
+            task,
+            stream=True,
+            response_format=response_format,
+            max_tokens=max_tokens,
+            attempted=attempted
+        )
+        parts = []
+        usage = None
+        for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                if ttft is None:
+                    ttft = time.monotonic() - start
+                parts.append(chunk.choices[0].delta.content)
+                yield chunk.choices[0].delta.content
+            if getattr(chunk, "usage", None):
+                usage = chunk.usage
+        if usage:
+            get_rate_limiter().release_tokens(estimated_tokens, usage.total_tokens)
+        metrics.record(
+            task, served_model, "miss", "ok", time.monotonic() - start, ttft,
+            usage.prompt_tokens if usage else None, usage.completion_tokens if usage else None, len(prompt)
+        )
+        content = "".join(parts)
+        record_completion(served_model, system_content, prompt, max_tokens, content)
+        if is_cacheable_response(content, response_format):
+            get_response_cache().set(response_cache_key(served_model, system_content, prompt, max_tokens), content)
+    except Exception as e:
+        # Charge the failure to the model that served the stream, else the last one tried
+        failed_model = served_model or attempted[-1]
+        metrics.record(task, failed_model, "miss", "error", time.monotonic() - start, ttft, prompt_chars=len(prompt))
+        report_error(f"Error communicating with OpenAI API: {str(e)}")
+
+def get_openai_response(prompt, system_content, api_key, response_format=None, task="default"):
+    """Get response from OpenAI API with error handling, serving repeated requests from the response cache"""
+    max_tokens = TASK_MAX_TOKENS.get(task)
+    # Responses are cached under the model that served them and looked up in the task's routing order
+    metrics = get_llm_metrics()
+    start = time.monotonic()
+    cached_model, cached = lookup_routed_response(task, system_content, prompt, max_tokens)
+    if cached is not None:
+        metrics.record(task, cached_model, "hit", "ok", time.monotonic() - start, prompt_chars=len(prompt))
+        return cached
+
+    served_model = None
+    attempted = []
+    try:
+        completion, estimated_tokens, served_model = call_routed_openai(
+            api_key,
+            [
                 {"role": "system", "content": system_content},
                 {"role": "user", "content": prompt}
-            ]
+            ],
+            task,
+            response_format=response_format,
+            max_tokens=max_tokens,
+            attempted=attempted
         )
-        return completion.choices[0].message.content
+        usage = completion.usage
+        if usage:
+            get_rate_limiter().release_tokens(estimated_tokens, usage.total_tokens)
+        metrics.record(
+            task, served_model, "miss", "ok", time.monotonic() - start, None,
+            usage.prompt_tokens if usage else None, usage.completion_tokens if usage else None, len(prompt)
+        )
+        content = completion.choices[0].message.content
+        record_completion(served_model, system_content, prompt, max_tokens, content)
+        if is_cacheable_response(content, response_format):
+            get_response_cache().set(response_cache_key(served_model, system_content, prompt, max_tokens), content)
+        return content
     except Exception as e:
-        st.error(f"Error communicating with OpenAI API: {str(e)}")
+        # Charge the failure to the model that served the response, else the last one tried
+        failed_model = served_model or attempted[-1]
+        metrics.record(task, failed_model, "miss", "error", time.monotonic() - start, prompt_chars=len(prompt))
+        report_error(f"Error communicating with OpenAI API: {str(e)}")
         return None
 
+def script_context_initializer():
+    """Return a thread initializer that attaches the current Streamlit script context to worker threads"""
+    ctx = get_script_run_ctx(suppress_warning=True)
+
+    def attach_context():
+        if ctx is not None:
+            add_script_run_ctx(threading.current_thread(), ctx)
+
+    return attach_context
+
+class BackgroundStream:
+    """Run a streaming OpenAI request on a worker thread, buffering chunks until they are consumed.
+
+    build_request returns the (prompt, system_content) pair and runs on the worker thread,
+    so preparing the prompt (e.g. compressing its context) does not hold up the caller.
+    """
+
+    _DONE = object()
+
+    def __init__(self, build_request, api_key, response_format=None, task="default"):
+        self._queue = queue.Queue()
+        # Run in a copy of the caller's context so the request priority carries over
+        self._thread = threading.Thread(
+            target=contextvars.copy_context().run,
+            args=(self._run, build_request, api_key, response_format, task),
+            daemon=True
+        )
+        ctx = get_script_run_ctx(suppress_warning=True)
+        if ctx is not None:
+            add_script_run_ctx(self._thread, ctx)
+        self._thread.start()
+
+    def _run(self, build_request, api_key, response_format, task):
+        try:
+            prompt, system_content = build_request()
+            for chunk in stream_openai_response(prompt, system_content, api_key, response_format, task):
+                self._queue.put(chunk)
+        finally:
+            self._queue.put(self._DONE)
+
+    def __iter__(self):
+        while True:
+            chunk = self._queue.get()
+            if chunk is self._DONE:
+                return
+            yield chunk
+
 def business_priority(business_info, openai_api_key):
     """Get business priority suggestions"""
-    return get_openai_response(
-        f"User Information: {business_info}. Please expand the given points, Synthesize and organise the inputs, "
+    prompt = fit_prompt_to_budget(
+        "business_priority",
+        lambda info: f"User Information: {info}. Please expand the given points, Synthesize and organise the inputs, "
         f"Explain with 3 possible examples, Provide strategic implications with supporting facts and examples and Maximum 250 words",
+        business_info
+    )
+    return get_openai_response(
+        prompt,
         "You are a top business coach who specialized in providing guidance.Make the language simple and relatable.",
-        openai_api_key
+        openai_api_key,
+        task="business_priority"
     )
 
-def get_specific_suggestions(business_info, suggestion_type, openai_api_key):
-    """Get specific suggestions for business areas"""
-    prompt = f"""Based on the user's stated business priorities:
+def get_specific_suggestions(business_info, suggestion_type, openai_api_key, profile_info=None):
+    """Get specific suggestions for business areas, from a warmed template when AREA_TEMPLATES is on"""
+    if AREA_TEMPLATES != "off":
+        template = find_area_template(suggestion_type, profile_info)
+        if template and AREA_TEMPLATES == "template":
+            return template
+        if template:
+            return personalize_area_template(template, business_info, suggestion_type, openai_api_key)
+
+    return get_openai_response(*area_analysis_prompt(business_info, suggestion_type), openai_api_key, task="area_analysis")
+
+def area_analysis_prompt(business_info, suggestion_type):
+    """Build the (prompt, system_content) pair for a business area analysis"""
+    prompt = fit_prompt_to_budget("area_analysis", lambda business_info: f"""Based on the user's stated business priorities:
 {business_info}
 
 Provide a {suggestion_type} analysis with exactly these requirements (Maximum 200 words):
@@ -75,14 +1079,354 @@ Provide a {suggestion_type} analysis with exactly these requirements (Maximum 20
 
 
 Keep responses specific to their context:
-{business_info}"""
+{business_info}""", business_info)
+    return prompt, f"You are a specialized {suggestion_type} consultant responding to specific business priorities."
 
-    return get_openai_response(prompt, 
-        f"You are a specialized {suggestion_type} consultant responding to specific business priorities.",
-        openai_api_key)
-def generate_comprehensive_summary(profile_info, business_priorities, company_summary, openai_api_key):
-    """Generate comprehensive business analysis and recommendations"""
-    prompt = f"""
+def get_specific_suggestions_concurrently(business_info, suggestion_types, openai_api_key, max_workers=MAX_CONCURRENT_REQUESTS, profile_info=None,
+                                          prefetched=None):
+    """Request several business area analyses at once, yielding (area, suggestion) as each one completes.
+
+    prefetched maps areas to futures of analyses already requested in the background, which are used instead of new requests.
+    """
+    if not suggestion_types:
+        return
+
+    # Attach the Streamlit script context so errors from worker threads reach the page
+    attach_context = script_context_initializer()
+
+    prefetched = {area: future for area, future in (prefetched or {}).items() if area in suggestion_types}
+    remaining = [suggestion_type for suggestion_type in suggestion_types if suggestion_type not in prefetched]
+    # Prefetched areas only wait on their future, so they do not count against max_workers
+    workers = max(1, min(max_workers, len(remaining)) + len(prefetched))
+    with ThreadPoolExecutor(max_workers=workers, initializer=attach_context) as executor:
+        futures = {
+            executor.submit(
+                contextvars.copy_context().run, get_specific_suggestions, business_info, suggestion_type, openai_api_key, profile_info
+            ): suggestion_type
+            for suggestion_type in remaining
+        }
+        futures.update({
+            executor.submit(
+                contextvars.copy_context().run, resolve_prefetched_area,
+                future, business_info, area, openai_api_key, profile_info
+            ): area
+            for area, future in prefetched.items()
+        })
+        for future in as_completed(futures):
+            yield futures[future], future.result()
+
+def resolve_prefetched_area(future, business_info, suggestion_type, openai_api_key, profile_info=None):
+    """Wait for a prefetched area analysis, requesting it again if the prefetch failed or came back empty"""
+    try:
+        analysis = future.result()
+    except Exception as e:
+        logger.warning("Prefetched %s analysis failed: %s", suggestion_type, e)
+        analysis = None
+    if analysis:
+        return analysis
+    return get_specific_suggestions(business_info, suggestion_type, openai_api_key, profile_info)
+
+# Area analysis templates: baseline analyses per business area, generated ahead of traffic by
+# `python -m SMEBoost warm-templates`. "template" serves the closest template as the analysis, "personalize" prefixes
+# it with a short tailoring paragraph from a small LLM call; "off" always runs the full analysis. The interactive
+# area analysis runs before the profile form, so it is only served generic templates; per (revenue range, staff
+# strength, industry) segment templates are only warmed with --segments, for batch runs that know the profile up front
+AREA_TEMPLATES = os.environ.get("SMEBOOST_AREA_TEMPLATES", "off")
+AREA_TEMPLATE_PATH = os.environ.get("SMEBOOST_AREA_TEMPLATE_PATH", ".smeboost_templates.sqlite3")
+TEMPLATE_INDUSTRIES = [
+    industry.strip() for industry in os.environ.get(
+        "SMEBOOST_TEMPLATE_INDUSTRIES",
+        "manufacturing,retail,food and beverage,construction,logistics,technology,professional services,healthcare"
+    ).split(",") if industry.strip()
+]
+# Wildcard for a template dimension, used when the profile is not known yet or has no matching template
+TEMPLATE_ANY = "*"
+
+def area_template_prompt(option, revenue_range, staff_strength, industry):
+    """Build the (prompt, system_content) pair for a baseline area analysis without user specific priorities"""
+    company = "an SME" if TEMPLATE_ANY in (revenue_range, staff_strength, industry) else \
+        f"an SME in {industry} with annual revenue of {revenue_range} and {staff_strength} staff"
+    prompt = f"""Provide a baseline {option} analysis for {company} (Maximum 200 words):
+
+1. Explain how to focus energy and resources on activities that directly support this priority - give 3 examples
+2. How to develop a clear plan with measurable milestones to ensure consistent progress toward the goal.
+3. Explain how to delegate tasks that do not align with the priority to maintain focus and efficiency.
+4. Explain how to communicate priorities clearly to the team to ensure alignment and collective action.
+5. Explain how to regularly review progress and adapt the approach to stay aligned with desired outcomes.
+
+Keep it relevant to businesses of this size and industry."""
+    return prompt, f"You are a specialized {option} consultant writing guidance for small and medium enterprises."
+
+class AreaTemplateStore:
+    """Baseline area analyses in SQLite, each with the hash of the request it was generated from"""
+
+    def __init__(self, path=AREA_TEMPLATE_PATH):
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS area_templates (option TEXT NOT NULL, revenue_range TEXT NOT NULL, "
+            "staff_strength TEXT NOT NULL, industry TEXT NOT NULL, content TEXT NOT NULL, request_hash TEXT NOT NULL, "
+            "created REAL NOT NULL, PRIMARY KEY (option, revenue_range, staff_strength, industry))"
+        )
+        self._conn.commit()
+        self._lock = threading.Lock()
+
+    def get(self, combination):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT content FROM area_templates WHERE option = ? AND revenue_range = ? AND staff_strength = ? AND industry = ?",
+                combination
+            ).fetchone()
+        return row[0] if row else None
+
+    def request_hashes(self):
+        """Return {combination: request_hash} for every stored template"""
+        with self._lock:
+            rows = self._conn.execute("SELECT option, revenue_range, staff_strength, industry, request_hash FROM area_templates")
+            return {tuple(row[:4]): row[4] for row in rows}
+
+    def set(self, combination, content, request_hash):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO area_templates VALUES (?, ?, ?, ?, ?, ?, ?)", (*combination, content, request_hash, time.time())
+            )
+            self._conn.commit()
+
+@st.cache_resource(show_spinner=False)
+def get_area_template_store():
+    """Return the process-wide area template store"""
+    return AreaTemplateStore()
+
+def area_template_combinations(options=None, industries=None, segments=False):
+    """Every (option, revenue_range, staff_strength, industry) to warm: the generic wildcard templates, then the
+    segment templates when segments is set"""
+    options = options or list(BUSINESS_OPTIONS)
+    industries = industries or TEMPLATE_INDUSTRIES
+    combinations = [(option, TEMPLATE_ANY, TEMPLATE_ANY, TEMPLATE_ANY) for option in options]
+    if segments:
+        combinations += list(itertools.product(options, REVENUE_RANGES, STAFF_STRENGTHS, industries))
+    return combinations
+
+def area_template_request_hash(combination):
+    """Hash of the model and prompt a template is generated with, so changing either regenerates it"""
+    return response_cache_key(TASK_MODELS["area_template"][0], *reversed(area_template_prompt(*combination)))
+
+def warm_area_templates(openai_api_key, options=None, industries=None, workers=MAX_CONCURRENT_REQUESTS, limit=None,
+                        segments=False):
+    """Generate the area templates that are missing or outdated, returning (generated, up to date, failed).
+
+    Every template is saved as soon as it is generated, so an interrupted run resumes where it stopped.
+    """
+    store = get_area_template_store()
+    stored = store.request_hashes()
+    combinations = area_template_combinations(options, industries, segments)
+    pending = []
+    for combination in combinations:
+        request_hash = area_template_request_hash(combination)
+        if stored.get(combination) != request_hash:
+            pending.append((combination, request_hash))
+    up_to_date = len(combinations) - len(pending)
+    if limit is not None:
+        pending = pending[:limit]
+    logger.info("%d area templates to generate, %d up to date", len(pending), up_to_date)
+
+    def generate(item):
+        # Let interactive sessions in the same process go first when rate limited
+        request_priority.set(PRIORITY_BATCH)
+        combination, request_hash = item
+        content = get_openai_response(*area_template_prompt(*combination), openai_api_key, task="area_template")
+        if not content:
+            logger.error("Template %s failed", "/".join(combination))
+            return False
+        store.set(combination, content, request_hash)
+        return True
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        results = list(executor.map(generate, pending))
+    return results.count(True), up_to_date, results.count(False)
+
+def find_area_template(option, profile_info=None):
+    """Return the closest stored template for an option: the profile's exact combination, else the generic one"""
+    store = get_area_template_store()
+    if profile_info:
+        industry_text = str(profile_info.get("industry", "")).lower()
+        industry = next((name for name in TEMPLATE_INDUSTRIES if name.lower() in industry_text), None)
+        if industry:
+            content = store.get((option, profile_info.get("revenue_range"), profile_info.get("staff_strength"), industry))
+            if content:
+                return content
+    return store.get((option, TEMPLATE_ANY, TEMPLATE_ANY, TEMPLATE_ANY))
+
+def personalize_area_template(template, business_info, suggestion_type, openai_api_key):
+    """Prefix a baseline area analysis with a short paragraph tying it to the user's priorities"""
+    prompt = fit_prompt_to_budget("area_personalization", lambda business_info: f"""The user's stated business priorities:
+{business_info}
+
+Write 2-3 sentences (maximum 60 words) on what matters most for them in {suggestion_type}, given those priorities.
+Do not repeat this baseline guidance, which follows your text:
+{template}""", business_info)
+    intro = get_openai_response(
+        prompt, f"You are a specialized {suggestion_type} consultant responding to specific business priorities.",
+        openai_api_key, task="area_personalization"
+    )
+    return f"{intro}\n\n{template}" if intro else template
+
+# Speculative area prefetch: once the business priorities are submitted, the AREA_PREFETCH_COUNT areas the user is
+# most likely to select are analysed in the background at PRIORITY_PREFETCH while the checkboxes are being picked.
+# Prefetches of areas left unselected are cancelled if not started yet; those already running count as wasted spend,
+# and no new prefetches start once the waste in the last AREA_PREFETCH_WASTE_WINDOW seconds exceeds the budget
+AREA_PREFETCH_COUNT = int(os.environ.get("SMEBOOST_AREA_PREFETCH_COUNT", "0"))
+AREA_PREFETCH_WORKERS = int(os.environ.get("SMEBOOST_AREA_PREFETCH_WORKERS", "2"))
+AREA_PREFETCH_WASTE_BUDGET = float(os.environ.get("SMEBOOST_AREA_PREFETCH_WASTE_BUDGET", "0.5"))
+AREA_PREFETCH_WASTE_WINDOW = float(os.environ.get("SMEBOOST_AREA_PREFETCH_WASTE_WINDOW", str(60 * 60)))
+# Weight of an area's share of past selections against one keyword match in the priorities text
+AREA_PREFETCH_HISTORY_WEIGHT = float(os.environ.get("SMEBOOST_AREA_PREFETCH_HISTORY_WEIGHT", "2"))
+
+# Lowercase fragments of the priorities text that suggest each business area
+AREA_KEYWORDS = {
+    "Business Valuation": ("valuation", "valuat", "worth", "value of", "exit", "sell the business", "investor"),
+    "Financial Healthcheck": ("cash flow", "cashflow", "financial", "profit", "margin", "debt", "expense", "accounts"),
+    "Business Partnering": ("partner", "collaborat", "alliance", "joint venture", "distributor", "supplier"),
+    "Fund Raising": ("fund", "raise", "capital", "investor", "equity", "grant", "venture"),
+    "Bankability and Leverage": ("bank", "loan", "credit", "financing", "borrow", "leverage", "debt"),
+    "Mergers and Acquisitions": ("merger", "merge", "acqui", "takeover", "buy out", "consolidat"),
+    "Budget and Resourcing": ("budget", "resourc", "hire", "hiring", "staff", "allocat", "productivity", "cost"),
+    "Business Remodelling": ("remodel", "transform", "digital", "pivot", "restructur", "new market", "expand", "export"),
+    "Succession Planning": ("succession", "successor", "retire", "next generation", "family", "handover", "leadership")
+}
+
+# Prefetched analyses for one priorities text, as {area: future}
+AreaPrefetch = namedtuple("AreaPrefetch", ["business_info", "futures"])
+
+def area_analysis_cost(business_info, suggestion_type, content):
+    """Estimated USD cost of an area analysis, from its prompt and response sizes"""
+    prompt, system_content = area_analysis_prompt(business_info, suggestion_type)
+    cost = completion_cost(
+        TASK_MODELS["area_analysis"][0], estimate_tokens(prompt) + estimate_tokens(system_content), estimate_tokens(content or "")
+    )
+    return cost or 0.0
+
+class AreaPrefetcher:
+    """Background analyses of the business areas a user is likely to select, with a rolling cap on wasted spend"""
+
+    def __init__(self, workers=AREA_PREFETCH_WORKERS, waste_budget=AREA_PREFETCH_WASTE_BUDGET, waste_window=AREA_PREFETCH_WASTE_WINDOW):
+        self.waste_budget = waste_budget
+        self.waste_window = waste_window
+        self._executor = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="area-prefetch")
+        self._selections = Counter()
+        self._submissions = 0
+        self._waste = deque()
+        self._counts = Counter()
+        self._lock = threading.Lock()
+
+    def likely_areas(self, business_info, count):
+        """Rank areas by keyword matches in the priorities text plus their share of past selections"""
+        text = business_info.lower()
+        with self._lock:
+            shares = {area: self._selections[area] / self._submissions if self._submissions else 0.0 for area in BUSINESS_OPTIONS}
+        scores = {
+            area: sum(keyword in text for keyword in AREA_KEYWORDS.get(area, ())) + AREA_PREFETCH_HISTORY_WEIGHT * shares[area]
+            for area in BUSINESS_OPTIONS
+        }
+        ranked = sorted((area for area in scores if scores[area] > 0), key=scores.get, reverse=True)
+        return ranked[:count]
+
+    def wasted_spend(self):
+        """USD spent on prefetched analyses nobody selected within the waste window"""
+        with self._lock:
+            cutoff = time.monotonic() - self.waste_window
+            while self._waste and self._waste[0][0] < cutoff:
+                self._waste.popleft()
+            return sum(cost for _, cost in self._waste)
+
+    def start(self, business_info, openai_api_key, count=AREA_PREFETCH_COUNT):
+        """Start prefetching the likeliest areas, returning an AreaPrefetch to pass to claim"""
+        if self.wasted_spend() >= self.waste_budget:
+            self._count("skipped")
+            return AreaPrefetch(business_info, {})
+        futures = {}
+        for area in self.likely_areas(business_info, count):
+            futures[area] = self._executor.submit(self._analyse, business_info, area, openai_api_key)
+            self._count("started")
+        return AreaPrefetch(business_info, futures)
+
+    def _analyse(self, business_info, area, openai_api_key):
+        # Interactive and batch requests go first whenever the rate limiter is saturated
+        request_priority.set(PRIORITY_PREFETCH)
+        return get_specific_suggestions(business_info, area, openai_api_key)
+
+    def claim(self, prefetch, selected_areas):
+        """Record a form submission's selected areas and return the prefetched futures usable for them,
+        cancelling or writing off the rest"""
+        with self._lock:
+            self._submissions += 1
+            self._selections.update(selected_areas)
+        return self._settle(prefetch, selected_areas)
+
+    def write_off(self, prefetch):
+        """Cancel or write off every prefetched analysis without counting it as a form submission"""
+        self._settle(prefetch, ())
+
+    def _settle(self, prefetch, selected_areas):
+        claimed = {}
+        for area, future in prefetch.futures.items():
+            if area in selected_areas and not (future.done() and (future.cancelled() or future.exception() or not future.result())):
+                claimed[area] = future
+                self._count("used")
+            elif future.cancel():
+                self._count("cancelled")
+            else:
+                self._count("wasted")
+                future.add_done_callback(functools.partial(self._record_waste, prefetch.business_info, area))
+        return claimed
+
+    def _record_waste(self, business_info, area, future):
+        content = None if future.exception() else future.result()
+        with self._lock:
+            self._waste.append((time.monotonic(), area_analysis_cost(business_info, area, content)))
+
+    def _count(self, outcome):
+        with self._lock:
+            self._counts[outcome] += 1
+
+    def stats(self):
+        with self._lock:
+            counts = dict(self._counts)
+        return {"started": 0, "used": 0, "cancelled": 0, "wasted": 0, "skipped": 0, **counts, "wasted_usd": self.wasted_spend()}
+
+@st.cache_resource(show_spinner=False)
+def get_area_prefetcher():
+    """Return the process-wide area prefetcher, or None when prefetching is disabled"""
+    return AreaPrefetcher() if AREA_PREFETCH_COUNT > 0 else None
+
+def start_area_prefetch(business_info, openai_api_key):
+    """Start prefetching area analyses for this session's priorities, writing off any earlier prefetch"""
+    prefetcher = get_area_prefetcher()
+    if prefetcher is None:
+        return
+    previous = st.session_state.pop('area_prefetch', None)
+    if previous is not None:
+        prefetcher.write_off(previous)
+    st.session_state.area_prefetch = prefetcher.start(business_info, openai_api_key)
+
+def claim_area_prefetch(business_info, selected_areas):
+    """Return {area: future} of this session's prefetched analyses usable for the selected areas"""
+    prefetcher = get_area_prefetcher()
+    prefetch = st.session_state.pop('area_prefetch', None)
+    if prefetcher is None or prefetch is None:
+        return {}
+    if prefetch.business_info != business_info:
+        # Prefetched for different priorities: none of it is usable, but the selection still counts
+        prefetcher.write_off(prefetch)
+        prefetch = AreaPrefetch(business_info, {})
+    return prefetcher.claim(prefetch, selected_areas)
+
+def area_analysis_key(area):
+    """Session state key under which the analysis for a business area is stored"""
+    return f"{area.lower().replace(' ', '_')}_analysis"
+def comprehensive_summary_prompt(profile_info, business_priorities, company_summary):
+    """Build the (prompt, system_content) pair for the comprehensive business analysis"""
+    # The previous analysis is the bulkiest input, so it is what gets trimmed to the prompt budget
+    prompt = fit_prompt_to_budget("comprehensive_summary", lambda company_summary: f"""
     Based on the following information, provide a comprehensive more than 1500-words analysis:
     
     Company Profile:
@@ -92,7 +1436,11 @@ def generate_comprehensive_summary(profile_info, business_priorities, company_su
     
     Previous Analysis: {company_summary}
     
-    Please provide:
+    {STRUCTURED_ANALYSIS_INSTRUCTIONS if STRUCTURED_ANALYSIS != "off" else TEXT_ANALYSIS_INSTRUCTIONS}
+    """, company_summary)
+    return prompt, "You are a senior business consultant providing comprehensive analysis and recommendations"
+
+TEXT_ANALYSIS_INSTRUCTIONS = """Please provide:
     1. Synthesized company summary and priorities 
     2. 5 specific reasons for needing an advisor/coach 
     3. Detailed advisor/coach solutions for key pain points
@@ -105,15 +1453,308 @@ def generate_comprehensive_summary(profile_info, business_priorities, company_su
         Short Term (3 Months)
         • Increase website traffic by 20% through SEO and social media marketing
         -Subtopic no bullet
-        -answer with bullet 
+        -answer with bullet """
+
+STRUCTURED_ANALYSIS_INSTRUCTIONS = """Respond with a JSON object with these fields, using plain text without markdown in every string:
+    - "summary": synthesized company summary and priorities
+    - "reasons": 5 specific reasons for needing an advisor/coach
+    - "solutions": detailed advisor/coach solutions for key pain points, as a list of objects with a short
+      "category" and its "points"
+    - "kpis": an object with "short" (3 months), "medium" (3-6 months) and "long" (6-12 months) lists of
+      specific KPIs, e.g. "Increase website traffic by 20% through SEO and social media marketing"
+    """
+
+COMPREHENSIVE_ANALYSIS_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "summary": {"type": "string"},
+        "reasons": {"type": "array", "items": {"type": "string"}},
+        "solutions": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "category": {"type": "string"},
+                    "points": {"type": "array", "items": {"type": "string"}}
+                },
+                "required": ["category", "points"],
+                "additionalProperties": False
+            }
+        },
+        "kpis": {
+            "type": "object",
+            "properties": {period: {"type": "array", "items": {"type": "string"}} for period in ("short", "medium", "long")},
+            "required": ["short", "medium", "long"],
+            "additionalProperties": False
+        }
+    },
+    "required": ["summary", "reasons", "solutions", "kpis"],
+    "additionalProperties": False
+}
+
+def comprehensive_response_format():
+    """Return the response_format requested for the comprehensive analysis, or None for free text"""
+    if STRUCTURED_ANALYSIS == "json_schema":
+        return {
+            "type": "json_schema",
+            "json_schema": {"name": "comprehensive_analysis", "strict": True, "schema": COMPREHENSIVE_ANALYSIS_SCHEMA}
+        }
+    if STRUCTURED_ANALYSIS == "json_object":
+        return {"type": "json_object"}
+    return None
+
+# Context compression for the comprehensive analysis: "off" passes the full company summary as "Previous Analysis",
+# "extractive" condenses it locally into a digest of key facts, SWOT and financial notes, and "model" asks the
+# context_digest route (LIGHT_MODEL by default) for that digest. Extractive digests of the last CONTEXT_DIGEST_CACHE_SIZE
+# summaries are kept in memory; model digests are cached in the response cache like any other completion
+CONTEXT_COMPRESSION = os.environ.get("SMEBOOST_CONTEXT_COMPRESSION", "off")
+CONTEXT_DIGEST_WORDS = int(os.environ.get("SMEBOOST_CONTEXT_DIGEST_WORDS", "300"))
+CONTEXT_DIGEST_CACHE_SIZE = int(os.environ.get("SMEBOOST_CONTEXT_DIGEST_CACHE_SIZE", "128"))
+
+# Digest sections and the keywords that route a sentence to them; unmatched sentences are key facts
+DIGEST_SECTIONS = {
+    "SWOT": ("strength", "weakness", "opportunit", "threat", "swot", "competit", "risk"),
+    "Financial notes": ("revenue", "profit", "margin", "cash", "cost", "financ", "fund", "debt", "capital",
+                        "pricing", "budget", "valuation", "rm ", "$", "%"),
+}
+
+DIGEST_STOPWORDS = frozenset(
+    "the and for with that this from their they have has are was were will would could should into also "
+    "which while such more most other than then them these those its it's our your about over within across "
+    "company business".split()
+)
+
+@functools.lru_cache(maxsize=CONTEXT_DIGEST_CACHE_SIZE)
+def extractive_digest(text, max_words=CONTEXT_DIGEST_WORDS):
+    """Condense text into key facts, SWOT and financial notes bullets by picking its most representative sentences"""
+    sentences = [clean_text(s) for s in re.split(r'(?<=[.!?])\s+|\n+', text)]
+    sentences = [s for s in sentences if len(s.split()) >= 4]
+    if not sentences:
+        return text
+
+    # Score sentences by the document frequency of their content words, favouring concrete figures
+    tokens = [[w for w in re.findall(r"[a-z][a-z'\-]{2,}", s.lower()) if w not in DIGEST_STOPWORDS] for s in sentences]
+    frequency = Counter(w for words in tokens for w in set(words))
+    scores = [
+        sum(frequency[w] for w in set(words)) / (len(words) ** 0.5 or 1) * (1.5 if re.search(r'\d', s) else 1)
+        for s, words in zip(sentences, tokens)
+    ]
+
+    grouped = {"Key facts": [], **{section: [] for section in DIGEST_SECTIONS}}
+    for index, s in enumerate(sentences):
+        lower = s.lower()
+        section = next((name for name, keywords in DIGEST_SECTIONS.items() if any(k in lower for k in keywords)), "Key facts")
+        grouped[section].append(index)
+
+    # Split the word budget evenly, then keep each section's picks in their original order
+    quota = max_words // len(grouped)
+    lines = []
+    for section, indexes in grouped.items():
+        picked, words = [], 0
+        for index in sorted(indexes, key=lambda i: -scores[i]):
+            length = len(sentences[index].split())
+            if picked and words + length > quota:
+                continue
+            picked.append(index)
+            words += length
+        if picked:
+            lines.append(f"{section}:")
+            lines += [f"- {sentences[index]}" for index in sorted(picked)]
+    return "\n".join(lines)
+
+def model_digest(text, openai_api_key):
+    """Ask the context_digest model for a compact structured digest of text, or None on failure"""
+    prompt = fit_prompt_to_budget("context_digest", lambda text: f"""Condense this company analysis into a digest of at most {CONTEXT_DIGEST_WORDS} words
+    with these headings, using short bullets and keeping every figure:
+    Key facts:
+    SWOT:
+    Financial notes:
+
+    {text}
+    """, text)
+    return get_openai_response(
+        prompt, "You condense business analyses into compact factual digests.", openai_api_key, task="context_digest"
+    )
+
+def compress_company_summary(company_summary, openai_api_key, mode=None):
+    """Return the company summary context for the comprehensive analysis, compressed according to CONTEXT_COMPRESSION"""
+    mode = mode or CONTEXT_COMPRESSION
+    if mode == "off" or not company_summary:
+        return company_summary
+    if mode == "model":
+        # get_openai_response caches the digest under the hash of its prompt
+        return model_digest(company_summary, openai_api_key) or company_summary
+    return extractive_digest(company_summary)
+
+# Semantic cache: reuse the analyses of near-identical profiles across sessions. "final" serves a match as the answer,
+# "draft" only shows a matching company summary as a labelled draft while the fresh summary streams in; the analyses
+# are still built from this profile's own summary. Profiles only match within the same revenue range, staff strength
+# and customer base
+SEMANTIC_CACHE = os.environ.get("SMEBOOST_SEMANTIC_CACHE", "off")
+SEMANTIC_THRESHOLD = float(os.environ.get("SMEBOOST_SEMANTIC_THRESHOLD", "0.9"))
+SEMANTIC_DIMENSIONS = int(os.environ.get("SMEBOOST_SEMANTIC_DIMENSIONS", "1024"))
+SEMANTIC_MAX_ENTRIES = int(os.environ.get("SMEBOOST_SEMANTIC_MAX_ENTRIES", "10000"))
+# Indexes switch from brute force search to locality sensitive hashing once they hold this many entries
+SEMANTIC_LSH_MIN_ENTRIES = int(os.environ.get("SMEBOOST_SEMANTIC_LSH_MIN_ENTRIES", "2000"))
+
+SEMANTIC_PARTITION_FIELDS = ("revenue_range", "staff_strength", "customer_base")
+SEMANTIC_TEXT_FIELDS = ("business_model", "industry", "products_services", "differentiation")
+
+def embed_text(text, dimensions=SEMANTIC_DIMENSIONS):
+    """Hashed, sublinearly weighted unigram and bigram vector of text, L2 normalised so dot products are cosines"""
+    words = [w for w in re.findall(r"[a-z0-9]+", text.lower()) if w not in DIGEST_STOPWORDS]
+    vector = np.zeros(dimensions, dtype=np.float32)
+    for term, count in Counter(words + [f"{a} {b}" for a, b in zip(words, words[1:])]).items():
+        digest = zlib.crc32(term.encode("utf-8"))
+        # The sign bit spreads hash collisions around zero instead of letting them add up
+        vector[digest % dimensions] += (1 + math.log(count)) * (1 if digest & 0x80000000 else -1)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+class SemanticIndex:
+    """Vectors with their values, searched by brute force and by random hyperplane LSH once large enough.
+
+    Holds at most max_entries, overwriting the oldest entry when full.
     """
+
+    LSH_BANDS = 16
+    LSH_ROWS = 8
+
+    def __init__(self, dimensions=SEMANTIC_DIMENSIONS, max_entries=SEMANTIC_MAX_ENTRIES, lsh_min_entries=SEMANTIC_LSH_MIN_ENTRIES, seed=0):
+        self.max_entries = max_entries
+        self.lsh_min_entries = lsh_min_entries
+        self._vectors = np.zeros((min(64, max_entries), dimensions), dtype=np.float32)
+        self._values = []
+        self._next = 0
+        self._planes = np.random.default_rng(seed).standard_normal((self.LSH_BANDS * self.LSH_ROWS, dimensions)).astype(np.float32)
+        self._buckets = None
+        self._signatures = {}
+
+    def __len__(self):
+        return len(self._values)
+
+    def _band_keys(self, vector):
+        bits = (self._planes @ vector) > 0
+        return [(band, bits[band * self.LSH_ROWS:(band + 1) * self.LSH_ROWS].tobytes()) for band in range(self.LSH_BANDS)]
+
+    def _index_slot(self, slot):
+        keys = self._band_keys(self._vectors[slot])
+        self._signatures[slot] = keys
+        for key in keys:
+            self._buckets.setdefault(key, set()).add(slot)
+
+    def add(self, vector, value):
+        if len(self._values) < self.max_entries:
+            slot = len(self._values)
+            if slot == len(self._vectors):
+                grown = np.zeros((min(2 * slot, self.max_entries), self._vectors.shape[1]), dtype=np.float32)
+                grown[:slot] = self._vectors
+                self._vectors = grown
+            self._values.append(value)
+        else:
+            slot = self._next
+            self._next = (slot + 1) % self.max_entries
+            self._values[slot] = value
+            for key in self._signatures.pop(slot, ()):
+                self._buckets[key].discard(slot)
+        self._vectors[slot] = vector
+        if self._buckets is not None:
+            self._index_slot(slot)
+        elif len(self._values) >= self.lsh_min_entries:
+            self._buckets = {}
+            for existing in range(len(self._values)):
+                self._index_slot(existing)
+
+    def search(self, vector):
+        """Return (similarity, value) of the nearest entry, or None when empty"""
+        if not self._values:
+            return None
+        if self._buckets is None:
+            candidates = np.arange(len(self._values))
+        else:
+            candidates = np.fromiter(
+                set().union(*(self._buckets.get(key, ()) for key in self._band_keys(vector))), dtype=np.int64
+            )
+            if not len(candidates):
+                return None
+        scores = self._vectors[candidates] @ vector
+        best = int(np.argmax(scores))
+        return float(scores[best]), self._values[int(candidates[best])]
+
+    def memory_bytes(self):
+        """Approximate memory held by the vectors, hyperplanes and LSH buckets"""
+        bucket_bytes = 0 if self._buckets is None else sum(64 + 8 * len(slots) for slots in self._buckets.values())
+        return self._vectors.nbytes + self._planes.nbytes + bucket_bytes
+
+class SemanticCache:
+    """Analyses indexed by the embedding of their inputs, partitioned by namespace and the profile's radio choices"""
+
+    def __init__(self, threshold=SEMANTIC_THRESHOLD):
+        self.threshold = threshold
+        self.hits = 0
+        self.misses = 0
+        self.lookup_seconds = 0.0
+        self._indexes = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _partition(namespace, profile_info):
+        return (namespace,) + tuple(profile_info.get(field, "") for field in SEMANTIC_PARTITION_FIELDS)
+
+    @staticmethod
+    def _text(profile_info, extra_text):
+        return "\n".join([*(str(profile_info.get(field, "")) for field in SEMANTIC_TEXT_FIELDS), extra_text or ""])
+
+    def get(self, namespace, profile_info, extra_text=""):
+        """Return (value, similarity) of the closest entry above the threshold, or None"""
+        start = time.perf_counter()
+        vector = embed_text(self._text(profile_info, extra_text))
+        with self._lock:
+            index = self._indexes.get(self._partition(namespace, profile_info))
+            match = index.search(vector) if index is not None else None
+            self.lookup_seconds += time.perf_counter() - start
+            if match is None or match[0] < self.threshold:
+                self.misses += 1
+                return None
+            self.hits += 1
+        similarity, value = match
+        return value, similarity
+
+    def set(self, namespace, profile_info, value, extra_text=""):
+        vector = embed_text(self._text(profile_info, extra_text))
+        with self._lock:
+            self._indexes.setdefault(self._partition(namespace, profile_info), SemanticIndex()).add(vector, value)
+
+    def stats(self):
+        """Return hit and miss counters, entry count, mean lookup time in ms and index memory in bytes"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": sum(len(index) for index in self._indexes.values()),
+                "lookup_ms": self.lookup_seconds * 1000 / lookups if lookups else 0.0,
+                "memory_bytes": sum(index.memory_bytes() for index in self._indexes.values())
+            }
+
+@st.cache_resource(show_spinner=False)
+def get_semantic_cache():
+    """Return the semantic cache shared by every session in this process, or None when SEMANTIC_CACHE is off"""
+    if SEMANTIC_CACHE == "off":
+        return None
+    return SemanticCache()
+
+def generate_comprehensive_summary(profile_info, business_priorities, company_summary, openai_api_key):
+    """Generate comprehensive business analysis and recommendations"""
+    context = compress_company_summary(company_summary, openai_api_key)
+    prompt, system_content = comprehensive_summary_prompt(profile_info, business_priorities, context)
     return get_openai_response(
-        prompt,
-        "You are a senior business consultant providing comprehensive analysis and recommendations",
-        openai_api_key
+        prompt, system_content, openai_api_key, response_format=comprehensive_response_format(),
+        task="comprehensive_summary"
     )
-def get_company_summary(profile_info, openai_api_key):
-    """Generate comprehensive company summary"""
+
+def company_summary_prompt(profile_info):
+    """Build the (prompt, system_content) pair for the company summary"""
     prompt = f"""
     Based on the following company profile, provide a comprehensive 1500-word summary of the business in a paragraph.I dont want in points:
     
@@ -132,11 +1773,213 @@ def get_company_summary(profile_info, openai_api_key):
     4. SWOT Analysis
     5. Industry overview with supporting facts and statistics
     """
-    return get_openai_response(
-        prompt,
-        "You are a business analyst providing comprehensive company summaries in a paragraph.",
-        openai_api_key
-    )
+    return prompt, "You are a business analyst providing comprehensive company summaries in a paragraph."
+
+def get_company_summary(profile_info, openai_api_key):
+    """Generate comprehensive company summary"""
+    prompt, system_content = company_summary_prompt(profile_info)
+    return get_openai_response(prompt, system_content, openai_api_key, task="company_summary")
+
+class ProfileAnalysisPipeline:
+    """Stream the company summary and comprehensive analysis, overlapping the two requests according to PIPELINE_MODE"""
+
+    def __init__(self, profile_info, business_priority_suggestions, openai_api_key, mode=PIPELINE_MODE):
+        self.profile_info = profile_info
+        self.business_priority_suggestions = business_priority_suggestions
+        self.openai_api_key = openai_api_key
+        self.mode = mode
+        self.company_summary = None
+        self.draft_summary = None
+        self._comprehensive_stream = None
+        self._comprehensive_cached = False
+        if mode == "speculative":
+            self._start_comprehensive("")
+
+    def _start_comprehensive(self, company_summary):
+        semantic_cache = get_semantic_cache()
+        if semantic_cache is not None and SEMANTIC_CACHE == "final":
+            match = semantic_cache.get("comprehensive_summary", self.profile_info, self.business_priority_suggestions)
+            if match is not None:
+                self._comprehensive_stream = iter([match[0]])
+                self._comprehensive_cached = True
+                return
+
+        def build_request():
+            context = compress_company_summary(company_summary, self.openai_api_key)
+            return comprehensive_summary_prompt(self.profile_info, self.business_priority_suggestions, context)
+
+        self._comprehensive_stream = BackgroundStream(
+            build_request,
+            self.openai_api_key,
+            comprehensive_response_format(),
+            task="comprehensive_summary"
+        )
+
+    def company_summary_draft(self):
+        """Return a near-identical profile's company summary to show while this one streams in, or None.
+
+        The draft is another company's text, so it is only ever shown labelled as such and never used as context.
+        """
+        semantic_cache = get_semantic_cache()
+        if semantic_cache is not None and SEMANTIC_CACHE == "draft" and self.draft_summary is None:
+            match = semantic_cache.get("company_summary", self.profile_info)
+            self.draft_summary = match[0] if match is not None else None
+        return self.draft_summary
+
+    def company_summary_chunks(self):
+        """Yield the company summary as it streams in, starting the comprehensive analysis early when overlapping"""
+        semantic_cache = get_semantic_cache()
+        if semantic_cache is not None and SEMANTIC_CACHE == "final":
+            match = semantic_cache.get("company_summary", self.profile_info)
+            if match is not None:
+                self.company_summary = match[0]
+                yield match[0]
+                return
+
+        received = []
+        received_chars = 0
+        for chunk in stream_openai_response(*company_summary_prompt(self.profile_info), self.openai_api_key, task="company_summary"):
+            received.append(chunk)
+            received_chars += len(chunk)
+            yield chunk
+            # Start the comprehensive analysis as soon as enough of the summary is available
+            if self._comprehensive_stream is None and self.mode == "overlap" and received_chars >= PIPELINE_OVERLAP_CHARS:
+                self._start_comprehensive("".join(received))
+        self.company_summary = "".join(received) or None
+        if semantic_cache is not None and self.company_summary:
+            semantic_cache.set("company_summary", self.profile_info, self.company_summary)
+
+    def comprehensive_summary_chunks(self):
+        """Yield the comprehensive analysis, starting it from the full company summary if not already running"""
+        if self._comprehensive_stream is None:
+            self._start_comprehensive(self.company_summary)
+        received = []
+        for chunk in self._comprehensive_stream:
+            received.append(chunk)
+            yield chunk
+        semantic_cache = get_semantic_cache()
+        content = "".join(received)
+        if semantic_cache is not None and not self._comprehensive_cached and is_cacheable_response(content, comprehensive_response_format()):
+            semantic_cache.set("comprehensive_summary", self.profile_info, content, self.business_priority_suggestions)
+
+def run_profile_analysis_pipeline(profile_info, business_priority_suggestions, business_priorities, selected_areas, openai_api_key):
+    """Stream the company summary and comprehensive analysis into the page, overlapping them with the static PDF sections.
+
+    Returns (company_summary, comprehensive_summary). The static sections are rendered into the section cache
+    only when PDFs are rendered in this process; worker processes keep their own caches.
+    """
+    static_future = None
+    if PDF_RENDER_WORKERS <= 0:
+        executor = ThreadPoolExecutor(max_workers=1, initializer=script_context_initializer())
+        static_future = executor.submit(prerender_static_sections, profile_info, business_priorities, selected_areas)
+        executor.shutdown(wait=False)
+
+    stream = get_service().analyse_profile(ProfileAnalysisRequest(profile_info, business_priority_suggestions, openai_api_key))
+
+    with st.expander("Company Summary", expanded=True):
+        draft_placeholder = st.empty()
+        draft = run_service(stream.company_summary_draft())
+        if draft:
+            draft_placeholder.info(f"**Draft from a similar company profile** - replaced once this profile's summary is written\n\n{draft}")
+        st.write_stream(iterate_service(stream.company_summary_chunks()))
+        draft_placeholder.empty()
+
+    with st.expander("Comprehensive Analysis and Advisory Recommendations", expanded=True):
+        st.markdown("### Complete Business Analysis")
+        if STRUCTURED_ANALYSIS == "off":
+            comprehensive_summary = st.write_stream(iterate_service(stream.comprehensive_summary_chunks()))
+            comprehensive_summary = comprehensive_summary if isinstance(comprehensive_summary, str) and comprehensive_summary else None
+        else:
+            with st.spinner("Writing comprehensive analysis..."):
+                comprehensive_summary = "".join(iterate_service(stream.comprehensive_summary_chunks())) or None
+            if comprehensive_summary:
+                st.markdown(analysis_markdown(comprehensive_summary))
+
+    show_service_errors(stream.errors)
+    if static_future:
+        static_future.result()
+    return stream.company_summary, comprehensive_summary
+
+class ReportJob:
+    """State of a background report generation job"""
+
+    def __init__(self):
+        self.id = uuid.uuid4().hex
+        self.status = "queued"
+        self.stage = "Waiting for a worker"
+        self.progress = 0.0
+        self.partial = {}
+        self.result = None
+        self.error = None
+        self.created = time.time()
+        self.expires = None
+
+    @property
+    def finished(self):
+        return self.status in ("done", "failed")
+
+class ReportJobQueue:
+    """In-process worker pool running report jobs, keeping their results until they expire"""
+
+    def __init__(self, max_workers=REPORT_JOB_WORKERS, ttl=REPORT_JOB_TTL):
+        self.ttl = ttl
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="report-job")
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def submit(self, fn, *args, **kwargs):
+        """Queue fn(job, *args, **kwargs) and return the new job id"""
+        job = ReportJob()
+        with self._lock:
+            self._purge_expired()
+            self._jobs[job.id] = job
+        self._executor.submit(self._run, job, fn, args, kwargs)
+        return job.id
+
+    def get(self, job_id):
+        """Return the job with the given id, or None if unknown or expired"""
+        with self._lock:
+            self._purge_expired()
+            return self._jobs.get(job_id)
+
+    def _run(self, job, fn, args, kwargs):
+        job.status = "running"
+        # Errors reported on this worker thread are otherwise only logged, so collect them for the job's error message
+        errors = []
+        context = contextvars.copy_context()
+        context.run(service_errors.set, errors)
+        try:
+            job.result = context.run(fn, job, *args, **kwargs)
+            job.status = "done"
+            job.stage = "Report ready"
+            job.progress = 1.0
+        except Exception as e:
+            job.error = "; ".join([str(e), *errors])
+            job.status = "failed"
+            job.stage = "Report generation failed"
+        finally:
+            job.expires = time.time() + self.ttl
+
+    def _purge_expired(self):
+        now = time.time()
+        expired = [job_id for job_id, job in self._jobs.items() if job.expires is not None and job.expires < now]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+@st.cache_resource(show_spinner=False)
+def get_report_job_queue():
+    """Return the process-wide report job queue shared by all sessions"""
+    return ReportJobQueue()
+
+def generate_report_job(job, request):
+    """Generate the report for a ReportRequest in a background job through the service, recording progress on the job"""
+    response = run_service(get_service().generate_report(request, sink=create_pdf_sink(job.id), job=job, strict=True))
+    return {
+        'company_summary': response.texts.get('company_summary'),
+        'comprehensive_summary': response.texts.get('comprehensive_summary'),
+        'pdf': response.pdf
+    }
+
 def initialize_session_state():
     """Initialize Streamlit session state variables"""
     if 'show_options' not in st.session_state:
@@ -151,13 +1994,11 @@ def render_header():
     """Render application header"""
     col1, col2 = st.columns([3, 1])
     with col1:
-        logo_path = "smeimge.jpg"
-        if os.path.exists(logo_path):
-            st.image(logo_path, width=100)
+        if os.path.exists(SME_LOGO_PATH):
+            st.image(SME_LOGO_PATH, width=100)
     with col2:
-        logo_path = "finb.jpg"
-        if os.path.exists(logo_path):
-            st.image(logo_path, width=100)
+        if os.path.exists(FINB_LOGO_PATH):
+            st.image(FINB_LOGO_PATH, width=100)
 def render_business_priority_form():
     """Render business priority input form"""
     with st.form(key="business_priority_form"):
@@ -175,9 +2016,10 @@ def render_business_options(business_priorities, openai_api_key):
     # Generate business priority suggestions if not already present
     if 'business_priority_suggestions' not in st.session_state.user_data:
         with st.spinner("Analyzing your business priorities..."):
-            suggestions = business_priority(business_priorities, openai_api_key)
-            if suggestions:
-                st.session_state.user_data['business_priority_suggestions'] = suggestions
+            response = run_service(get_service().prioritize(PriorityRequest(business_priorities, openai_api_key)))
+            show_service_errors(response.errors)
+            if response.suggestions:
+                st.session_state.user_data['business_priority_suggestions'] = response.suggestions
     
     # Display suggestions
     if st.session_state.user_data.get('business_priority_suggestions'):
@@ -215,19 +2057,15 @@ def render_business_profile_form():
         profile_info = {
             "revenue_range": st.radio(
                 "Select your annual revenue range:",
-                ["Below RM 1 Million", 
-                "RM 1-5 Million", 
-                "RM 5-10 Million", 
-                "RM 10-50 Million", 
-                "Above RM 50 Million"]
+                REVENUE_RANGES
             ),
             "staff_strength": st.radio(
                 "Select your current staff strength:",
-                ["1-10", "11-50", "51-200", "201-500", "500+"]
+                STAFF_STRENGTHS
             ),
             "customer_base": st.radio(
                 "Select your primary customer base:",
-                ["Only Domestic", "Only off-shore", "Mixed"]
+                CUSTOMER_BASES
             ),
             "business_model": st.text_area(
                 "Describe your business model:",
@@ -251,9 +2089,115 @@ def render_business_profile_form():
             return profile_info
     return None
 
+def render_report_job(job_id):
+    """Render the status of a background report job, offering the PDF once it is ready"""
+    job = get_report_job_queue().get(job_id)
+    if job is None:
+        st.warning("Your report has expired. Please submit your business profile again.")
+        del st.session_state.report_job_id
+        return
+
+    if not job.finished:
+        render_report_job_progress(job_id)
+        return
+
+    if job.status == "failed":
+        st.error(f"Error generating report: {job.error}")
+        return
+
+    with st.expander("Company Summary", expanded=False):
+        st.write(job.result['company_summary'])
+    with st.expander("Comprehensive Analysis and Advisory Recommendations", expanded=True):
+        st.markdown("### Complete Business Analysis")
+        st.write(analysis_markdown(job.result['comprehensive_summary']))
+
+    # The PDF is read from its sink only when the user clicks download
+    st.download_button(
+        label="Download Complete Analysis as PDF",
+        data=job.result['pdf'].read,
+        file_name=f"business_analysis_{datetime.datetime.now().strftime('%Y%m%d')}.pdf",
+        mime="application/pdf"
+    )
+
+@st.fragment(run_every=REPORT_JOB_POLL_INTERVAL)
+def render_report_job_progress(job_id):
+    """Poll a running report job, showing its progress and the text generated so far"""
+    job = get_report_job_queue().get(job_id)
+    if job is None or job.finished:
+        st.rerun()
+
+    st.progress(job.progress, text=job.stage)
+    if job.partial.get('company_summary'):
+        with st.expander("Company Summary", expanded='comprehensive_summary' not in job.partial):
+            st.write(job.partial['company_summary'])
+    # Partial structured output is incomplete JSON, so it is only shown once the job finishes
+    if job.partial.get('comprehensive_summary') and STRUCTURED_ANALYSIS == "off":
+        with st.expander("Comprehensive Analysis and Advisory Recommendations", expanded=True):
+            st.markdown("### Complete Business Analysis")
+            st.write(job.partial['comprehensive_summary'])
+
+def render_stored_report(input_key, openai_api_key):
+    """Render a report from the report store, without any LLM calls or PDF rendering"""
+    report = find_stored_report_by_key(input_key, openai_api_key)
+    if report is None:
+        st.warning("This report is no longer stored. Please submit your business profile again.")
+        del st.session_state.stored_report_key
+        return
+
+    st.info("These inputs were analysed before, so the stored report is shown.")
+    with st.expander("Company Summary", expanded=False):
+        st.write(report.texts.get('company_summary'))
+    with st.expander("Comprehensive Analysis and Advisory Recommendations", expanded=True):
+        st.markdown("### Complete Business Analysis")
+        st.write(analysis_markdown(report.texts.get('comprehensive_summary')))
+    st.download_button(
+        label="Download Complete Analysis as PDF",
+        data=report.pdf.read,
+        file_name=f"business_analysis_{datetime.datetime.fromtimestamp(report.created).strftime('%Y%m%d')}.pdf",
+        mime="application/pdf"
+    )
+
+def render_report_history(openai_api_key):
+    """List the user's stored reports in the sidebar, each downloadable straight from the store"""
+    store = get_report_store()
+    if store is None:
+        return
+    reports = store.history(report_owner(openai_api_key))
+    if not reports:
+        return
+    with st.sidebar.expander("Past reports", expanded=False):
+        for report in reports:
+            created = datetime.datetime.fromtimestamp(report.created)
+            st.download_button(
+                label=f"{created.strftime('%Y-%m-%d %H:%M')} · {report.title}",
+                data=report.pdf.read,
+                file_name=f"business_analysis_{created.strftime('%Y%m%d_%H%M')}.pdf",
+                mime="application/pdf",
+                key=f"report_history_{report.input_key}"
+            )
+
+@functools.lru_cache(maxsize=None)
+def get_sample_stylesheet():
+    """Return reportlab's sample stylesheet, built once per process"""
+    return getSampleStyleSheet()
+
+def copy_styles(styles):
+    """Return a dict of shallow copies of the styles; a ParagraphStyle copies its parent's attributes when created,
+    so the copies do not depend on the originals"""
+    return {name: copy.copy(style) for name, style in styles.items()}
+
 def create_custom_styles():
-    """Create enhanced custom styles for the PDF document"""
-    styles = getSampleStyleSheet()
+    """Return the custom PDF styles for one report build.
+
+    The styles are built once per process; each call gets its own copies, so a build that changes a style cannot
+    change it for the others.
+    """
+    return copy_styles(build_custom_styles())
+
+@functools.lru_cache(maxsize=None)
+def build_custom_styles():
+    """Create enhanced custom styles for the PDF document, once per process. Use create_custom_styles for copies"""
+    styles = get_sample_stylesheet()
     
     # Define modern color scheme
     custom_colors = {
@@ -463,269 +2407,889 @@ def create_custom_styles():
             textColor=custom_colors['subtle'],
             alignment=TA_LEFT,
             spaceBefore=10
+        ),
+        'error': ParagraphStyle(
+            'Error',
+            parent=styles['Normal'],
+            fontName='Helvetica-Oblique',
+            fontSize=11,
+            textColor=custom_colors['warning'],
+            spaceBefore=6,
+            spaceAfter=6
         )
     }
+    custom_styles['indented_content'] = ParagraphStyle(
+        'IndentedContent',
+        parent=custom_styles['content'],
+        firstLineIndent=36
+    )
     
     return custom_styles
 
 
-def process_section_content(content, styles, elements):
-    """Process section content and add appropriate styling"""
-    main_sections = {
-        "Company Overview": ["company overview", "business overview"],
-        "Market Analysis": ["market analysis", "industry analysis"],
-        "Strategic Recommendations": ["strategic recommendations", "recommendations"],
-        "Financial Implications": ["financial implications", "financial impact"],
-        "Implementation Timeline": ["implementation timeline", "timeline"],
-        "Risk Assessment": ["risk assessment", "risks"],
-        "Next Steps": ["next steps", "action items"]
-    }
+# Completion document tree built by parse_completion. A completion is a tuple of CompletionParagraphs, the blank line
+# separated chunks of its text, each holding a Block per non-empty line
+CompletionParagraph = namedtuple("CompletionParagraph", ["text", "blocks"])
+# kind is "heading" (#), "bullet" (• or -), "starred" (*, including **bold** lines), "numbered" (a digit in its first
+# two characters) or "paragraph". text is the line without its heading marks or bullet; item is the line without its
+# leading number whenever it opens with a digit; marker is the comprehensive analysis section the line introduces:
+# "summary", "reasons", "solutions" or a KPI period from KPI_PERIODS
+Block = namedtuple("Block", ["kind", "line", "text", "item", "marker"])
+
+KPI_PERIODS = ("short", "medium", "long")
+NUMBER_PREFIX_RE = re.compile(r'\d+\.?\s*')
+
+def section_marker(lower_line):
+    """Return the comprehensive analysis section a lowercased line introduces, or None"""
+    if "synthesized company summary" in lower_line or "company summary and priorities" in lower_line:
+        return "summary"
+    if "reasons for needing" in lower_line or "5 reasons" in lower_line:
+        return "reasons"
+    if "coach solutions" in lower_line:
+        return "solutions"
+    if "month" in lower_line:
+        for period in KPI_PERIODS:
+            if f"{period} term" in lower_line:
+                return period
+    return None
+
+def tokenize_line(line):
+    """Classify one stripped, non-empty line of LLM output as a Block"""
+    first = line[0]
+    item = None
+    if first.isdigit() or line[1:2].isdigit():
+        number = NUMBER_PREFIX_RE.match(line)
+        item = line[number.end():] if number else line
+    if first == '#':
+        kind, text = "heading", line.lstrip('#').strip()
+    elif first in '•-':
+        kind, text = "bullet", line.lstrip('•- ')
+    elif first == '*':
+        kind, text = "starred", line
+    else:
+        kind, text = ("numbered" if item is not None else "paragraph"), line
+    return Block(kind, line, text, item, section_marker(line.lower()))
+
+@functools.lru_cache(maxsize=128)
+def parse_completion(content):
+    """Tokenize LLM output into its document tree in one pass, shared by every section builder and PDF rebuild"""
+    return tuple(
+        CompletionParagraph(text, tuple(tokenize_line(line) for line in map(str.strip, text.split('\n')) if line))
+        for text in content.split('\n\n')
+    )
+
+def completion_blocks(content):
+    """Every Block of a completion in document order"""
+    return (block for paragraph in parse_completion(content) for block in paragraph.blocks)
+
+# Headings process_section_content starts for lines naming one of these topics
+MAIN_SECTIONS = {
+    "Company Overview": ("company overview", "business overview"),
+    "Market Analysis": ("market analysis", "industry analysis"),
+    "Strategic Recommendations": ("strategic recommendations", "recommendations"),
+    "Financial Implications": ("financial implications", "financial impact"),
+    "Implementation Timeline": ("implementation timeline", "timeline"),
+    "Risk Assessment": ("risk assessment", "risks"),
+    "Next Steps": ("next steps", "action items")
+}
+
+def process_section_content(content, styles, elements):
+    """Process section content and add appropriate styling"""
+    for block in completion_blocks(content):
+        # Markdown emphasis and heading marks are dropped before the line is classified
+        clean_paragraph = block.line.replace('#', '').replace('*', '').strip()
+        if not clean_paragraph:
+            continue
+        lower_paragraph = clean_paragraph.lower()
+
+        # Check if this is a main section
+        section = next(
+            (section for section, variations in MAIN_SECTIONS.items() if any(var in lower_paragraph for var in variations)), None
+        )
+        if section:
+            elements.append(Spacer(1, 20))
+            elements.append(Paragraph(section, styles['subheading']))
+            elements.append(Spacer(1, 10))
+        # Handle bullet points
+        elif '•' in clean_paragraph or clean_paragraph.startswith('-'):
+            for point in clean_paragraph.replace('-', '•').split('•'):
+                if point.strip():
+                    elements.append(Paragraph(f"• {clean_text(point)}", styles['bullet']))
+        # Regular paragraphs
+        else:
+            elements.append(Paragraph(clean_text(clean_paragraph), styles['content']))
+            elements.append(Spacer(1, 12))
+
+# Table styles are built once at import and shared read-only by every report build
+INPUT_OVERVIEW_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (0, -1), colors.HexColor('#f8fafc')),
+    ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#e2e8f0')),
+    ('PADDING', (0, 0), (-1, -1), 12)
+])
+INPUT_AREAS_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, -1), colors.HexColor('#f8fafc')),
+    ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#e2e8f0')),
+    ('PADDING', (0, 0), (-1, -1), 12)
+])
+
+def create_input_summary_section(profile_info, business_priorities, selected_areas, styles):
+    """Create a section summarizing all user inputs"""
+    elements = []
+    
+    elements.append(Paragraph("Business Input Summary", styles['title']))
+    elements.append(Spacer(1, 12))
+    
+    # Business Model & Products/Services
+    elements.extend([
+        Paragraph("Business Overview", styles['subheading']),
+        Table(
+            [[Paragraph("Business Model", styles['table_header']),
+              Paragraph(clean_text(profile_info['business_model']), styles['content'])],
+             [Paragraph("Products/Services", styles['table_header']),
+              Paragraph(clean_text(profile_info['products_services']), styles['content'])],
+             [Paragraph("Competitive Advantage", styles['table_header']),
+              Paragraph(clean_text(profile_info['differentiation']), styles['content'])]],
+            colWidths=[2*inch, 5*inch],
+            style=INPUT_OVERVIEW_TABLE_STYLE
+        )
+    ])
+    
+    elements.append(Spacer(1, 20))
+    
+    # Business Priorities
+    elements.extend([
+        Paragraph("Stated Business Priorities", styles['subheading']),
+        Paragraph(clean_text(business_priorities), styles['content'])
+    ])
+    
+    elements.append(Spacer(1, 20))
+    
+    # Selected Areas for Analysis
+    elements.extend([
+        Paragraph("Selected Focus Areas", styles['subheading']),
+        Table(
+            [[Paragraph("• " + area, styles['content'])] for area in selected_areas],
+            colWidths=[7*inch],
+            style=INPUT_AREAS_TABLE_STYLE
+        )
+    ])
+    
+    elements.append(PageBreak())
+    return elements
+# Where rendered reports are kept until downloaded: "spool" holds a report in memory up to PDF_SPOOL_MAX_SIZE
+# bytes and rolls over to a temp file, "directory" stores one object per report under PDF_OUTPUT_DIR
+PDF_OUTPUT_SINK = os.environ.get("SMEBOOST_PDF_OUTPUT_SINK", "spool")
+PDF_SPOOL_MAX_SIZE = int(os.environ.get("SMEBOOST_PDF_SPOOL_MAX_SIZE", str(512 * 1024)))
+PDF_OUTPUT_DIR = os.environ.get("SMEBOOST_PDF_OUTPUT_DIR", ".smeboost_reports")
+# Objects under PDF_OUTPUT_DIR older than PDF_OUTPUT_RETENTION_HOURS are removed, checked at most once per PDF_OUTPUT_GC_INTERVAL
+PDF_OUTPUT_RETENTION_HOURS = float(os.environ.get("SMEBOOST_PDF_OUTPUT_RETENTION_HOURS", "24"))
+PDF_OUTPUT_GC_INTERVAL = float(os.environ.get("SMEBOOST_PDF_OUTPUT_GC_INTERVAL", str(60 * 60)))
+
+class PdfSink(abc.ABC):
+    """Destination a report PDF is written into and later read back for download.
+
+    path is set when the PDF lives in a file that another process can write directly,
+    error when an error PDF was written in place of the report.
+    """
+
+    path = None
+    error = None
+
+    @abc.abstractmethod
+    def writer(self):
+        """Context manager yielding a binary file to write the PDF into, replacing any previous content"""
+
+    @abc.abstractmethod
+    def read(self):
+        """Return the PDF bytes"""
+
+class SpooledPdfSink(PdfSink):
+    """PDF held in memory up to max_size bytes, rolling over to an anonymous temp file past that"""
+
+    def __init__(self, max_size=PDF_SPOOL_MAX_SIZE):
+        self._file = tempfile.SpooledTemporaryFile(max_size=max_size)
+        self._lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def writer(self):
+        with self._lock:
+            self._file.seek(0)
+            self._file.truncate()
+            yield self._file
+            self._file.flush()
+
+    def read(self):
+        with self._lock:
+            self._file.seek(0)
+            return self._file.read()
+
+class FilePdfSink(PdfSink):
+    """PDF written to a file path, replaced atomically so readers never see a partial report"""
+
+    def __init__(self, path):
+        self.path = path
+
+    @contextlib.contextmanager
+    def writer(self):
+        tmp_path = f"{self.path}.{uuid.uuid4().hex}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                yield f
+            os.replace(tmp_path, self.path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def read(self):
+        with open(self.path, "rb") as f:
+            return f.read()
+
+class ObjectStorePdfSink(FilePdfSink):
+    """PDF stored as an object named by key in a local directory laid out like an object store bucket"""
+
+    def __init__(self, directory, key):
+        prefix_dir = os.path.join(directory, key[:2])
+        os.makedirs(prefix_dir, exist_ok=True)
+        super().__init__(os.path.join(prefix_dir, f"{key}.pdf"))
+        self.key = key
+
+class PdfOutputDirectory:
+    """Directory of ObjectStorePdfSink objects, swept of objects older than the retention period"""
+
+    def __init__(self, directory=PDF_OUTPUT_DIR, retention_hours=PDF_OUTPUT_RETENTION_HOURS, gc_interval=PDF_OUTPUT_GC_INTERVAL):
+        self.directory = directory
+        self.retention = retention_hours * 60 * 60
+        self.gc_interval = gc_interval
+        self._last_gc = 0.0
+
+    def sink(self, key):
+        """Return a sink for the object named key, sweeping old objects first when one is due"""
+        self.maybe_gc()
+        return ObjectStorePdfSink(self.directory, key)
+
+    def maybe_gc(self):
+        """Run gc at most once per gc_interval"""
+        if time.time() - self._last_gc >= self.gc_interval:
+            self.gc()
+
+    def gc(self):
+        """Remove objects and leftover temp files last written before the retention period; returns files removed"""
+        now = time.time()
+        self._last_gc = now
+        removed = 0
+        if not os.path.isdir(self.directory):
+            return removed
+        for prefix in os.listdir(self.directory):
+            prefix_dir = os.path.join(self.directory, prefix)
+            if not os.path.isdir(prefix_dir):
+                continue
+            for name in os.listdir(prefix_dir):
+                path = os.path.join(prefix_dir, name)
+                try:
+                    if now - os.path.getmtime(path) > self.retention:
+                        os.remove(path)
+                        removed += 1
+                except FileNotFoundError:
+                    pass
+        if removed:
+            logger.info("Removed %d expired PDFs from %s", removed, self.directory)
+        return removed
+
+@st.cache_resource(show_spinner=False)
+def get_pdf_output_directory():
+    """Return the process-wide PDF output directory"""
+    return PdfOutputDirectory()
+
+def create_pdf_sink(key=None):
+    """Return a new sink for one report according to PDF_OUTPUT_SINK"""
+    if PDF_OUTPUT_SINK == "directory":
+        return get_pdf_output_directory().sink(key or uuid.uuid4().hex)
+    return SpooledPdfSink()
+
+# Persistent report store: SQLite metadata plus content-addressed PDF and text blobs under REPORT_STORE_DIR, so
+# finished reports survive refreshes and session timeouts. Reports not opened for REPORT_RETENTION_DAYS are removed
+REPORT_STORE = os.environ.get("SMEBOOST_REPORT_STORE", "on")
+REPORT_STORE_DIR = os.environ.get("SMEBOOST_REPORT_STORE_DIR", ".smeboost_store")
+REPORT_RETENTION_DAYS = float(os.environ.get("SMEBOOST_REPORT_RETENTION_DAYS", "30"))
+REPORT_GC_INTERVAL = float(os.environ.get("SMEBOOST_REPORT_GC_INTERVAL", str(60 * 60)))
+REPORT_HISTORY_SIZE = int(os.environ.get("SMEBOOST_REPORT_HISTORY_SIZE", "10"))
+
+StoredReport = namedtuple("StoredReport", ["input_key", "title", "created", "texts", "pdf"])
+
+def report_input_key(profile_info, business_priorities, selected_areas):
+    """Content hash of everything a report is generated from, so identical inputs resolve to one stored report"""
+    profile = {field: profile_info.get(field, "") for field in PROFILE_FIELDS}
+    payload = json.dumps([profile, business_priorities, sorted(selected_areas)], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def report_owner(openai_api_key):
+    """Id a user's reports are listed under, derived from their API key without storing the key"""
+    return hashlib.sha256(f"smeboost-report-owner:{openai_api_key}".encode("utf-8")).hexdigest()[:32]
+
+class ReportStore:
+    """Generated reports with their source texts, deduplicated by input key and by blob content"""
+
+    # Unreferenced blobs younger than this may belong to a report that is still being stored
+    BLOB_GRACE_PERIOD = 60 * 60
+
+    def __init__(self, directory=REPORT_STORE_DIR, retention_days=REPORT_RETENTION_DAYS, gc_interval=REPORT_GC_INTERVAL):
+        self.directory = directory
+        self.retention = retention_days * 24 * 60 * 60
+        self.gc_interval = gc_interval
+        os.makedirs(os.path.join(directory, "blobs"), exist_ok=True)
+        self._conn = sqlite3.connect(os.path.join(directory, "reports.sqlite3"), check_same_thread=False)
+        self._conn.executescript(
+            "CREATE TABLE IF NOT EXISTS reports (input_key TEXT PRIMARY KEY, title TEXT NOT NULL, pdf_blob TEXT NOT NULL, "
+            "texts_blob TEXT NOT NULL, created REAL NOT NULL, accessed REAL NOT NULL);"
+            "CREATE TABLE IF NOT EXISTS report_owners (owner TEXT NOT NULL, input_key TEXT NOT NULL, created REAL NOT NULL, "
+            "PRIMARY KEY (owner, input_key));"
+            "CREATE INDEX IF NOT EXISTS report_owners_by_created ON report_owners (owner, created);"
+        )
+        self._conn.commit()
+        self._lock = threading.Lock()
+        self._last_gc = 0.0
+
+    def _blob_path(self, digest):
+        return os.path.join(self.directory, "blobs", digest[:2], digest)
+
+    def _write_blob(self, data):
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._blob_path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with FilePdfSink(path).writer() as f:
+                f.write(data)
+        return digest
+
+    def put(self, input_key, owner, title, texts, pdf):
+        """Store a report's PDF bytes and source texts, returning it as a StoredReport"""
+        pdf_blob = self._write_blob(pdf)
+        texts_blob = self._write_blob(json.dumps(texts, ensure_ascii=False, sort_keys=True).encode("utf-8"))
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO reports (input_key, title, pdf_blob, texts_blob, created, accessed) VALUES (?, ?, ?, ?, ?, ?)",
+                (input_key, title, pdf_blob, texts_blob, now, now)
+            )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO report_owners (owner, input_key, created) VALUES (?, ?, ?)", (owner, input_key, now)
+            )
+            self._conn.commit()
+        self.maybe_gc()
+        return StoredReport(input_key, title, now, texts, FilePdfSink(self._blob_path(pdf_blob)))
+
+    def get(self, input_key, owner=None):
+        """Return the stored report for an input key, or None; an owner also gets it added to their history"""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT title, pdf_blob, texts_blob, created FROM reports WHERE input_key = ?", (input_key,)
+            ).fetchone()
+            if row is None:
+                return None
+            title, pdf_blob, texts_blob, created = row
+            try:
+                with open(self._blob_path(texts_blob), encoding="utf-8") as f:
+                    texts = json.load(f)
+            except (OSError, ValueError):
+                texts = None
+            if texts is None or not os.path.exists(self._blob_path(pdf_blob)):
+                self._conn.execute("DELETE FROM reports WHERE input_key = ?", (input_key,))
+                self._conn.commit()
+                return None
+            self._conn.execute("UPDATE reports SET accessed = ? WHERE input_key = ?", (now, input_key))
+            if owner is not None:
+                self._conn.execute(
+                    "INSERT OR IGNORE INTO report_owners (owner, input_key, created) VALUES (?, ?, ?)", (owner, input_key, now)
+                )
+            self._conn.commit()
+        return StoredReport(input_key, title, created, texts, FilePdfSink(self._blob_path(pdf_blob)))
+
+    def history(self, owner, limit=REPORT_HISTORY_SIZE):
+        """Return an owner's most recent reports, newest first, without loading their texts"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT r.input_key, r.title, o.created, r.pdf_blob FROM report_owners o JOIN reports r USING (input_key) "
+                "WHERE o.owner = ? ORDER BY o.created DESC LIMIT ?",
+                (owner, limit)
+            ).fetchall()
+        return [StoredReport(key, title, created, None, FilePdfSink(self._blob_path(blob))) for key, title, created, blob in rows]
+
+    def maybe_gc(self):
+        """Run gc at most once per gc_interval"""
+        if time.time() - self._last_gc >= self.gc_interval:
+            self.gc()
+
+    def gc(self):
+        """Remove reports not opened within the retention period and blobs no report refers to; returns reports removed"""
+        now = time.time()
+        self._last_gc = now
+        with self._lock:
+            removed = self._conn.execute("DELETE FROM reports WHERE accessed < ?", (now - self.retention,)).rowcount
+            self._conn.execute("DELETE FROM report_owners WHERE input_key NOT IN (SELECT input_key FROM reports)")
+            self._conn.commit()
+            referenced = set()
+            for pdf_blob, texts_blob in self._conn.execute("SELECT pdf_blob, texts_blob FROM reports"):
+                referenced.update((pdf_blob, texts_blob))
+        blobs_dir = os.path.join(self.directory, "blobs")
+        for prefix in os.listdir(blobs_dir):
+            for name in os.listdir(os.path.join(blobs_dir, prefix)):
+                path = os.path.join(blobs_dir, prefix, name)
+                if name not in referenced and now - os.path.getmtime(path) > self.BLOB_GRACE_PERIOD:
+                    os.remove(path)
+        if removed:
+            logger.info("Removed %d expired reports from %s", removed, self.directory)
+        return removed
+
+@st.cache_resource(show_spinner=False)
+def get_report_store():
+    """Return the process-wide report store, or None when REPORT_STORE is off"""
+    if REPORT_STORE == "off":
+        return None
+    return ReportStore()
+
+def store_report(profile_info, business_priorities, selected_areas, openai_api_key, texts, pdf_sink):
+    """Keep a finished report in the report store, returning the sink to serve its PDF from"""
+    store = get_report_store()
+    if store is None or pdf_sink.error or not texts.get('comprehensive_summary'):
+        return pdf_sink
+    stored = store.put(
+        report_input_key(profile_info, business_priorities, selected_areas),
+        report_owner(openai_api_key),
+        ", ".join(selected_areas),
+        texts,
+        pdf_sink.read()
+    )
+    return stored.pdf
+
+def find_stored_report(profile_info, business_priorities, selected_areas, openai_api_key):
+    """Return the stored report generated from identical inputs, or None"""
+    return find_stored_report_by_key(report_input_key(profile_info, business_priorities, selected_areas), openai_api_key)
+
+def find_stored_report_by_key(input_key, openai_api_key):
+    """Return the stored report for an input key, adding it to the user's history, or None"""
+    store = get_report_store()
+    if store is None:
+        return None
+    return store.get(input_key, report_owner(openai_api_key))
+
+# Page setup shared by the report and every separately rendered section
+PDF_DOCUMENT_OPTIONS = {
+    "pagesize": letter,
+    "rightMargin": 1.25 * inch,
+    "leftMargin": 1.25 * inch,
+    "topMargin": 1.5 * inch,
+    "bottomMargin": 1 * inch
+}
+
+# Number of rendered report sections kept for reuse across PDF builds
+PDF_SECTION_CACHE_SIZE = int(os.environ.get("SMEBOOST_PDF_SECTION_CACHE_SIZE", "256"))
+
+@st.cache_resource(show_spinner=False)
+def get_pdf_section_cache():
+    """Return the process-wide cache of rendered report sections, keyed by a hash of their inputs"""
+    return MemoryResponseCache(max_entries=PDF_SECTION_CACHE_SIZE)
 
-    # Clean up the text
-    clean_text_content = content.replace('#', '').replace('*', '')
-    paragraphs = [p.strip() for p in clean_text_content.split('\n') if p.strip()]
+# A report section rendered on its own: the PDF bytes and the number of pages they hold
+RenderedSection = namedtuple("RenderedSection", ["pdf", "pages"])
 
-    for paragraph in paragraphs:
-        clean_paragraph = paragraph.strip()
-        lower_paragraph = clean_paragraph.lower()
+def render_pdf_section(name, inputs, build_elements):
+    """Render one report section to a RenderedSection, reusing the cached pages while its inputs are unchanged"""
+    cache = get_pdf_section_cache()
+    payload = json.dumps([name, inputs], ensure_ascii=False, sort_keys=True, default=str)
+    key = hashlib.sha256(payload.encode("utf-8")).hexdigest()
+    section = cache.get(key)
+    if section is None:
+        elements = list(build_elements())
+        # Every section starts on a new page of the merged report, so its closing page break is implied
+        while elements and isinstance(elements[-1], PageBreak):
+            elements.pop()
+        buffer = io.BytesIO()
+        doc = SimpleDocTemplate(buffer, **PDF_DOCUMENT_OPTIONS)
+        doc.build(elements)
+        section = RenderedSection(buffer.getvalue(), doc.page)
+        cache.set(key, section)
+    return section
 
-        # Check if this is a main section
-        is_main_section = False
-        for section, variations in main_sections.items():
-            if any(var in lower_paragraph for var in variations):
-                elements.append(Spacer(1, 20))
-                elements.append(Paragraph(section, styles['subheading']))
-                elements.append(Spacer(1, 10))
-                is_main_section = True
-                break
+def render_front_page_section(profile_info, business_priorities):
+    """Render the front page, which carries today's date"""
+    return render_pdf_section(
+        "front_page",
+        [profile_info, business_priorities, datetime.date.today().isoformat()],
+        lambda: create_front_page(create_custom_styles(), profile_info, business_priorities)
+    )
 
-        if not is_main_section:
-            # Handle bullet points
-            if '•' in clean_paragraph or clean_paragraph.startswith('-'):
-                points = clean_paragraph.replace('-', '•').split('•')
-                for point in points:
-                    if point.strip():
-                        elements.append(Paragraph(f"• {clean_text(point)}", styles['bullet']))
-            # Regular paragraphs
-            else:
-                if clean_paragraph:
-                    elements.append(Paragraph(clean_text(clean_paragraph), styles['content']))
-                    elements.append(Spacer(1, 12))
-def create_input_summary_section(profile_info, business_priorities, selected_areas, styles):
-    """Create a section summarizing all user inputs"""
-    elements = []
-    
-    elements.append(Paragraph("Business Input Summary", styles['title']))
-    elements.append(Spacer(1, 12))
-    
-    # Business Model & Products/Services
-    elements.extend([
-        Paragraph("Business Overview", styles['subheading']),
-        Table(
-            [[Paragraph("Business Model", styles['table_header']),
-              Paragraph(clean_text(profile_info['business_model']), styles['content'])],
-             [Paragraph("Products/Services", styles['table_header']),
-              Paragraph(clean_text(profile_info['products_services']), styles['content'])],
-             [Paragraph("Competitive Advantage", styles['table_header']),
-              Paragraph(clean_text(profile_info['differentiation']), styles['content'])]],
-            colWidths=[2*inch, 5*inch],
-            style=TableStyle([
-                ('BACKGROUND', (0, 0), (0, -1), colors.HexColor('#f8fafc')),
-                ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#e2e8f0')),
-                ('PADDING', (0, 0), (-1, -1), 12)
-            ])
-        )
-    ])
-    
-    elements.append(Spacer(1, 20))
-    
-    # Business Priorities
-    elements.extend([
-        Paragraph("Stated Business Priorities", styles['subheading']),
-        Paragraph(clean_text(business_priorities), styles['content'])
-    ])
-    
-    elements.append(Spacer(1, 20))
-    
-    # Selected Areas for Analysis
-    elements.extend([
-        Paragraph("Selected Focus Areas", styles['subheading']),
-        Table(
-            [[Paragraph("• " + area, styles['content'])] for area in selected_areas],
-            colWidths=[7*inch],
-            style=TableStyle([
-                ('BACKGROUND', (0, 0), (-1, -1), colors.HexColor('#f8fafc')),
-                ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#e2e8f0')),
-                ('PADDING', (0, 0), (-1, -1), 12)
-            ])
-        )
-    ])
-    
-    elements.append(PageBreak())
-    return elements
-def generate_pdf(comprehensive_summary, profile_info, selected_areas, company_summary, business_priorities):
-    """Generate the complete PDF report with enhanced styling and layout"""
-    buffer = io.BytesIO()
+def render_input_summary_section(profile_info, business_priorities, selected_areas):
+    """Render the summary of the user's inputs"""
+    return render_pdf_section(
+        "input_summary",
+        [profile_info, business_priorities, selected_areas],
+        lambda: create_input_summary_section(profile_info, business_priorities, selected_areas, create_custom_styles())
+    )
 
-    # Validate inputs before proceeding
-    if not comprehensive_summary or not profile_info or not selected_areas or not company_summary:
-        st.error("Missing required content for PDF generation")
-        return create_error_pdf()
+def prerender_static_sections(profile_info, business_priorities, selected_areas):
+    """Render the sections that do not depend on LLM output into the section cache ahead of generate_pdf"""
+    render_front_page_section(profile_info, business_priorities)
+    render_input_summary_section(profile_info, business_priorities, selected_areas)
 
-    try:
-        # Create document with adjusted margins
-        doc = SimpleDocTemplate(
-            buffer,
-            pagesize=letter,
-            rightMargin=1.25 * inch,
-            leftMargin=1.25 * inch,
-            topMargin=1.5 * inch,
-            bottomMargin=1 * inch
-        )
+def merge_pdf_sections(sections, output=None, outline=()):
+    """Concatenate rendered sections into one PDF, written to output or a new buffer.
 
-        # Create styles
-        styles = create_custom_styles()
+    outline lists (title, page index, parent title or None) bookmarks, parents before their children.
+    """
+    writer = PdfWriter()
+    for section in sections:
+        writer.append(PdfReader(io.BytesIO(section.pdf)))
+    bookmarks = {}
+    for title, page_index, parent in outline:
+        bookmarks[title] = writer.add_outline_item(title, page_index, parent=bookmarks.get(parent))
+    buffer = output if output is not None else io.BytesIO()
+    writer.write(buffer)
+    if output is None:
+        buffer.seek(0)
+    return buffer
 
-        # Build elements list
-        elements = []
+class PdfGenerationError(Exception):
+    """The report PDF could not be built"""
 
-        # Front page with business priorities
-        elements.extend(create_front_page(styles, profile_info, business_priorities))
+def generate_pdf(comprehensive_summary, profile_info, selected_areas, company_summary, business_priorities, area_analyses, output=None):
+    """Generate the complete PDF report with enhanced styling and layout.
 
-        # Table of Contents
-        content_sections = {
-            'business_areas': selected_areas
-        }
-        create_dynamic_toc(elements, styles, content_sections)
+    Each section is rendered separately and cached by its inputs, so regenerating a report after one
+    input changed only re-renders that section. The table of contents is rendered last, from the page
+    counts of the other sections. area_analyses maps analysis keys to text.
+    The PDF is written to the binary file output, or to a new buffer when not given; either is returned.
+    Raises PdfGenerationError when the report cannot be built.
+    """
+    # Validate inputs before proceeding
+    if not comprehensive_summary or not profile_info or not selected_areas or not company_summary:
+        raise PdfGenerationError("Missing required content for PDF generation")
 
-        # Input Summary Section
-        elements.extend(create_input_summary_section(profile_info, business_priorities, selected_areas, styles))
+    # Create styles
+    styles = create_custom_styles()
 
-        # Executive Summary
-        elements.append(Paragraph("Executive Summary", styles['title']))
+    def executive_summary_elements():
+        elements = [Paragraph("Executive Summary", styles['title'])]
         if company_summary:
             elements.extend(create_executive_summary_section(company_summary, styles))
         else:
             elements.append(Paragraph("Company Summary Missing", styles['error']))
-        elements.append(PageBreak())
-
-        # Selected Business Areas
-        if selected_areas:
-            elements.append(Paragraph("Selected Business Areas", styles['title']))
-            for area in selected_areas:
-                elements.append(Paragraph(area, styles['heading']))
-                area_key = f"{area.lower().replace(' ', '_')}_analysis"
-
-                # Add area analysis if available
-                if area_key in st.session_state.user_data:
-                    elements.extend(create_business_area_section(st.session_state.user_data[area_key], styles))
-                else:
-                    elements.append(Paragraph(f"Analysis for {area} is missing.", styles['error']))
-                elements.append(PageBreak())
+        return elements
+
+    def business_area_elements(area, analysis, first):
+        elements = [Paragraph("Selected Business Areas", styles['title'])] if first else []
+        elements.append(Paragraph(area, styles['heading']))
+        # Add area analysis if available
+        if analysis is not None:
+            elements.extend(create_business_area_section(analysis, styles))
         else:
-            elements.append(Paragraph("No business areas selected.", styles['error']))
+            elements.append(Paragraph(f"Analysis for {area} is missing.", styles['error']))
+        return elements
 
-        # Comprehensive Analysis
-        if comprehensive_summary:
-            elements.append(Paragraph("Comprehensive Analysis", styles['title']))
-            content_elements = create_comprehensive_analysis_section(comprehensive_summary, styles)
-            if content_elements:
-                elements.extend(content_elements)
-            else:
-                elements.append(Paragraph("Comprehensive Analysis content is incomplete.", styles['error']))
+    def comprehensive_analysis_elements():
+        elements = [Paragraph("Comprehensive Analysis", styles['title'])]
+        content_elements = create_comprehensive_analysis_section(comprehensive_summary, get_section_styles())
+        if content_elements:
+            elements.extend(content_elements)
         else:
-            elements.append(Paragraph("Comprehensive Analysis Missing.", styles['error']))
+            elements.append(Paragraph("Comprehensive Analysis content is incomplete.", styles['error']))
+        return elements
 
-        # Build the PDF
-        doc.build(elements)
-        buffer.seek(0)
-        return buffer
+    try:
+        front_page = render_front_page_section(profile_info, business_priorities)
+        input_summary = render_input_summary_section(profile_info, business_priorities, selected_areas)
+
+        # Executive Summary
+        executive_summary = render_pdf_section("executive_summary", [company_summary], executive_summary_elements)
+
+        # Selected Business Areas, one section per area
+        area_sections = []
+        for i, area in enumerate(selected_areas):
+            analysis = area_analyses.get(area_analysis_key(area))
+            area_sections.append(render_pdf_section(
+                "business_area",
+                [area, analysis, i == 0],
+                functools.partial(business_area_elements, area, analysis, i == 0)
+            ))
+
+        # Comprehensive Analysis
+        comprehensive_analysis = render_pdf_section("comprehensive_analysis", [comprehensive_summary], comprehensive_analysis_elements)
+
+        # Table of Contents: entry pages depend on the TOC's own length, so assume one page and
+        # re-flow only the TOC if it turns out longer
+        toc_pages = 1
+        for _ in range(2):
+            page = 1 + front_page.pages + toc_pages + input_summary.pages
+            toc_entries = [("Executive Summary", page, 0)]
+            page += executive_summary.pages
+            toc_entries.append(("Selected Business Areas", page, 0))
+            for area, area_section in zip(selected_areas, area_sections):
+                toc_entries.append((area, page, 1))
+                page += area_section.pages
+            toc_entries.append(("Comprehensive Analysis", page, 0))
+            table_of_contents = render_pdf_section(
+                "table_of_contents", [toc_entries], functools.partial(create_dynamic_toc, styles, toc_entries)
+            )
+            if table_of_contents.pages == toc_pages:
+                break
+            toc_pages = table_of_contents.pages
+
+        # PDF bookmarks mirror the table of contents, with the business areas nested
+        outline = [
+            (title, page - 1, "Selected Business Areas" if level else None)
+            for title, page, level in toc_entries
+        ]
+        sections = [front_page, table_of_contents, input_summary, executive_summary, *area_sections, comprehensive_analysis]
+        return merge_pdf_sections(sections, output, outline)
 
     except Exception as e:
-        st.error(f"Error generating PDF: {str(e)}")
-        return create_error_pdf()
+        raise PdfGenerationError(f"Error generating PDF: {str(e)}") from e
+
+# PDF rendering can run in worker processes so reportlab layout does not hold the GIL of the process serving every
+# session. 0 workers (the default) renders in the calling thread, which also reuses the static sections prerendered
+# into this process's section cache
+PDF_RENDER_WORKERS = int(os.environ.get("SMEBOOST_PDF_RENDER_WORKERS", "0"))
+PDF_RENDER_QUEUE_SIZE = int(os.environ.get("SMEBOOST_PDF_RENDER_QUEUE_SIZE", "16"))
+PDF_RENDER_TIMEOUT = float(os.environ.get("SMEBOOST_PDF_RENDER_TIMEOUT", "120"))
+PDF_RENDER_MAX_JOBS_PER_WORKER = int(os.environ.get("SMEBOOST_PDF_RENDER_MAX_JOBS_PER_WORKER", "50"))
+
+@contextlib.contextmanager
+def render_deadline(seconds):
+    """Raise TimeoutError in this process's main thread if the block runs longer than seconds, where SIGALRM exists"""
+    if not seconds or not hasattr(signal, "SIGALRM"):
+        yield
+        return
+
+    def expire(signum, frame):
+        raise TimeoutError(f"PDF rendering took longer than {seconds:g}s")
+
+    previous = signal.signal(signal.SIGALRM, expire)
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+def render_pdf_job(job, path=None, timeout=None):
+    """Worker process entry point: build the report PDF from its serialized inputs.
+
+    Writes the PDF to path when given, otherwise returns its bytes. The worker gives up after timeout seconds,
+    so a stuck render frees its process without the pool having to kill it.
+    """
+    with render_deadline(timeout):
+        if path is None:
+            return generate_pdf(**job).getvalue()
+        with FilePdfSink(path).writer() as f:
+            generate_pdf(**job, output=f)
+
+class PdfRenderService:
+    """Render report PDFs in a pool of worker processes with a bounded queue, per-job timeouts and worker recycling"""
+
+    def __init__(self, workers=PDF_RENDER_WORKERS, queue_size=PDF_RENDER_QUEUE_SIZE, timeout=PDF_RENDER_TIMEOUT,
+                 max_jobs_per_worker=PDF_RENDER_MAX_JOBS_PER_WORKER):
+        self.workers = workers
+        self.timeout = timeout
+        self.max_jobs_per_worker = max_jobs_per_worker
+        self._slots = threading.BoundedSemaphore(queue_size)
+        self._lock = threading.Lock()
+        # Streamlit runs this script as __main__, so workers import it by module name to find render_pdf_job
+        module_dir = os.path.dirname(os.path.abspath(__file__))
+        if module_dir not in sys.path:
+            sys.path.insert(0, module_dir)
+        module_name = os.path.splitext(os.path.basename(__file__))[0]
+        self._render = importlib.import_module(module_name).render_pdf_job
+        self._executor = self._new_executor()
+
+    def _new_executor(self):
+        # Spawned workers exit after max_jobs_per_worker jobs and are replaced, capping memory growth
+        return ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            max_tasks_per_child=self.max_jobs_per_worker
+        )
 
-def create_dynamic_toc(elements, styles, content_sections):
-    """Create dynamic table of contents with enhanced styling"""
+    def render(self, job, path=None):
+        """Render a report from generate_pdf keyword arguments, writing it to path or returning the PDF bytes.
+
+        Raises RuntimeError when the queue stays full for the timeout, TimeoutError when rendering
+        takes longer, and BrokenProcessPool when a worker dies.
+        """
+        if not self._slots.acquire(timeout=self.timeout):
+            raise RuntimeError("PDF rendering queue is full")
+        try:
+            with self._lock:
+                executor = self._executor
+            future = executor.submit(self._render, job, path, self.timeout)
+            try:
+                # Workers enforce the timeout themselves; waiting a little longer lets their TimeoutError arrive
+                return future.result(timeout=self.timeout + 5)
+            except FuturesTimeoutError:
+                if future.done():
+                    # The worker's own deadline expired and it is free again
+                    raise
+                self._recycle(executor)
+                raise TimeoutError(f"PDF rendering took longer than {self.timeout:g}s")
+            except BrokenProcessPool:
+                self._recycle(executor)
+                raise
+        finally:
+            self._slots.release()
+
+    def _recycle(self, executor):
+        """Replace the pool so new jobs do not queue behind a broken or unresponsive one"""
+        with self._lock:
+            if self._executor is not executor:
+                return
+            self._executor = self._new_executor()
+        # Queued jobs are cancelled; a worker still running exits once its render deadline passes
+        executor.shutdown(wait=False, cancel_futures=True)
+
+@st.cache_resource(show_spinner=False)
+def get_pdf_render_service():
+    """Return the process-wide PDF rendering service"""
+    return PdfRenderService()
+
+def render_report_pdf(comprehensive_summary, profile_info, selected_areas, company_summary, business_priorities, area_analyses, sink=None):
+    """Generate the report PDF through the rendering service, or with generate_pdf in this thread when it is disabled.
+
+    Takes the same arguments as generate_pdf, writes the PDF into sink (a new create_pdf_sink() by default)
+    and returns the sink. When the report cannot be built an error PDF is written instead and sink.error is set.
+    """
+    if sink is None:
+        sink = create_pdf_sink()
+    if PDF_RENDER_WORKERS <= 0:
+        try:
+            with sink.writer() as f:
+                generate_pdf(
+                    comprehensive_summary, profile_info, selected_areas, company_summary, business_priorities,
+                    area_analyses=area_analyses, output=f
+                )
+        except PdfGenerationError as e:
+            report_error(str(e))
+            sink.error = str(e)
+            with sink.writer() as f:
+                create_error_pdf(f)
+        return sink
+
+    job = {
+        'comprehensive_summary': comprehensive_summary,
+        'profile_info': profile_info,
+        'selected_areas': list(selected_areas or []),
+        'company_summary': company_summary,
+        'business_priorities': business_priorities,
+        'area_analyses': {
+            key: area_analyses[key] for key in map(area_analysis_key, selected_areas or []) if key in area_analyses
+        }
+    }
+    try:
+        # File-backed sinks are written by the worker directly instead of sending the PDF back
+        if sink.path is not None:
+            get_pdf_render_service().render(job, sink.path)
+        else:
+            pdf = get_pdf_render_service().render(job)
+            with sink.writer() as f:
+                f.write(pdf)
+    except PdfGenerationError as e:
+        report_error(str(e))
+        sink.error = str(e)
+        with sink.writer() as f:
+            create_error_pdf(f)
+    except Exception as e:
+        # Queue full, timeouts, dead workers and anything else raised in a worker
+        report_error(f"Error generating PDF: {str(e)}")
+        sink.error = str(e)
+        with sink.writer() as f:
+            create_error_pdf(f)
+    return sink
+
+TOC_TOP_RULE_STYLE = TableStyle([
+    ('LINEABOVE', (0, 0), (-1, 0), 1, colors.HexColor('#2B6CB0')),
+    ('TOPPADDING', (0, 0), (-1, -1), 20),
+])
+TOC_BOTTOM_RULE_STYLE = TableStyle([
+    ('LINEBELOW', (0, 0), (-1, 0), 1, colors.HexColor('#2B6CB0')),
+    ('TOPPADDING', (0, 0), (-1, -1), 20),
+])
+
+def create_dynamic_toc(styles, toc_entries):
+    """Create table of contents with enhanced styling from (title, page, level) entries"""
+    elements = []
     elements.append(Table([['']], colWidths=[7*inch], rowHeights=[2],
-        style=TableStyle([
-            ('LINEABOVE', (0, 0), (-1, 0), 1, colors.HexColor('#2B6CB0')),
-            ('TOPPADDING', (0, 0), (-1, -1), 20),
-        ])
+        style=TOC_TOP_RULE_STYLE
     ))
     
     elements.append(Paragraph("Table of Contents", styles['toc_title']))
     elements.append(Spacer(1, 30))
     
-    current_page = 2  # Start after front page
-    toc_entries = []
-    
-    # Executive Summary (always starts on page 3)
-    toc_entries.append(("Executive Summary", 3))
-    current_page = 4  # Next section starts after executive summary
-    
-    # Business Areas (each on new page)
-    if content_sections.get('business_areas'):
-        toc_entries.append(("Selected Business Areas", current_page))
-        current_page += 1
-        for area in content_sections['business_areas']:
-            toc_entries.append((f"    {area}", current_page))
-            current_page += 2  # Each area gets its own page + spacing
-    
-    # Comprehensive Analysis
-    toc_entries.append(("Comprehensive Analysis", current_page))
-    
-    # Generate TOC entries with dot leaders
-    for title, page in toc_entries:
-        if title.startswith("    "):
-            # Indent sub-entries
-            title = title.strip()
-            elements.append(
-                Paragraph(
-                    f"{title} {'.' * (60 - len(title))} {page}",
-                    styles['toc_entry_level2']
-                )
-            )
-        else:
-            elements.append(
-                Paragraph(
-                    f"{title} {'.' * (60 - len(title))} {page}",
-                    styles['toc_entry']
-                )
+    # Generate TOC entries with dot leaders, indenting sub-entries
+    for title, page, level in toc_entries:
+        elements.append(
+            Paragraph(
+                f"{title} {'.' * (60 - len(title))} {page}",
+                styles['toc_entry_level2'] if level else styles['toc_entry']
             )
+        )
         elements.append(Spacer(1, 12))
     
     elements.append(Table([['']], colWidths=[7*inch], rowHeights=[2],
-        style=TableStyle([
-            ('LINEBELOW', (0, 0), (-1, 0), 1, colors.HexColor('#2B6CB0')),
-            ('TOPPADDING', (0, 0), (-1, -1), 20),
-        ])
+        style=TOC_BOTTOM_RULE_STYLE
     ))
     
     elements.append(PageBreak())
-    return current_page
+    return elements
 
 def create_executive_summary_section(content, styles):
     """Create executive summary section with enhanced formatting"""
     elements = []
-    paragraphs = content.split('\n\n')
     
-    for i, paragraph in enumerate(paragraphs):
+    for i, paragraph in enumerate(parse_completion(content)):
         if i == 0:
             # First paragraph with indentation
-            para_style = ParagraphStyle(
-                'IndentedContent',
-                parent=styles['content'],
-                firstLineIndent=36
-            )
+            para_style = styles['indented_content']
         else:
             para_style = styles['content']
         
-        elements.append(Paragraph(clean_text(paragraph), para_style))
+        elements.append(Paragraph(clean_text(paragraph.text), para_style))
         elements.append(Spacer(1, 12))
     
     return elements
 
+# Logos shown in the app header and on the PDF reports
+SME_LOGO_PATH = "smeimge.jpg"
+FINB_LOGO_PATH = "finb.jpg"
+# Cached logos are shared by reports rendered on concurrent threads, and drawImage reads the JPEG data
+# through the reader's file position, so drawing is serialised
+logo_draw_lock = threading.Lock()
+
+@functools.lru_cache(maxsize=None)
+def load_logo(path):
+    """Read a logo once per process into an ImageReader, or None if the file is missing"""
+    if not os.path.exists(path):
+        return None
+    with open(path, "rb") as f:
+        return ImageReader(io.BytesIO(f.read()))
+
+def draw_logo(canvas, logo, x, y, width, height, preserveAspectRatio=False):
+    """Draw a cached logo; drawImage embeds the image only once per document however often it is drawn"""
+    with logo_draw_lock:
+        canvas.drawImage(logo, x, y, width, height, preserveAspectRatio=preserveAspectRatio)
+
+class LogoImage(Flowable):
+    """Fixed-size flowable drawing a cached logo"""
+
+    def __init__(self, logo, width, height):
+        super().__init__()
+        self.logo = logo
+        self.width = width
+        self.height = height
+
+    def wrap(self, availWidth, availHeight):
+        return self.width, self.height
+
+    def draw(self):
+        draw_logo(self.canv, self.logo, 0, 0, self.width, self.height)
+
 def create_page_background(canvas, doc):
     """Create background for each page"""
     canvas.saveState()
@@ -739,9 +3303,11 @@ def create_enhanced_header_footer(canvas, doc):
     
     if doc.page > 1:
         # Header
-        if os.path.exists("finb.jpg"):
-            canvas.drawImage(
-                "finb.jpg",
+        logo = load_logo(FINB_LOGO_PATH)
+        if logo:
+            draw_logo(
+                canvas,
+                logo,
                 doc.width + doc.rightMargin - 1.5*inch,
                 doc.height + doc.topMargin - 0.6*inch,
                 width=1.2*inch,
@@ -798,25 +3364,27 @@ def create_business_area_section(content, styles):
     """Create beautifully formatted business area section"""
     elements = []
     
-    lines = content.split('\n')
-    for line in lines:
-        line = line.strip()
-        if not line:
-            continue
-            
-        if line.startswith(('•', '-')):
-            text = line.lstrip('•- ')
-            elements.append(Paragraph(f"• {clean_text(text)}", styles['bullet']))
-        elif line.startswith(('#', '##')):
-            text = line.lstrip('#').strip()
-            elements.append(Paragraph(clean_text(text), styles['subheading']))
+    for block in completion_blocks(content):
+        if block.kind == "bullet":
+            elements.append(Paragraph(f"• {clean_text(block.text)}", styles['bullet']))
+        elif block.kind == "heading":
+            elements.append(Paragraph(clean_text(block.text), styles['subheading']))
             elements.append(Spacer(1, 6))
         else:
-            elements.append(Paragraph(clean_text(line), styles['content']))
+            elements.append(Paragraph(clean_text(block.line), styles['content']))
             elements.append(Spacer(1, 8))
     
     return elements
 
+def get_section_styles():
+    """Return copies of the comprehensive analysis styles for one report build"""
+    return copy_styles(build_section_styles())
+
+@functools.lru_cache(maxsize=None)
+def build_section_styles():
+    """Create the comprehensive analysis styles once per process from the custom styles"""
+    return create_section_styles(build_custom_styles())
+
 def create_section_styles(base_styles):
     """Create enhanced styles for comprehensive analysis"""
     return {
@@ -858,13 +3426,12 @@ def create_section_styles(base_styles):
         )
     }
 
-def create_comprehensive_analysis_section(content, styles):
-    """Create structured comprehensive analysis section with improved formatting"""
+def create_comprehensive_analysis_section(content, custom_styles):
+    """Create structured comprehensive analysis section with improved formatting, using the create_section_styles styles"""
     elements = []
-    custom_styles = create_section_styles(styles)
     
     # Parse content into sections
-    sections = parse_content_sections(content)
+    sections = analysis_sections(content)
     
     # Company Overview Section
     elements.extend([
@@ -909,6 +3476,71 @@ def create_comprehensive_analysis_section(content, styles):
     
     return elements
 
+def parse_structured_analysis(content):
+    """Validate a JSON comprehensive analysis against COMPREHENSIVE_ANALYSIS_SCHEMA, returning it in the
+    parse_content_sections layout. Raises ValueError if it does not match.
+    """
+    data = json.loads(content)
+
+    def strings(value, field):
+        if not isinstance(value, list) or not all(isinstance(item, str) for item in value):
+            raise ValueError(f"'{field}' must be a list of strings")
+        return [item for item in value if item.strip()]
+
+    if not isinstance(data, dict):
+        raise ValueError("Comprehensive analysis must be a JSON object")
+    missing = [field for field in COMPREHENSIVE_ANALYSIS_SCHEMA["required"] if field not in data]
+    if missing:
+        raise ValueError(f"Comprehensive analysis is missing {', '.join(missing)}")
+    if not isinstance(data["summary"], str):
+        raise ValueError("'summary' must be a string")
+    if not isinstance(data["solutions"], list) or not all(
+        isinstance(solution, dict) and isinstance(solution.get("category"), str) for solution in data["solutions"]
+    ):
+        raise ValueError("'solutions' must be a list of objects with a category")
+    if not isinstance(data["kpis"], dict):
+        raise ValueError("'kpis' must be an object")
+
+    return {
+        "summary": [data["summary"]] if data["summary"].strip() else [],
+        "reasons": strings(data["reasons"], "reasons"),
+        "solutions": {
+            solution["category"]: strings(solution.get("points", []), "solutions.points")
+            for solution in data["solutions"]
+        },
+        "kpis": {
+            period: strings(data["kpis"].get(period, []), f"kpis.{period}")
+            for period in ("short", "medium", "long")
+        }
+    }
+
+def analysis_sections(content):
+    """Split a comprehensive analysis into sections, reading structured output directly and parsing free text"""
+    if content.lstrip().startswith('{'):
+        try:
+            return parse_structured_analysis(content)
+        except ValueError as e:
+            logger.warning("Structured comprehensive analysis is invalid (%s), parsing it as text", e)
+    return parse_content_sections(content)
+
+def analysis_markdown(content):
+    """Render a structured comprehensive analysis as markdown for the page; free text is returned unchanged"""
+    if not content or not content.lstrip().startswith('{'):
+        return content
+    try:
+        sections = parse_structured_analysis(content)
+    except ValueError:
+        return content
+    lines = ["#### Company Summary and Priorities", *sections["summary"], "", "#### Reasons for Advisory Support"]
+    lines += [f"{i}. {reason}" for i, reason in enumerate(sections["reasons"], 1)]
+    lines += ["", "#### Advisor/Coach Solutions"]
+    for category, points in sections["solutions"].items():
+        lines += ["", f"**{category}**", *(f"- {point}" for point in points)]
+    lines += ["", "#### KPIs"]
+    for period, title in (("short", "Short Term (3 Months)"), ("medium", "Medium Term (3-6 Months)"), ("long", "Long Term (6-12 Months)")):
+        lines += ["", f"**{title}**", *(f"- {kpi}" for kpi in sections["kpis"][period])]
+    return "\n".join(lines)
+
 def parse_content_sections(content):
     """Parse comprehensive analysis content into structured sections"""
     sections = {
@@ -926,85 +3558,78 @@ def parse_content_sections(content):
     current_subsection = None
     solution_category = None
     
-    for line in content.split('\n'):
-        line = line.strip()
-        if not line:
-            continue
-            
-        lower_line = line.lower()
-        
+    for block in completion_blocks(content):
         # Identify sections
-        if any(x in lower_line for x in ["synthesized company summary", "company summary and priorities"]):
-            current_section = "summary"
-            continue
-        elif "reasons for needing" in lower_line or "5 reasons" in lower_line:
-            current_section = "reasons"
-            continue
-        elif "detailed advisor/coach solutions" in lower_line or "coach solutions" in lower_line:
-            current_section = "solutions"
-            continue
-        elif "short term" in lower_line and "month" in lower_line or "Short-term" in lower_line:
-            current_section = "kpis"
-            current_subsection = "short"
-            continue
-        elif "medium term" in lower_line and "month" in lower_line or "Medium-term" in lower_line:
+        if block.marker in KPI_PERIODS:
             current_section = "kpis"
-            current_subsection = "medium"
+            current_subsection = block.marker
             continue
-        elif "long term" in lower_line and "month" in lower_line or "Long-term" in lower_line:
-            current_section = "kpis"
-            current_subsection = "long"
+        elif block.marker:
+            current_section = block.marker
             continue
         
         # Process content based on section
+        is_bullet = block.kind in ("bullet", "starred")
         if current_section == "summary":
-            sections["summary"].append(line)
+            sections["summary"].append(block.line)
         elif current_section == "reasons":
-            if any(char.isdigit() for char in line[:2]):
-                cleaned_line = re.sub(r'^\d+\.?\s*', '', line)
-                sections["reasons"].append(cleaned_line)
+            if block.item is not None:
+                sections["reasons"].append(block.item)
         elif current_section == "solutions":
-            if not line.startswith(('•', '-', '*')) and len(line) < 50:
-                solution_category = line
+            if not is_bullet and len(block.line) < 50:
+                solution_category = block.line
                 if solution_category not in sections["solutions"]:
                     sections["solutions"][solution_category] = []
-            elif solution_category and line.startswith(('•', '-', '*')):
-                sections["solutions"][solution_category].append(line.lstrip('•- '))
+            elif solution_category and is_bullet:
+                sections["solutions"][solution_category].append(block.text)
         elif current_section == "kpis" and current_subsection:
-            if line.startswith(('•', '-', '*')):
-                sections["kpis"][current_subsection].append(line.lstrip('•- '))
+            if is_bullet:
+                sections["kpis"][current_subsection].append(block.text)
     
     return sections
 
+SECTION_HEADER_TABLE_STYLE = TableStyle([
+    ('LINEABOVE', (0, 0), (-1, 0), 2, colors.HexColor('#2b6cb0')),
+    ('LINEBELOW', (0, 0), (-1, 0), 0.5, colors.HexColor('#e2e8f0')),
+    ('TOPPADDING', (0, 0), (-1, 0), 15),
+    ('BOTTOMPADDING', (0, 0), (-1, 0), 15),
+])
+
 def create_section_header(title, style):
     """Create formatted section header with decorative elements"""
     return Table(
         [[Paragraph(title, style)]],
         colWidths=[7*inch],
-        style=TableStyle([
-            ('LINEABOVE', (0, 0), (-1, 0), 2, colors.HexColor('#2b6cb0')),
-            ('LINEBELOW', (0, 0), (-1, 0), 0.5, colors.HexColor('#e2e8f0')),
-            ('TOPPADDING', (0, 0), (-1, 0), 15),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 15),
-        ])
+        style=SECTION_HEADER_TABLE_STYLE
     )
 
+HIGHLIGHT_BOX_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, -1), colors.HexColor('#f7fafc')),
+    ('BOX', (0, 0), (-1, -1), 1, colors.HexColor('#e2e8f0')),
+    ('TOPPADDING', (0, 0), (-1, -1), 12),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
+    ('LEFTPADDING', (0, 0), (-1, -1), 15),
+    ('RIGHTPADDING', (0, 0), (-1, -1), 15),
+    ('ROUNDEDCORNERS', (0, 0), (-1, -1), 8),
+])
+
 def create_highlight_box(text, styles):
     """Create highlighted box for key content"""
     return Table(
         [[Paragraph(clean_text(text), styles['highlight'])]],
         colWidths=[7*inch],
-        style=TableStyle([
-            ('BACKGROUND', (0, 0), (-1, -1), colors.HexColor('#f7fafc')),
-            ('BOX', (0, 0), (-1, -1), 1, colors.HexColor('#e2e8f0')),
-            ('TOPPADDING', (0, 0), (-1, -1), 12),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
-            ('LEFTPADDING', (0, 0), (-1, -1), 15),
-            ('RIGHTPADDING', (0, 0), (-1, -1), 15),
-            ('ROUNDEDCORNERS', (0, 0), (-1, -1), 8),
-        ])
+        style=HIGHLIGHT_BOX_TABLE_STYLE
     )
 
+KPI_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, -1), colors.HexColor('#f8fafc')),
+    ('GRID', (0, 0), (-1, -1), 0.5, colors.HexColor('#e2e8f0')),
+    ('LEFTPADDING', (0, 0), (-1, -1), 20),
+    ('RIGHTPADDING', (0, 0), (-1, -1), 15),
+    ('TOPPADDING', (0, 0), (-1, -1), 8),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
+])
+
 def create_kpi_table(kpis, styles):
     """Create formatted table for KPIs"""
     if not kpis:
@@ -1022,16 +3647,18 @@ def create_kpi_table(kpis, styles):
     return Table(
         data,
         colWidths=[6.5*inch],
-        style=TableStyle([
-            ('BACKGROUND', (0, 0), (-1, -1), colors.HexColor('#f8fafc')),
-            ('GRID', (0, 0), (-1, -1), 0.5, colors.HexColor('#e2e8f0')),
-            ('LEFTPADDING', (0, 0), (-1, -1), 20),
-            ('RIGHTPADDING', (0, 0), (-1, -1), 15),
-            ('TOPPADDING', (0, 0), (-1, -1), 8),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
-        ])
+        style=KPI_TABLE_STYLE
     )
 
+REASONS_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, -1), colors.HexColor('#ffffff')),
+    ('GRID', (0, 0), (-1, -1), 0.5, colors.HexColor('#e2e8f0')),
+    ('TOPPADDING', (0, 0), (-1, -1), 10),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 10),
+    ('LEFTPADDING', (0, 0), (-1, -1), 15),
+    ('RIGHTPADDING', (0, 0), (-1, -1), 15),
+])
+
 def create_reasons_table(reasons, styles):
     """Create formatted table for reasons section"""
     if not reasons:
@@ -1049,16 +3676,18 @@ def create_reasons_table(reasons, styles):
     return Table(
         data,
         colWidths=[7*inch],
-        style=TableStyle([
-            ('BACKGROUND', (0, 0), (-1, -1), colors.HexColor('#ffffff')),
-            ('GRID', (0, 0), (-1, -1), 0.5, colors.HexColor('#e2e8f0')),
-            ('TOPPADDING', (0, 0), (-1, -1), 10),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 10),
-            ('LEFTPADDING', (0, 0), (-1, -1), 15),
-            ('RIGHTPADDING', (0, 0), (-1, -1), 15),
-        ])
+        style=REASONS_TABLE_STYLE
     )
 
+SOLUTION_BOX_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, -1), colors.HexColor('#f8fafc')),
+    ('GRID', (0, 0), (-1, -1), 0.5, colors.HexColor('#e2e8f0')),
+    ('LEFTPADDING', (0, 0), (-1, -1), 20),
+    ('RIGHTPADDING', (0, 0), (-1, -1), 15),
+    ('TOPPADDING', (0, 0), (-1, -1), 8),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
+])
+
 def create_solution_box(points, styles):
     """Create formatted box for solution points"""
     if not points:
@@ -1076,16 +3705,12 @@ def create_solution_box(points, styles):
     return Table(
         data,
         colWidths=[6.5*inch],
-        style=TableStyle([
-            ('BACKGROUND', (0, 0), (-1, -1), colors.HexColor('#f8fafc')),
-            ('GRID', (0, 0), (-1, -1), 0.5, colors.HexColor('#e2e8f0')),
-            ('LEFTPADDING', (0, 0), (-1, -1), 20),
-            ('RIGHTPADDING', (0, 0), (-1, -1), 15),
-            ('TOPPADDING', (0, 0), (-1, -1), 8),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
-        ])
+        style=SOLUTION_BOX_TABLE_STYLE
     )
 
+# Section builders clean the same tree nodes on every PDF build, so cleaned text is kept per distinct input.
+# A single pass rewrite (regex plus str.translate) gave identical output but ran slower than these replaces
+@functools.lru_cache(maxsize=4096)
 def clean_text(text):
     """Clean text by removing markdown formatting"""
     if not text:
@@ -1102,6 +3727,26 @@ def clean_text(text):
     text = text.replace('...', '.')
     text = text.replace('..', '.')
     return text.strip()
+FRONT_LOGO_TABLE_STYLE = TableStyle([
+    ('ALIGN', (0, 0), (0, 0), 'LEFT'),
+    ('ALIGN', (-1, 0), (-1, 0), 'RIGHT'),
+    ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+])
+PROFILE_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#f8fafc')),
+    ('SPAN', (0, 0), (-1, 0)),  # Span the header across all columns
+    ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#e2e8f0')),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.HexColor('#2b6cb0')),
+    ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, 0), 14),
+    ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+    ('TOPPADDING', (0, 1), (-1, -1), 6),
+    ('BOTTOMPADDING', (0, 1), (-1, -1), 6),
+    ('BACKGROUND', (0, 1), (0, -1), colors.HexColor('#f8fafc')),
+    ('ALIGN', (0, 1), (0, -1), 'RIGHT')
+])
+
 def create_front_page(styles, profile_info, business_priorities):
     """
     Create front page with enhanced styling and business priorities
@@ -1109,19 +3754,16 @@ def create_front_page(styles, profile_info, business_priorities):
     elements = []
     
     # Create logo placement
-    if os.path.exists("smeimge.jpg") and os.path.exists("finb.jpg"):
+    sme_logo, finb_logo = load_logo(SME_LOGO_PATH), load_logo(FINB_LOGO_PATH)
+    if sme_logo and finb_logo:
         logo_table = Table(
             [[
-                Image("smeimge.jpg", width=2*inch, height=0.5*inch),
+                LogoImage(sme_logo, width=2*inch, height=0.5*inch),
                 '',  # Empty cell for spacing
-                Image("finb.jpg", width=1.5*inch, height=0.5*inch)
+                LogoImage(finb_logo, width=1.5*inch, height=0.5*inch)
             ]], 
             colWidths=[2.5*inch, 3*inch, 2*inch],
-            style=TableStyle([
-                ('ALIGN', (0, 0), (0, 0), 'LEFT'),
-                ('ALIGN', (-1, 0), (-1, 0), 'RIGHT'),
-                ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-            ])
+            style=FRONT_LOGO_TABLE_STYLE
         )
         elements.append(logo_table)
     
@@ -1146,20 +3788,7 @@ def create_front_page(styles, profile_info, business_priorities):
         [[Paragraph(key, styles['table_header']), 
           Paragraph(str(value), styles['profile_content'])] for key, value in profile_data],
         colWidths=[2*inch, 5*inch],
-        style=TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#f8fafc')),
-            ('SPAN', (0, 0), (-1, 0)),  # Span the header across all columns
-            ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#e2e8f0')),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.HexColor('#2b6cb0')),
-            ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 14),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('TOPPADDING', (0, 1), (-1, -1), 6),
-            ('BOTTOMPADDING', (0, 1), (-1, -1), 6),
-            ('BACKGROUND', (0, 1), (0, -1), colors.HexColor('#f8fafc')),
-            ('ALIGN', (0, 1), (0, -1), 'RIGHT')
-        ])
+        style=PROFILE_TABLE_STYLE
     )
     
     elements.append(profile_table)
@@ -1189,11 +3818,17 @@ def create_front_page(styles, profile_info, business_priorities):
     
     return elements
 
-def create_error_pdf():
+ERROR_LOGO_TABLE_STYLE = TableStyle([
+    ('ALIGN', (0, 0), (0, 0), 'LEFT'),
+    ('ALIGN', (1, 0), (1, 0), 'RIGHT'),
+    ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+])
+
+def create_error_pdf(output=None):
     """
-    Create a simple PDF with error message if generation fails
+    Create a simple PDF with error message if generation fails, written to output or a new buffer
     """
-    buffer = io.BytesIO()
+    buffer = output if output is not None else io.BytesIO()
     doc = SimpleDocTemplate(
         buffer,
         pagesize=letter,
@@ -1203,22 +3838,19 @@ def create_error_pdf():
         bottomMargin=inch
     )
     
-    styles = getSampleStyleSheet()
+    styles = get_sample_stylesheet()
     elements = []
     
     # Add logos if available
-    if os.path.exists("smeimge.jpg") and os.path.exists("finb.jpg"):
+    sme_logo, finb_logo = load_logo(SME_LOGO_PATH), load_logo(FINB_LOGO_PATH)
+    if sme_logo and finb_logo:
         logo_table = Table(
             [[
-                Image("smeimge.jpg", width=2*inch, height=0.5*inch),
-                Image("finb.jpg", width=1.5*inch, height=0.5*inch)
+                LogoImage(sme_logo, width=2*inch, height=0.5*inch),
+                LogoImage(finb_logo, width=1.5*inch, height=0.5*inch)
             ]], 
             colWidths=[4*inch, 4*inch],
-            style=TableStyle([
-                ('ALIGN', (0, 0), (0, 0), 'LEFT'),
-                ('ALIGN', (1, 0), (1, 0), 'RIGHT'),
-                ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-            ])
+            style=ERROR_LOGO_TABLE_STYLE
         )
         elements.append(logo_table)
     
@@ -1240,12 +3872,12 @@ def create_error_pdf():
     
     try:
         doc.build(elements)
-        buffer.seek(0)
-        return buffer
     except:
         # If even the error PDF fails, return an empty buffer
+        pass
+    if output is None:
         buffer.seek(0)
-        return buffer
+    return buffer
 
 def validate_pdf_inputs(profile_info, selected_areas, company_summary, comprehensive_summary, business_priorities):
     """
@@ -1275,17 +3907,19 @@ def validate_pdf_inputs(profile_info, selected_areas, company_summary, comprehen
     return True, ""
 
 
-def generate_business_analysis_pdf(comprehensive_summary, profile_info, selected_areas, company_summary, business_priorities):
+def generate_business_analysis_pdf(comprehensive_summary, profile_info, selected_areas, company_summary, business_priorities, area_analyses):
     """
     Wrapper function to handle PDF generation with error handling
     """
     try:
-        return generate_pdf(comprehensive_summary, profile_info, selected_areas, company_summary, business_priorities)
+        return io.BytesIO(render_report_pdf(
+            comprehensive_summary, profile_info, selected_areas, company_summary, business_priorities, area_analyses
+        ).read())
     except Exception as e:
-        print(f"Error generating PDF: {str(e)}")
+        report_error(f"Error generating PDF: {str(e)}")
         return create_error_pdf()
 
-def create_business_analysis_report(profile_info, selected_areas, company_summary, comprehensive_summary, business_priorities):
+def create_business_analysis_report(profile_info, selected_areas, company_summary, comprehensive_summary, business_priorities, area_analyses):
     """
     Main function to create the business analysis PDF report
     """
@@ -1295,7 +3929,7 @@ def create_business_analysis_report(profile_info, selected_areas, company_summar
     )
     
     if not is_valid:
-        st.error(error_message)
+        report_error(error_message)
         return create_error_pdf()
     
     # Generate the PDF report
@@ -1305,12 +3939,13 @@ def create_business_analysis_report(profile_info, selected_areas, company_summar
             profile_info,
             selected_areas,
             company_summary,
-            business_priorities
+            business_priorities,
+            area_analyses
         )
         
         return pdf_buffer
     except Exception as e:
-        st.error(f"Error generating report: {str(e)}")
+        report_error(f"Error generating report: {str(e)}")
         return create_error_pdf()
 def offer_pdf_download(pdf_buffer):
     """Helper function to offer PDF download in Streamlit"""
@@ -1356,13 +3991,14 @@ def create_header_footer(canvas, doc):
     
     if doc.page > 1:
         # Header with logo
-        if os.path.exists("finb.jpg"):
-            canvas.drawImage("finb.jpg", 
-                           letter[0] - 1.5*inch, 
-                           letter[1] - 0.75*inch, 
-                           width=1.3*inch, 
-                           height=0.8*inch, 
-                           preserveAspectRatio=True)
+        logo = load_logo(FINB_LOGO_PATH)
+        if logo:
+            draw_logo(canvas, logo,
+                      letter[0] - 1.5*inch, 
+                      letter[1] - 0.75*inch, 
+                      width=1.3*inch, 
+                      height=0.8*inch, 
+                      preserveAspectRatio=True)
         
         canvas.setStrokeColor(colors.HexColor('#e6e6e6'))
         
@@ -1375,6 +4011,420 @@ def create_header_footer(canvas, doc):
         canvas.line(inch, 0.75*inch, letter[0] - inch, 0.75*inch)
     
     canvas.restoreState()
+def read_batch_profiles(path):
+    """Read SME profiles for batch generation from a JSONL or CSV file.
+
+    Each row holds raw_priorities, selected_areas (a list, or a ';'-separated string in CSV) and the
+    PROFILE_FIELDS. Rows without an 'id' get a stable id derived from their content.
+    """
+    with open(path, encoding="utf-8", newline="") as f:
+        if path.lower().endswith(".csv"):
+            rows = list(csv.DictReader(f))
+        else:
+            rows = [json.loads(line) for line in f if line.strip()]
+
+    for row in rows:
+        if isinstance(row.get('selected_areas'), str):
+            row['selected_areas'] = [area.strip() for area in row['selected_areas'].split(';') if area.strip()]
+        if not row.get('id'):
+            row['id'] = hashlib.sha256(json.dumps(row, sort_keys=True).encode("utf-8")).hexdigest()[:12]
+    return rows
+
+def generate_report_for_profile(row, openai_api_key, sink=None):
+    """Run the full analysis flow for one batch row, writing the PDF into sink and returning (texts, sink)"""
+    raw_priorities = row.get('raw_priorities', '')
+    selected_areas = row.get('selected_areas') or []
+    profile_info = {field: row.get(field, '') for field in PROFILE_FIELDS}
+
+    unknown_areas = [area for area in selected_areas if area not in BUSINESS_OPTIONS]
+    if unknown_areas:
+        raise ValueError(f"Unknown business areas: {', '.join(unknown_areas)}")
+
+    response = run_service(get_service().generate_report(
+        ReportRequest(profile_info, raw_priorities, selected_areas, openai_api_key), sink=sink, strict=True
+    ))
+    return response.texts, response.pdf
+
+def run_batch(input_path, output_dir, openai_api_key, workers=2, retries=3, retry_delay=10.0):
+    """Generate reports for every profile in input_path, skipping rows already recorded in the checkpoint.
+
+    Returns the number of rows that failed.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    checkpoint_path = os.path.join(output_dir, "checkpoint.jsonl")
+    completed = set()
+    if os.path.exists(checkpoint_path):
+        with open(checkpoint_path, encoding="utf-8") as f:
+            completed = {json.loads(line)['id'] for line in f if line.strip()}
+
+    rows = [row for row in read_batch_profiles(input_path) if row['id'] not in completed]
+    logger.info("%d profiles to generate, %d already done", len(rows), len(completed))
+    checkpoint_lock = threading.Lock()
+
+    def process(row):
+        # Let interactive sessions in the same process go first when rate limited
+        request_priority.set(PRIORITY_BATCH)
+        pdf_path = os.path.join(output_dir, f"{row['id']}.pdf")
+        for attempt in range(retries + 1):
+            try:
+                # The PDF is written straight to its output file
+                texts, _ = generate_report_for_profile(row, openai_api_key, FilePdfSink(pdf_path))
+                break
+            except ValueError as e:
+                # Invalid input will not succeed on retry
+                logger.error("Profile %s skipped: %s", row['id'], e)
+                return False
+            except Exception as e:
+                if attempt == retries:
+                    logger.error("Profile %s failed: %s", row['id'], e)
+                    # Do not leave an error PDF behind in place of the report
+                    if os.path.exists(pdf_path):
+                        os.remove(pdf_path)
+                    return False
+                # Back off before retrying, giving rate limits time to reset
+                delay = retry_delay * (2 ** attempt) * random.uniform(0.5, 1.5)
+                logger.warning("Profile %s failed (%s), retrying in %.0fs", row['id'], e, delay)
+                time.sleep(delay)
+
+        with open(os.path.join(output_dir, f"{row['id']}.json"), "w", encoding="utf-8") as f:
+            json.dump(texts, f, indent=2)
+        with checkpoint_lock, open(checkpoint_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps({'id': row['id'], 'pdf': pdf_path}) + "\n")
+        logger.info("Profile %s written to %s", row['id'], pdf_path)
+        return True
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        results = list(executor.map(process, rows))
+    return results.count(False)
+
+def cli(argv=None):
+    """Command line entry point for headless report generation"""
+    parser = argparse.ArgumentParser(prog="python -m SMEBoost", description="SMEBoost report generation")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    batch_parser = subparsers.add_parser("batch", help="Generate reports for SME profiles in a JSONL or CSV file")
+    batch_parser.add_argument("input", help="JSONL or CSV file of SME profiles")
+    batch_parser.add_argument("--out", default="reports", help="Directory for generated reports and the checkpoint")
+    batch_parser.add_argument("--workers", type=int, default=2, help="Number of profiles generated concurrently")
+    batch_parser.add_argument("--retries", type=int, default=3, help="Retries per profile before giving up")
+    batch_parser.add_argument("--retry-delay", type=float, default=10.0, help="Initial retry backoff in seconds")
+    batch_parser.add_argument("--api-key", default=os.environ.get("OPENAI_API_KEY"), help="OpenAI API key")
+
+    subparsers.add_parser("gc-reports", help="Remove stored reports past the retention period and unreferenced blobs")
+
+    warm_parser = subparsers.add_parser("warm-templates", help="Generate missing or outdated business area templates")
+    warm_parser.add_argument("--options", nargs="+", choices=list(BUSINESS_OPTIONS), help="Business areas to warm (default: all)")
+    warm_parser.add_argument(
+        "--segments", action="store_true",
+        help="Also warm templates per revenue range, staff strength and industry, which only batch runs are served"
+    )
+    warm_parser.add_argument("--industries", nargs="+", help="Segment industries to warm (default: SMEBOOST_TEMPLATE_INDUSTRIES)")
+    warm_parser.add_argument("--workers", type=int, default=MAX_CONCURRENT_REQUESTS, help="Templates generated concurrently")
+    warm_parser.add_argument("--limit", type=int, help="Generate at most this many templates in this run")
+    warm_parser.add_argument("--api-key", default=os.environ.get("OPENAI_API_KEY"), help="OpenAI API key")
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    if args.command == "gc-reports":
+        store = get_report_store()
+        if store is not None:
+            logger.info("Removed %d reports", store.gc())
+        return 0
+    if not args.api_key:
+        parser.error("an OpenAI API key is required (--api-key or OPENAI_API_KEY)")
+
+    if args.command == "warm-templates":
+        generated, up_to_date, failed = warm_area_templates(
+            args.api_key, args.options, args.industries, args.workers, args.limit, args.segments
+        )
+        logger.info("%d templates generated, %d already up to date, %d failed", generated, up_to_date, failed)
+        return 1 if failed else 0
+
+    failed = run_batch(args.input, args.out, args.api_key, args.workers, args.retries, args.retry_delay)
+    return 1 if failed else 0
+
+# Service layer: awaitable versions of the report steps with explicit request and response types, independent of
+# Streamlit so they can be embedded in an async web server or worker. The LLM calls, rate limiting and PDF rendering
+# underneath are blocking, so each step runs on a shared thread pool and is awaited from the event loop; threads are
+# only held while a step is running, not for the lifetime of a user session
+SERVICE_WORKERS = int(os.environ.get("SMEBOOST_SERVICE_WORKERS", "32"))
+
+@dataclass
+class PriorityRequest:
+    business_priorities: str
+    openai_api_key: str
+
+@dataclass
+class PriorityResponse:
+    suggestions: Optional[str]
+    errors: list = field(default_factory=list)
+
+@dataclass
+class AreaAnalysisRequest:
+    business_priorities: str
+    areas: list
+    openai_api_key: str
+    profile_info: Optional[dict] = None
+    # {area: future} of analyses already running in the background, e.g. from AreaPrefetcher.claim
+    prefetched: dict = field(default_factory=dict)
+
+@dataclass
+class AreaAnalysis:
+    area: str
+    analysis: Optional[str]
+    errors: list = field(default_factory=list)
+
+@dataclass
+class ProfileAnalysisRequest:
+    profile_info: dict
+    business_priority_suggestions: str
+    openai_api_key: str
+
+@dataclass
+class ReportRequest:
+    profile_info: dict
+    business_priorities: str
+    selected_areas: list
+    openai_api_key: str
+    business_priority_suggestions: Optional[str] = None
+    company_summary: Optional[str] = None
+    comprehensive_summary: Optional[str] = None
+    # {area_analysis_key(area): analysis}
+    area_analyses: dict = field(default_factory=dict)
+
+@dataclass
+class ReportResponse:
+    input_key: str
+    pdf: PdfSink
+    texts: dict
+    errors: list = field(default_factory=list)
+
+class ProfileAnalysisStream:
+    """Async view of a ProfileAnalysisPipeline running on the service's thread pool"""
+
+    def __init__(self, service, request):
+        self.errors = []
+        self._service = service
+        self._request = request
+        self._pipeline = None
+
+    async def _get_pipeline(self):
+        # The pipeline may start its first request when created, so create it off the event loop
+        if self._pipeline is None:
+            self._pipeline = await self._service._run(
+                self.errors, ProfileAnalysisPipeline,
+                self._request.profile_info, self._request.business_priority_suggestions, self._request.openai_api_key
+            )
+        return self._pipeline
+
+    @property
+    def company_summary(self):
+        return self._pipeline.company_summary if self._pipeline is not None else None
+
+    async def company_summary_draft(self):
+        pipeline = await self._get_pipeline()
+        return await self._service._run(self.errors, pipeline.company_summary_draft)
+
+    async def company_summary_chunks(self):
+        pipeline = await self._get_pipeline()
+        async for chunk in self._service._iterate(self.errors, pipeline.company_summary_chunks()):
+            yield chunk
+
+    async def comprehensive_summary_chunks(self):
+        pipeline = await self._get_pipeline()
+        async for chunk in self._service._iterate(self.errors, pipeline.comprehensive_summary_chunks()):
+            yield chunk
+
+class SMEBoostService:
+    """Async API for the business analysis and report steps.
+
+    Errors that the underlying functions would show on the page are returned in each response's errors instead.
+    """
+
+    def __init__(self, workers=SERVICE_WORKERS):
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="smeboost-service")
+
+    async def _run(self, errors, fn, *args):
+        """Run fn(*args) on the thread pool in a copy of the caller's context, collecting its errors into errors"""
+        context = contextvars.copy_context()
+        context.run(service_errors.set, errors)
+        return await asyncio.get_running_loop().run_in_executor(self._executor, functools.partial(context.run, fn, *args))
+
+    async def _iterate(self, errors, iterator):
+        """Iterate a blocking iterator on the thread pool, one item at a time"""
+        while True:
+            item = await self._run(errors, next, iterator, None)
+            if item is None:
+                return
+            yield item
+
+    async def prioritize(self, request):
+        """Expand the user's business priorities into suggestions"""
+        errors = []
+        suggestions = await self._run(errors, business_priority, request.business_priorities, request.openai_api_key)
+        return PriorityResponse(suggestions, errors)
+
+    async def _analyse_area(self, request, area, semaphore):
+        errors = []
+        future = request.prefetched.get(area)
+        if future is not None:
+            # Wait for the prefetch without holding a request slot; it is only requested again if it failed
+            await asyncio.wait([asyncio.wrap_future(future)])
+        async with semaphore:
+            if future is not None:
+                analysis = await self._run(
+                    errors, resolve_prefetched_area, future, request.business_priorities, area, request.openai_api_key,
+                    request.profile_info
+                )
+            else:
+                analysis = await self._run(
+                    errors, get_specific_suggestions, request.business_priorities, area, request.openai_api_key,
+                    request.profile_info
+                )
+        return AreaAnalysis(area, analysis, errors)
+
+    async def analyse_areas(self, request):
+        """Yield an AreaAnalysis for each requested area as soon as it completes"""
+        semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+        for result in asyncio.as_completed([self._analyse_area(request, area, semaphore) for area in request.areas]):
+            yield await result
+
+    def analyse_profile(self, request):
+        """Return a ProfileAnalysisStream streaming the company summary and then the comprehensive analysis"""
+        return ProfileAnalysisStream(self, request)
+
+    async def find_report(self, request):
+        """Return the StoredReport generated from the request's inputs, or None"""
+        return await self._run(
+            [], find_stored_report, request.profile_info, request.business_priorities, request.selected_areas, request.openai_api_key
+        )
+
+    async def render_report(self, request, sink=None):
+        """Render the report PDF from the request's analyses into sink and keep it in the report store"""
+        errors = []
+        texts = {
+            'business_priority_suggestions': request.business_priority_suggestions,
+            'company_summary': request.company_summary,
+            'comprehensive_summary': request.comprehensive_summary,
+            **request.area_analyses
+        }
+        texts = {key: text for key, text in texts.items() if text is not None}
+        pdf_sink = await self._run(
+            errors, render_report_pdf, request.comprehensive_summary, request.profile_info, request.selected_areas,
+            request.company_summary, request.business_priorities, request.area_analyses, sink
+        )
+        pdf_sink = await self._run(
+            errors, store_report, request.profile_info, request.business_priorities, request.selected_areas,
+            request.openai_api_key, texts, pdf_sink
+        )
+        input_key = report_input_key(request.profile_info, request.business_priorities, request.selected_areas)
+        return ReportResponse(input_key, pdf_sink, texts, errors)
+
+    async def generate_report(self, request, sink=None, job=None, strict=False):
+        """Run every step the request has no result for yet and render the report into sink, reusing a stored one if any.
+
+        Stage, progress and the partial analyses are recorded on job when given. With strict, a step that produces
+        nothing raises RuntimeError with the errors so far instead of the report being rendered without it.
+        """
+        errors = []
+
+        def check(result, message):
+            if strict and not result:
+                raise RuntimeError("; ".join([message, *errors]))
+
+        def update(stage, progress):
+            if job is not None:
+                job.stage, job.progress = stage, progress
+
+        stored = await self.find_report(request)
+        if stored is not None:
+            if sink is None:
+                return ReportResponse(stored.input_key, stored.pdf, stored.texts)
+            with sink.writer() as f:
+                f.write(stored.pdf.read())
+            return ReportResponse(stored.input_key, sink, stored.texts)
+
+        if request.business_priority_suggestions is None:
+            update("Analysing business priorities", 0.05)
+            response = await self.prioritize(PriorityRequest(request.business_priorities, request.openai_api_key))
+            errors += response.errors
+            check(response.suggestions, "Business priority analysis failed")
+            request = replace(request, business_priority_suggestions=response.suggestions or "")
+
+        missing = [area for area in request.selected_areas if area_analysis_key(area) not in request.area_analyses]
+        if missing:
+            update("Analysing business areas", 0.1)
+            area_analyses = dict(request.area_analyses)
+            async for result in self.analyse_areas(AreaAnalysisRequest(
+                request.business_priorities, missing, request.openai_api_key, request.profile_info
+            )):
+                errors += result.errors
+                check(result.analysis, f"Analysis for {result.area} failed")
+                if result.analysis:
+                    area_analyses[area_analysis_key(result.area)] = result.analysis
+            request = replace(request, area_analyses=area_analyses)
+
+        if request.comprehensive_summary is None:
+            partial = job.partial if job is not None else {}
+            stream = self.analyse_profile(ProfileAnalysisRequest(
+                request.profile_info, request.business_priority_suggestions, request.openai_api_key
+            ))
+            update("Writing company summary", 0.2)
+            partial['company_summary'] = ""
+            async for chunk in stream.company_summary_chunks():
+                partial['company_summary'] += chunk
+            errors += stream.errors
+            reported = len(stream.errors)
+            check(stream.company_summary, "Company summary generation failed")
+
+            update("Writing comprehensive analysis", 0.5)
+            partial['comprehensive_summary'] = ""
+            async for chunk in stream.comprehensive_summary_chunks():
+                partial['comprehensive_summary'] += chunk
+            errors += stream.errors[reported:]
+            check(partial['comprehensive_summary'], "Comprehensive analysis generation failed")
+            request = replace(
+                request, company_summary=stream.company_summary, comprehensive_summary=partial['comprehensive_summary'] or None
+            )
+
+        update("Building PDF report", 0.9)
+        response = await self.render_report(request, sink)
+        response.errors[:0] = errors
+        check(not response.pdf.error, f"PDF generation failed: {response.pdf.error}")
+        return response
+
+@st.cache_resource(show_spinner=False)
+def get_service():
+    """Return the process-wide service used by the Streamlit UI"""
+    return SMEBoostService()
+
+@st.cache_resource(show_spinner=False)
+def get_service_loop():
+    """Return the event loop, running on its own thread, that every Streamlit session submits service calls to"""
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, name="smeboost-service-loop", daemon=True).start()
+    return loop
+
+def run_service(awaitable):
+    """Wait from a script, job or batch thread for a service call running on the shared event loop"""
+    async def wait():
+        return await awaitable
+    return asyncio.run_coroutine_threadsafe(wait(), get_service_loop()).result()
+
+def iterate_service(async_iterator):
+    """Iterate a service async iterator from the script thread"""
+    while True:
+        try:
+            yield run_service(async_iterator.__anext__())
+        except StopAsyncIteration:
+            return
+
+def show_service_errors(errors):
+    """Show the errors returned by a service call on the page"""
+    for message in errors:
+        st.error(message)
+
 def main():
     """Main application function"""
     initialize_session_state()
@@ -1386,6 +4436,29 @@ def main():
         st.info("Please add your OpenAI API key to continue.", icon="🗝️")
         return
     
+    cache_stats = get_response_cache().stats()
+    st.sidebar.caption(f"Response cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses")
+    section_stats = get_pdf_section_cache().stats()
+    st.sidebar.caption(f"PDF section cache: {section_stats['hits']} hits, {section_stats['misses']} misses")
+    for model, (calls, latency, cost) in get_llm_metrics().model_summary().items():
+        st.sidebar.caption(f"{model}: {calls} calls, {latency:.1f}s average, ${cost:.4f}")
+    semantic_cache = get_semantic_cache()
+    if semantic_cache is not None:
+        semantic_stats = semantic_cache.stats()
+        st.sidebar.caption(
+            f"Semantic cache: {semantic_stats['hits']} hits, {semantic_stats['misses']} misses, "
+            f"{semantic_stats['entries']} entries, {semantic_stats['lookup_ms']:.2f} ms per lookup, "
+            f"{semantic_stats['memory_bytes'] / 1024:.0f} KB"
+        )
+    area_prefetcher = get_area_prefetcher()
+    if area_prefetcher is not None:
+        prefetch_stats = area_prefetcher.stats()
+        st.sidebar.caption(
+            f"Area prefetch: {prefetch_stats['used']} used, {prefetch_stats['cancelled']} cancelled, "
+            f"{prefetch_stats['wasted']} wasted, ${prefetch_stats['wasted_usd']:.4f} recent wasted spend"
+        )
+    render_report_history(openai_api_key)
+
     st.write("The SMEBoost Lite GenAI platform is a streamlined, AI-powered version of the full SMEBoost program...")
     
     # Business Priority Form
@@ -1393,6 +4466,8 @@ def main():
     if business_priorities:
         st.session_state.user_data['raw_priorities'] = business_priorities
         st.session_state.show_options = True
+        # Start analysing the likeliest areas while the user is still picking them
+        start_area_prefetch(business_priorities, openai_api_key)
     
     # Business Options
     if st.session_state.show_options:
@@ -1408,55 +4483,88 @@ def main():
                 st.session_state.user_data['selected_areas'] = selected_areas
                 st.session_state.show_profile = True
                 
-                # Generate analysis for selected areas
+                # Generate analysis for selected areas, filling each expander as its result arrives
                 st.write("### Analysis Results")
+                placeholders = {}
                 for option in selected_areas:
                     with st.expander(f"📊 {option} Analysis", expanded=True):
-                        suggestion = get_specific_suggestions(
-                            st.session_state.user_data.get('raw_priorities', ''),
-                            option,
-                            openai_api_key
-                        )
-                        if suggestion:
+                        placeholders[option] = st.empty()
+                        placeholders[option].info(f"Generating {option} analysis...")
+
+                request = AreaAnalysisRequest(
+                    st.session_state.user_data.get('raw_priorities', ''),
+                    selected_areas,
+                    openai_api_key,
+                    prefetched=claim_area_prefetch(st.session_state.user_data.get('raw_priorities', ''), selected_areas)
+                )
+                for result in iterate_service(get_service().analyse_areas(request)):
+                    if result.analysis:
+                        with placeholders[result.area].container():
                             st.markdown("#### Overview")
-                            st.markdown(f"*{BUSINESS_OPTIONS[option]}*")
+                            st.markdown(f"*{BUSINESS_OPTIONS[result.area]}*")
                             st.markdown("#### Detailed Analysis")
-                            st.markdown(suggestion)
-                            st.session_state.user_data[f"{option.lower().replace(' ', '_')}_analysis"] = suggestion
+                            st.markdown(result.analysis)
+                        st.session_state.user_data[area_analysis_key(result.area)] = result.analysis
+                    else:
+                        with placeholders[result.area].container():
+                            show_service_errors(result.errors)
     
     # Business Profile
     if st.session_state.show_profile:
         profile_info = render_business_profile_form()
         if profile_info:
+            report_request = ReportRequest(
+                profile_info,
+                st.session_state.user_data.get('raw_priorities', ''),
+                st.session_state.user_data['selected_areas'],
+                openai_api_key,
+                st.session_state.user_data.get('business_priority_suggestions', ''),
+                area_analyses={key: st.session_state.user_data[key]
+                               for key in map(area_analysis_key, st.session_state.user_data['selected_areas'])
+                               if key in st.session_state.user_data}
+            )
+            stored = run_service(get_service().find_report(report_request))
+            if stored is not None:
+                # Identical inputs were analysed before: serve the stored report instead of generating it again
+                st.session_state.stored_report_key = stored.input_key
+                st.session_state.pop('report_job_id', None)
+                profile_info = None
+            else:
+                st.session_state.pop('stored_report_key', None)
+        if profile_info and REPORT_MODE == "background":
+            # Hand the long LLM calls and PDF build to a worker so reruns never block on them
+            st.session_state.report_job_id = get_report_job_queue().submit(generate_report_job, report_request)
+        elif profile_info:
             with st.spinner("Analyzing your business profile..."):
-                company_summary = get_company_summary(profile_info, openai_api_key)
-                comprehensive_summary = generate_comprehensive_summary(
+                # Stream both long analyses into the page, overlapping them with the static PDF sections
+                company_summary, comprehensive_summary = run_profile_analysis_pipeline(
                     profile_info,
                     st.session_state.user_data.get('business_priority_suggestions', ''),
-                    company_summary,
+                    st.session_state.user_data.get('raw_priorities', ''),
+                    st.session_state.user_data['selected_areas'],
                     openai_api_key
                 )
                 
-                # Display analyses
-                with st.expander("Comprehensive Analysis and Advisory Recommendations", expanded=True):
-                    st.markdown("### Complete Business Analysis")
-                    st.write(comprehensive_summary)
-                
                 # Generate and offer PDF download
-                pdf_buffer = generate_pdf(
-                    comprehensive_summary,
-                    profile_info,
-                    st.session_state.user_data['selected_areas'],
-                    company_summary,
-                    st.session_state.user_data.get('raw_priorities', '')  # Pass business priorities
-                )
+                response = run_service(get_service().render_report(
+                    replace(report_request, company_summary=company_summary, comprehensive_summary=comprehensive_summary)
+                ))
+                show_service_errors(response.errors)
                 
                 st.download_button(
                     label="Download Complete Analysis as PDF",
-                    data=pdf_buffer,
+                    data=response.pdf.read,
                     file_name=f"business_analysis_{datetime.datetime.now().strftime('%Y%m%d')}.pdf",
                     mime="application/pdf"
                 )
 
+        if REPORT_MODE == "background" and 'report_job_id' in st.session_state:
+            render_report_job(st.session_state.report_job_id)
+        if 'stored_report_key' in st.session_state:
+            render_stored_report(st.session_state.stored_report_key, openai_api_key)
+
 if __name__ == "__main__":
+    # Plain `python -m SMEBoost ...` runs the command line; `streamlit run` serves the app
+    if get_script_run_ctx(suppress_warning=True) is None:
+        sys.exit(cli())
     main()
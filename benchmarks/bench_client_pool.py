@@ -0,0 +1,97 @@
+"""Compare per-call latency of a fresh OpenAI client per call against the pooled client.
+
+Runs a local stub of the chat completions endpoint, so no API key or network is needed:
+
+    python benchmarks/bench_client_pool.py --calls 50
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from openai import OpenAI  # noqa: E402
+
+import SMEBoost  # noqa: E402
+
+COMPLETION = {
+    "id": "chatcmpl-bench",
+    "object": "chat.completion",
+    "created": 0,
+    "model": "gpt-4-turbo-preview",
+    "choices": [{
+        "index": 0,
+        "message": {"role": "assistant", "content": "Benchmark response"},
+        "finish_reason": "stop"
+    }],
+    "usage": {"prompt_tokens": 10, "completion_tokens": 2, "total_tokens": 12}
+}
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Minimal keep-alive capable stand-in for POST /v1/chat/completions"""
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        body = json.dumps(COMPLETION).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def call(client):
+    return client.chat.completions.create(
+        model="gpt-4-turbo-preview",
+        messages=[{"role": "user", "content": "ping"}]
+    )
+
+
+def measure(get_client, calls):
+    latencies = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        call(get_client())
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+def report(label, latencies):
+    ordered = sorted(latencies)
+    p95 = ordered[int(len(ordered) * 0.95) - 1]
+    print(f"{label:<20} mean {statistics.mean(latencies):7.2f} ms   "
+          f"median {statistics.median(latencies):7.2f} ms   p95 {p95:7.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=50)
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    os.environ["OPENAI_BASE_URL"] = f"http://127.0.0.1:{server.server_port}/v1"
+
+    try:
+        unpooled = measure(lambda: OpenAI(api_key="bench-key"), args.calls)
+        pooled = measure(lambda: SMEBoost.get_openai_client("bench-key"), args.calls)
+    finally:
+        server.shutdown()
+
+    report("new client per call", unpooled)
+    report("pooled client", pooled)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""Measure the comprehensive analysis prompt with the full company summary against its compressed digest.
+
+Reports the prompt's estimated input tokens and the extractive digest time, cold and served from the cache:
+
+    python benchmarks/bench_context_digest.py --words 1500
+
+With --api-key the comprehensive request itself is timed against the API for both prompts
+(responses are not cached), which costs real tokens:
+
+    python benchmarks/bench_context_digest.py --api-key sk-... --runs 3
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import SMEBoost  # noqa: E402
+import synthetic  # noqa: E402
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, (time.perf_counter() - start) * 1000
+
+
+def request_latency(api_key, prompt, system_content, runs):
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        SMEBoost.call_openai_with_retries(api_key, [
+            {"role": "system", "content": system_content},
+            {"role": "user", "content": prompt}
+        ])
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--words", type=int, default=1500)
+    parser.add_argument("--api-key")
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    company_summary = synthetic.company_summary(words=args.words)
+    SMEBoost.extractive_digest.cache_clear()
+    digest, cold = timed(SMEBoost.compress_company_summary, company_summary, None, "extractive")
+    _, warm = timed(SMEBoost.compress_company_summary, company_summary, None, "extractive")
+
+    prompts = {
+        "full summary": SMEBoost.comprehensive_summary_prompt(
+            synthetic.PROFILE_INFO, synthetic.BUSINESS_PRIORITIES, company_summary),
+        "extractive digest": SMEBoost.comprehensive_summary_prompt(
+            synthetic.PROFILE_INFO, synthetic.BUSINESS_PRIORITIES, digest),
+    }
+    for label, (prompt, system_content) in prompts.items():
+        tokens = SMEBoost.estimate_tokens(prompt) + SMEBoost.estimate_tokens(system_content)
+        print(f"{label:<18} input ~{tokens:6d} tokens")
+    print(f"extractive digest  cold {cold:7.2f} ms   cached {warm:7.3f} ms")
+
+    if args.api_key:
+        for label, (prompt, system_content) in prompts.items():
+            timings = request_latency(args.api_key, prompt, system_content, args.runs)
+            print(f"{label:<18} request median {statistics.median(timings):6.1f} s over {args.runs} runs")
+
+
+if __name__ == "__main__":
+    main()
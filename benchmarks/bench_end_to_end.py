@@ -0,0 +1,91 @@
+"""Drive the full report flow for concurrent simulated users against the replay backend and report per-stage latency.
+
+Each user submits business priorities, analyses the selected business areas, streams the company summary and
+comprehensive analysis, then renders the PDF. No API key or network is needed; the simulated model latency,
+streaming pace and injected errors come from the SMEBOOST_REPLAY_* settings:
+
+    python benchmarks/bench_end_to_end.py --users 8 --rounds 3
+    SMEBOOST_REPLAY_LATENCY=lognormal:900:0.6 SMEBOOST_REPLAY_429_RATE=0.05 python benchmarks/bench_end_to_end.py
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("SMEBOOST_LLM_BACKEND", "replay")
+
+import SMEBoost  # noqa: E402
+import synthetic  # noqa: E402
+
+AREAS = ["Business Valuation", "Fund Raising", "Financial Healthcheck"]
+STAGES = ["priorities", "areas", "first_token", "profile_analysis", "pdf", "total"]
+
+
+def run_flow(user, round_number):
+    """Run one user's flow end to end, returning the seconds spent in each stage"""
+    timings = {}
+    # Distinct inputs per flow so the response cache does not short-circuit the model calls
+    priorities = f"{synthetic.BUSINESS_PRIORITIES} (user {user}, round {round_number})"
+    profile_info = dict(synthetic.PROFILE_INFO, products_services=f"{synthetic.PROFILE_INFO['products_services']} #{user}-{round_number}")
+    start = time.perf_counter()
+
+    stage = time.perf_counter()
+    suggestions = SMEBoost.business_priority(priorities, "replay-key")
+    timings["priorities"] = time.perf_counter() - stage
+
+    stage = time.perf_counter()
+    area_analyses = {
+        SMEBoost.area_analysis_key(area): analysis
+        for area, analysis in SMEBoost.get_specific_suggestions_concurrently(priorities, AREAS, "replay-key")
+    }
+    timings["areas"] = time.perf_counter() - stage
+
+    stage = time.perf_counter()
+    pipeline = SMEBoost.ProfileAnalysisPipeline(profile_info, suggestions, "replay-key")
+    parts = []
+    for chunk in pipeline.company_summary_chunks():
+        if not parts:
+            timings["first_token"] = time.perf_counter() - stage
+        parts.append(chunk)
+    comprehensive_summary = "".join(pipeline.comprehensive_summary_chunks())
+    timings["profile_analysis"] = time.perf_counter() - stage
+
+    stage = time.perf_counter()
+    SMEBoost.render_report_pdf(
+        comprehensive_summary, profile_info, AREAS, pipeline.company_summary, priorities, area_analyses=area_analyses
+    ).read()
+    timings["pdf"] = time.perf_counter() - stage
+
+    timings["total"] = time.perf_counter() - start
+    return timings
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, int(round(fraction * len(ordered))) - 1))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=4, help="concurrent simulated users")
+    parser.add_argument("--rounds", type=int, default=2, help="flows per user")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.users) as executor:
+        flows = list(executor.map(
+            lambda index: run_flow(index % args.users, index // args.users), range(args.users * args.rounds)
+        ))
+    elapsed = time.perf_counter() - start
+
+    print(f"{len(flows)} flows, {args.users} concurrent users, {elapsed:.1f} s wall clock")
+    for name in STAGES:
+        values = [flow[name] for flow in flows if name in flow]
+        print(f"{name:<18} p50 {percentile(values, 0.5):7.2f} s   p95 {percentile(values, 0.95):7.2f} s   "
+              f"p99 {percentile(values, 0.99):7.2f} s")
+
+
+if __name__ == "__main__":
+    main()
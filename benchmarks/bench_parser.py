@@ -0,0 +1,192 @@
+"""Compare the line-by-line substring scanning parsers against the single-pass completion tokenizer.
+
+Parses multi-thousand-word synthetic completions with the previous implementations of
+parse_content_sections, create_business_area_section and create_executive_summary_section (kept
+below as the baseline) and with the current ones, after checking both give identical output.
+Section builder timings include constructing the reportlab Paragraphs.
+"cold" clears the parse_completion and clean_text caches before each run, "warm" reuses them the
+way repeated PDF builds and reruns do:
+
+    python benchmarks/bench_parser.py --words 4000 --runs 50
+"""
+import argparse
+import os
+import re
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from reportlab.platypus import Paragraph, Spacer  # noqa: E402
+
+import SMEBoost  # noqa: E402
+import synthetic  # noqa: E402
+
+
+def baseline_clean_text(text):
+    if not text:
+        return ""
+    text = text.replace('###', '')
+    text = text.replace('- ', '')
+    text = text.replace('**', '')
+    text = ' '.join(text.split())
+    text = text.replace('_', ' ')
+    text = text.replace('`', '')
+    text = text.replace('*', '')
+    text = text.replace('##', '')
+    text = text.replace('....', '.')
+    text = text.replace('...', '.')
+    text = text.replace('..', '.')
+    return text.strip()
+
+
+def baseline_parse_content_sections(content):
+    sections = {"summary": [], "reasons": [], "solutions": {}, "kpis": {"short": [], "medium": [], "long": []}}
+    current_section = None
+    current_subsection = None
+    solution_category = None
+    for line in content.split('\n'):
+        line = line.strip()
+        if not line:
+            continue
+        lower_line = line.lower()
+        if any(x in lower_line for x in ["synthesized company summary", "company summary and priorities"]):
+            current_section = "summary"
+            continue
+        elif "reasons for needing" in lower_line or "5 reasons" in lower_line:
+            current_section = "reasons"
+            continue
+        elif "detailed advisor/coach solutions" in lower_line or "coach solutions" in lower_line:
+            current_section = "solutions"
+            continue
+        elif "short term" in lower_line and "month" in lower_line or "Short-term" in lower_line:
+            current_section, current_subsection = "kpis", "short"
+            continue
+        elif "medium term" in lower_line and "month" in lower_line or "Medium-term" in lower_line:
+            current_section, current_subsection = "kpis", "medium"
+            continue
+        elif "long term" in lower_line and "month" in lower_line or "Long-term" in lower_line:
+            current_section, current_subsection = "kpis", "long"
+            continue
+        if current_section == "summary":
+            sections["summary"].append(line)
+        elif current_section == "reasons":
+            if any(char.isdigit() for char in line[:2]):
+                sections["reasons"].append(re.sub(r'^\d+\.?\s*', '', line))
+        elif current_section == "solutions":
+            if not line.startswith(('•', '-', '*')) and len(line) < 50:
+                solution_category = line
+                if solution_category not in sections["solutions"]:
+                    sections["solutions"][solution_category] = []
+            elif solution_category and line.startswith(('•', '-', '*')):
+                sections["solutions"][solution_category].append(line.lstrip('•- '))
+        elif current_section == "kpis" and current_subsection:
+            if line.startswith(('•', '-', '*')):
+                sections["kpis"][current_subsection].append(line.lstrip('•- '))
+    return sections
+
+
+def baseline_create_business_area_section(content, styles):
+    elements = []
+    for line in content.split('\n'):
+        line = line.strip()
+        if not line:
+            continue
+        if line.startswith(('•', '-')):
+            elements.append(Paragraph(f"• {baseline_clean_text(line.lstrip('•- '))}", styles['bullet']))
+        elif line.startswith(('#', '##')):
+            elements.append(Paragraph(baseline_clean_text(line.lstrip('#').strip()), styles['subheading']))
+            elements.append(Spacer(1, 6))
+        else:
+            elements.append(Paragraph(baseline_clean_text(line), styles['content']))
+            elements.append(Spacer(1, 8))
+    return elements
+
+
+def baseline_create_executive_summary_section(content, styles):
+    elements = []
+    for i, paragraph in enumerate(content.split('\n\n')):
+        para_style = styles['indented_content'] if i == 0 else styles['content']
+        elements.append(Paragraph(baseline_clean_text(paragraph), para_style))
+        elements.append(Spacer(1, 12))
+    return elements
+
+
+def flowable_texts(elements):
+    return [(type(e).__name__, getattr(e, "text", None), getattr(getattr(e, "style", None), "name", None)) for e in elements]
+
+
+def clear_caches():
+    SMEBoost.parse_completion.cache_clear()
+    SMEBoost.clean_text.cache_clear()
+
+
+def sections_cold(comprehensive):
+    clear_caches()
+    SMEBoost.parse_content_sections(comprehensive)
+
+
+def build_sections(build_area, build_summary, areas, company_summary, styles):
+    for area in areas:
+        build_area(area, styles)
+    build_summary(company_summary, styles)
+
+
+def build_sections_cold(*args):
+    clear_caches()
+    build_sections(*args)
+
+
+def measure(build, runs, *args):
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        build(*args)
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def report(label, timings):
+    print(f"{label:<22} mean {statistics.mean(timings):8.2f} ms   median {statistics.median(timings):8.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--words", type=int, default=4000)
+    parser.add_argument("--areas", type=int, default=8)
+    parser.add_argument("--runs", type=int, default=50)
+    args = parser.parse_args()
+
+    comprehensive = synthetic.comprehensive_summary(words=args.words)
+    company_summary = synthetic.company_summary(words=args.words)
+    areas = [synthetic.area_analysis(seed) for seed in range(args.areas)]
+    styles = SMEBoost.create_custom_styles()
+
+    assert SMEBoost.parse_content_sections(comprehensive) == baseline_parse_content_sections(comprehensive)
+    for area in areas:
+        assert flowable_texts(SMEBoost.create_business_area_section(area, styles)) == \
+            flowable_texts(baseline_create_business_area_section(area, styles))
+    assert flowable_texts(SMEBoost.create_executive_summary_section(company_summary, styles)) == \
+        flowable_texts(baseline_create_executive_summary_section(company_summary, styles))
+
+    print(f"parse_content_sections, {args.words} words")
+    report("  substring scans", measure(baseline_parse_content_sections, args.runs, comprehensive))
+    report("  tokenizer (cold)", measure(sections_cold, args.runs, comprehensive))
+    report("  tokenizer (warm)", measure(SMEBoost.parse_content_sections, args.runs, comprehensive))
+
+    # Dominated by reportlab parsing each Paragraph's markup, which neither version changes
+    inputs = (areas, company_summary, styles)
+    print(f"{args.areas} business area sections and a {args.words} word executive summary, including Paragraph construction")
+    report("  substring scans", measure(
+        build_sections, args.runs, baseline_create_business_area_section, baseline_create_executive_summary_section, *inputs
+    ))
+    report("  tokenizer (cold)", measure(
+        build_sections_cold, args.runs, SMEBoost.create_business_area_section, SMEBoost.create_executive_summary_section, *inputs
+    ))
+    report("  tokenizer (warm)", measure(
+        build_sections, args.runs, SMEBoost.create_business_area_section, SMEBoost.create_executive_summary_section, *inputs
+    ))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""Measure PDF rebuild time in an edit-and-redownload loop with and without the section cache.
+
+Each iteration regenerates one business area analysis and rebuilds the report:
+
+    python benchmarks/bench_pdf_sections.py --iterations 20
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import SMEBoost  # noqa: E402
+import synthetic  # noqa: E402
+
+AREAS = ["Business Valuation", "Fund Raising", "Financial Healthcheck", "Succession Planning"]
+
+
+def edit_loop(iterations, cached):
+    area_analyses = {SMEBoost.area_analysis_key(area): synthetic.area_analysis(i) for i, area in enumerate(AREAS)}
+    company_summary = synthetic.company_summary()
+    comprehensive_summary = synthetic.comprehensive_summary()
+    SMEBoost.get_pdf_section_cache.clear()
+    SMEBoost.generate_pdf(
+        comprehensive_summary, synthetic.PROFILE_INFO, AREAS, company_summary, synthetic.BUSINESS_PRIORITIES,
+        area_analyses=area_analyses
+    )
+
+    timings = []
+    for i in range(iterations):
+        area_analyses[SMEBoost.area_analysis_key(AREAS[i % len(AREAS)])] = synthetic.area_analysis(1000 + i)
+        if not cached:
+            SMEBoost.get_pdf_section_cache.clear()
+        start = time.perf_counter()
+        SMEBoost.generate_pdf(
+            comprehensive_summary, synthetic.PROFILE_INFO, AREAS, company_summary, synthetic.BUSINESS_PRIORITIES,
+            area_analyses=area_analyses
+        )
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def report(label, timings):
+    print(f"{label:<24} mean {statistics.mean(timings):7.1f} ms   median {statistics.median(timings):7.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=20)
+    args = parser.parse_args()
+
+    report("full rebuild", edit_loop(args.iterations, cached=False))
+    report("section cache", edit_loop(args.iterations, cached=True))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""Measure the CPU time saved per report by the shared PDF style registry.
+
+    python benchmarks/bench_pdf_styles.py --reports 200
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import SMEBoost  # noqa: E402
+import synthetic  # noqa: E402
+
+AREAS = ["Business Valuation", "Fund Raising", "Financial Healthcheck"]
+
+
+def clear_style_caches():
+    SMEBoost.get_sample_stylesheet.cache_clear()
+    SMEBoost.build_custom_styles.cache_clear()
+    SMEBoost.build_section_styles.cache_clear()
+
+
+def render(reports, cold_styles, texts):
+    start = time.process_time()
+    for _ in range(reports):
+        if cold_styles:
+            clear_style_caches()
+        # Render every section so only the style registry differs between runs
+        SMEBoost.get_pdf_section_cache.clear()
+        SMEBoost.generate_pdf(
+            texts['comprehensive'],
+            synthetic.PROFILE_INFO,
+            AREAS,
+            texts['company'],
+            synthetic.BUSINESS_PRIORITIES,
+            area_analyses=texts['areas']
+        )
+    return (time.process_time() - start) / reports * 1000
+
+
+def style_build_time(iterations):
+    start = time.process_time()
+    for _ in range(iterations):
+        clear_style_caches()
+        SMEBoost.get_section_styles()
+    return (time.process_time() - start) / iterations * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--reports", type=int, default=100)
+    args = parser.parse_args()
+
+    texts = {
+        'company': synthetic.company_summary(),
+        'comprehensive': synthetic.comprehensive_summary(),
+        'areas': {SMEBoost.area_analysis_key(area): synthetic.area_analysis(i) for i, area in enumerate(AREAS)}
+    }
+
+    per_build = style_build_time(args.reports)
+    cold = render(args.reports, True, texts)
+    warm = render(args.reports, False, texts)
+    print(f"style registry build        {per_build:8.3f} ms CPU")
+    print(f"report, styles rebuilt      {cold:8.3f} ms CPU per report")
+    print(f"report, shared registry     {warm:8.3f} ms CPU per report")
+    print(f"saved over {args.reports} reports    {(cold - warm) * args.reports / 1000:8.3f} s CPU")
+
+
+if __name__ == "__main__":
+    main()
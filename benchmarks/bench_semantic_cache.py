@@ -0,0 +1,93 @@
+"""Measure semantic cache hit rate, lookup latency and index memory for near-identical SME profiles.
+
+Fills the cache with base profiles, then looks up lightly reworded variants of them (which should hit) and
+unrelated profiles (which should miss). Lookup latency is compared between brute force search and the
+LSH index used once a partition grows past SMEBOOST_SEMANTIC_LSH_MIN_ENTRIES:
+
+    python benchmarks/bench_semantic_cache.py --profiles 5000 --lookups 500
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np  # noqa: E402
+
+import SMEBoost  # noqa: E402
+import synthetic  # noqa: E402
+
+INDUSTRIES = ["manufacturing", "logistics", "food and beverage", "retail", "construction", "software", "healthcare",
+              "education", "tourism", "agriculture", "automotive", "fashion", "printing", "furniture", "electronics"]
+FILLERS = ["basically", "mainly", "currently", "also", "really"]
+
+
+def base_profile(rng):
+    industry = rng.choice(INDUSTRIES)
+    return dict(
+        synthetic.PROFILE_INFO,
+        business_model=f"{rng.choice(['B2B', 'B2C', 'Hybrid'])} {industry} {synthetic.sentence(rng, 10)}",
+        industry=f"{industry} in {rng.choice(['Malaysia', 'Singapore', 'Indonesia', 'Thailand'])}",
+        products_services=synthetic.sentence(rng, 12),
+        differentiation=synthetic.sentence(rng, 10)
+    )
+
+
+def reworded(profile, rng):
+    """The same profile with a filler word inserted and the case changed, as a second SME might type it"""
+    variant = dict(profile)
+    words = variant["products_services"].split()
+    words.insert(rng.randrange(len(words)), rng.choice(FILLERS))
+    variant["products_services"] = " ".join(words).upper()
+    return variant
+
+
+def measure(cache, lookups):
+    timings, hits = [], 0
+    for profile in lookups:
+        start = time.perf_counter()
+        hits += cache.get("company_summary", profile) is not None
+        timings.append((time.perf_counter() - start) * 1000)
+    return hits, timings
+
+
+def fill(lsh_min_entries, profiles):
+    cache = SMEBoost.SemanticCache()
+    for i, profile in enumerate(profiles):
+        cache.set("company_summary", profile, f"summary {i}")
+    # Rebuild the indexes with the requested search strategy
+    for partition, index in list(cache._indexes.items()):
+        rebuilt = SMEBoost.SemanticIndex(lsh_min_entries=lsh_min_entries)
+        for vector, value in zip(index._vectors, index._values):
+            rebuilt.add(vector, value)
+        cache._indexes[partition] = rebuilt
+    return cache
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--profiles", type=int, default=5000)
+    parser.add_argument("--lookups", type=int, default=500)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    profiles = [base_profile(rng) for _ in range(args.profiles)]
+    near = [reworded(rng.choice(profiles), rng) for _ in range(args.lookups)]
+    unrelated = [base_profile(random.Random(10 ** 6 + i)) for i in range(args.lookups)]
+
+    for label, lsh_min_entries in (("brute force", args.profiles + 1), ("LSH", 0)):
+        cache = fill(lsh_min_entries, profiles)
+        near_hits, near_timings = measure(cache, near)
+        false_hits, unrelated_timings = measure(cache, unrelated)
+        timings = near_timings + unrelated_timings
+        print(f"{label:<12} near-duplicate hit rate {near_hits / len(near):6.1%}   "
+              f"unrelated hit rate {false_hits / len(unrelated):6.1%}   "
+              f"lookup median {statistics.median(timings):6.3f} ms   p95 {np.percentile(timings, 95):6.3f} ms   "
+              f"index {cache.stats()['memory_bytes'] / 2 ** 20:6.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
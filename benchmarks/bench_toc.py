@@ -0,0 +1,71 @@
+"""Measure what the page-accurate table of contents adds to a report build.
+
+The TOC is rendered after the other sections, from their page counts. This reports its render time
+against a full cold build, and the rebuild cost when an edited area shifts the later page numbers:
+
+    python benchmarks/bench_toc.py --iterations 20
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import SMEBoost  # noqa: E402
+import synthetic  # noqa: E402
+
+AREAS = ["Business Valuation", "Fund Raising", "Financial Healthcheck", "Succession Planning"]
+
+
+def build(area_analyses, texts):
+    start = time.perf_counter()
+    SMEBoost.generate_pdf(
+        texts['comprehensive'], synthetic.PROFILE_INFO, AREAS, texts['company'], synthetic.BUSINESS_PRIORITIES,
+        area_analyses=area_analyses
+    )
+    return (time.perf_counter() - start) * 1000
+
+
+def toc_render_time(iterations):
+    styles = SMEBoost.create_custom_styles()
+    timings = []
+    for i in range(iterations):
+        entries = [("Executive Summary", 4 + i, 0), ("Selected Business Areas", 6 + i, 0)]
+        entries += [(area, 6 + i + n, 1) for n, area in enumerate(AREAS)]
+        entries.append(("Comprehensive Analysis", 12 + i, 0))
+        start = time.perf_counter()
+        SMEBoost.render_pdf_section("table_of_contents", [entries], lambda: SMEBoost.create_dynamic_toc(styles, entries))
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=20)
+    args = parser.parse_args()
+
+    texts = {'company': synthetic.company_summary(), 'comprehensive': synthetic.comprehensive_summary()}
+    area_analyses = {SMEBoost.area_analysis_key(area): synthetic.area_analysis(i) for i, area in enumerate(AREAS)}
+
+    cold = []
+    for _ in range(args.iterations):
+        SMEBoost.get_pdf_section_cache.clear()
+        cold.append(build(area_analyses, texts))
+
+    # Alternate the first area between a short and a long analysis so every later page number moves
+    short, long = synthetic.area_analysis(0), synthetic.area_analysis(0) * 3
+    shifted = []
+    for i in range(args.iterations):
+        area_analyses[SMEBoost.area_analysis_key(AREAS[0])] = (long if i % 2 else short) + f"\n{i}"
+        shifted.append(build(area_analyses, texts))
+
+    toc = toc_render_time(args.iterations)
+    print(f"full cold build            median {statistics.median(cold):7.1f} ms")
+    print(f"TOC render                 median {statistics.median(toc):7.1f} ms")
+    print(f"edit shifting page numbers median {statistics.median(shifted):7.1f} ms (area + TOC re-rendered)")
+
+
+if __name__ == "__main__":
+    main()
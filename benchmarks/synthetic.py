@@ -0,0 +1,71 @@
+"""Synthetic SME inputs and LLM completions shaped like the app's real prompts, for offline benchmarks."""
+import random
+
+WORDS = (
+    "revenue growth market customers strategy cash flow margin pricing supply chain digital "
+    "team leadership investment capital partners expansion efficiency operations brand risk "
+    "compliance financing valuation productivity innovation regional export retention"
+).split()
+
+PROFILE_INFO = {
+    "revenue_range": "RM 1-5 Million",
+    "staff_strength": "11-50",
+    "customer_base": "Mixed",
+    "business_model": "B2B distribution of industrial components with recurring service contracts.",
+    "industry": "Manufacturing and industrial supplies in Malaysia and Southeast Asia.",
+    "products_services": "Precision parts, maintenance services and spare part subscriptions.",
+    "differentiation": "Fast local delivery, certified technicians and flexible payment terms."
+}
+
+BUSINESS_PRIORITIES = "Grow export revenue by 30%, secure a working capital line and hire a finance lead."
+
+
+def sentence(rng, words=14):
+    text = " ".join(rng.choice(WORDS) for _ in range(words))
+    return text[0].upper() + text[1:] + "."
+
+
+def paragraph(rng, sentences=5):
+    return " ".join(sentence(rng) for _ in range(sentences))
+
+
+def company_summary(words=1500, seed=0):
+    """A paragraph-style company summary of roughly the given length"""
+    rng = random.Random(seed)
+    paragraphs = []
+    while sum(len(p.split()) for p in paragraphs) < words:
+        paragraphs.append(paragraph(rng))
+    return "\n\n".join(paragraphs)
+
+
+def area_analysis(seed=0):
+    """A ~200 word business area analysis with headings and bullets"""
+    rng = random.Random(seed)
+    lines = []
+    for i in range(1, 6):
+        lines.append(f"### {i}. {sentence(rng, 4)}")
+        lines.append(sentence(rng))
+        lines.extend(f"- **{rng.choice(WORDS).title()}**: {sentence(rng, 8)}" for _ in range(2))
+    return "\n".join(lines)
+
+
+def comprehensive_summary(words=1500, seed=0):
+    """A comprehensive analysis following the layout requested by comprehensive_summary_prompt"""
+    rng = random.Random(seed)
+    lines = ["### 1. Synthesized Company Summary and Priorities", paragraph(rng, 8), ""]
+    lines.append("### 2. 5 Specific Reasons for Needing an Advisor/Coach")
+    lines.extend(f"{i}. **{sentence(rng, 3)}** {sentence(rng)}" for i in range(1, 6))
+    lines.append("")
+    lines.append("### 3. Detailed Advisor/Coach Solutions for Key Pain Points")
+    for i in range(1, 6):
+        lines.append(f"{i}. {sentence(rng, 4)}")
+        lines.extend(f"- {sentence(rng, 10)}" for _ in range(3))
+    lines.append("")
+    lines.append("### 4. Specific KPIs")
+    for period in ("Short Term (3 Months)", "Medium Term (3-6 Months)", "Long Term (6-12 Months)"):
+        lines.append(period)
+        lines.extend(f"• {sentence(rng, 10)}" for _ in range(4))
+    text = "\n".join(lines)
+    while len(text.split()) < words:
+        text += "\n\n" + paragraph(rng)
+    return text
@@ -0,0 +1,11 @@
+import os
+import sys
+
+# Answer any LLM request in process so no test reaches the OpenAI API
+os.environ.setdefault("SMEBOOST_LLM_BACKEND", "replay")
+os.environ.setdefault("SMEBOOST_REPLAY_LATENCY", "fixed:0")
+os.environ.setdefault("SMEBOOST_REPLAY_TOKENS_PER_SECOND", "1000000")
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# The benchmarks' synthetic profiles and completions double as test fixtures
+sys.path[:0] = [ROOT, os.path.join(ROOT, "benchmarks")]
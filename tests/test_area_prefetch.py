@@ -0,0 +1,39 @@
+from concurrent.futures import Future
+
+import pytest
+
+import SMEBoost
+
+
+def done_future(result):
+    future = Future()
+    future.set_result(result)
+    return future
+
+
+@pytest.fixture
+def prefetcher():
+    prefetcher = SMEBoost.AreaPrefetcher(workers=1)
+    yield prefetcher
+    prefetcher._executor.shutdown()
+
+
+def test_claim_returns_usable_selected_futures(prefetcher):
+    futures = {"Fund Raising": done_future("analysis"), "Business Valuation": done_future(""), "Succession Planning": Future()}
+    prefetch = SMEBoost.AreaPrefetch("raise capital", futures)
+    claimed = prefetcher.claim(prefetch, ["Fund Raising", "Business Valuation"])
+    assert claimed == {"Fund Raising": futures["Fund Raising"]}
+    assert futures["Succession Planning"].cancelled()
+    stats = prefetcher.stats()
+    assert (stats["used"], stats["cancelled"], stats["wasted"]) == (1, 1, 1)
+
+
+def test_write_off_does_not_count_as_a_submission(prefetcher):
+    prefetcher.claim(SMEBoost.AreaPrefetch("grow", {}), ["Succession Planning"])
+    pending = Future()
+    prefetcher.write_off(SMEBoost.AreaPrefetch("grow", {"Succession Planning": pending}))
+    prefetcher.write_off(SMEBoost.AreaPrefetch("grow", {}))
+    assert pending.cancelled()
+    # Every real submission so far selected Succession Planning, so it outranks a single keyword match
+    assert prefetcher.likely_areas("capital", 2) == ["Succession Planning", "Fund Raising"]
+    assert prefetcher._submissions == 1
@@ -0,0 +1,52 @@
+import threading
+import time
+
+import SMEBoost
+
+
+def test_concurrent_suggestions_cover_every_area_in_parallel(monkeypatch):
+    running = []
+    peak = []
+    lock = threading.Lock()
+
+    def fake_suggestions(business_info, suggestion_type, openai_api_key, profile_info=None):
+        with lock:
+            running.append(suggestion_type)
+            peak.append(len(running))
+        time.sleep(0.05)
+        with lock:
+            running.remove(suggestion_type)
+        return f"{suggestion_type} analysis"
+
+    monkeypatch.setattr(SMEBoost, "get_specific_suggestions", fake_suggestions)
+    areas = ["Fund Raising", "Business Valuation", "Succession Planning"]
+    results = dict(SMEBoost.get_specific_suggestions_concurrently("grow", areas, "key", max_workers=3))
+
+    assert results == {area: f"{area} analysis" for area in areas}
+    assert max(peak) > 1
+
+
+def test_concurrent_suggestions_respect_max_workers(monkeypatch):
+    running = []
+    peak = []
+    lock = threading.Lock()
+
+    def fake_suggestions(business_info, suggestion_type, openai_api_key, profile_info=None):
+        with lock:
+            running.append(suggestion_type)
+            peak.append(len(running))
+        time.sleep(0.02)
+        with lock:
+            running.remove(suggestion_type)
+        return suggestion_type
+
+    monkeypatch.setattr(SMEBoost, "get_specific_suggestions", fake_suggestions)
+    areas = list(SMEBoost.BUSINESS_OPTIONS)
+    results = dict(SMEBoost.get_specific_suggestions_concurrently("grow", areas, "key", max_workers=2))
+
+    assert sorted(results) == sorted(areas)
+    assert max(peak) <= 2
+
+
+def test_concurrent_suggestions_with_no_areas():
+    assert list(SMEBoost.get_specific_suggestions_concurrently("grow", [], "key")) == []
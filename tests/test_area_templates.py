@@ -0,0 +1,83 @@
+import pytest
+
+import SMEBoost
+import synthetic
+
+GENERIC = ("Fund Raising", SMEBoost.TEMPLATE_ANY, SMEBoost.TEMPLATE_ANY, SMEBoost.TEMPLATE_ANY)
+SPECIFIC = ("Fund Raising", synthetic.PROFILE_INFO["revenue_range"], synthetic.PROFILE_INFO["staff_strength"], "manufacturing")
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    store = SMEBoost.AreaTemplateStore(str(tmp_path / "templates.sqlite3"))
+    monkeypatch.setattr(SMEBoost, "get_area_template_store", lambda: store)
+    return store
+
+
+def test_store_round_trip(store):
+    assert store.get(GENERIC) is None
+    store.set(GENERIC, "generic guidance", "hash1")
+    store.set(GENERIC, "newer guidance", "hash2")
+    assert store.get(GENERIC) == "newer guidance"
+    assert store.request_hashes() == {GENERIC: "hash2"}
+
+
+def test_combinations_are_generic_unless_segments_are_requested():
+    assert SMEBoost.area_template_combinations(["Fund Raising"], ["retail"]) == [GENERIC]
+    combinations = SMEBoost.area_template_combinations(["Fund Raising"], ["retail"], segments=True)
+    assert combinations[0] == GENERIC
+    assert len(combinations) == 1 + len(SMEBoost.REVENUE_RANGES) * len(SMEBoost.STAFF_STRENGTHS)
+
+
+def test_find_prefers_the_profiles_own_template(store):
+    store.set(GENERIC, "generic guidance", "hash")
+    assert SMEBoost.find_area_template("Fund Raising", synthetic.PROFILE_INFO) == "generic guidance"
+    store.set(SPECIFIC, "manufacturing guidance", "hash")
+    assert SMEBoost.find_area_template("Fund Raising", synthetic.PROFILE_INFO) == "manufacturing guidance"
+    assert SMEBoost.find_area_template("Fund Raising") == "generic guidance"
+    assert SMEBoost.find_area_template("Succession Planning", synthetic.PROFILE_INFO) is None
+
+
+def test_warm_generates_only_missing_or_outdated_templates(store, monkeypatch):
+    prompts = []
+
+    def fake_response(prompt, system_content, api_key, response_format=None, task="default"):
+        prompts.append(prompt)
+        return "" if "Business Valuation" in prompt else f"template {len(prompts)}"
+
+    monkeypatch.setattr(SMEBoost, "get_openai_response", fake_response)
+    options, industries = ["Fund Raising", "Business Valuation"], ["retail"]
+    assert SMEBoost.warm_area_templates("key", options, industries, workers=2) == (1, 0, 1)
+    assert len(prompts) == 2
+
+    prompts.clear()
+    total = len(SMEBoost.area_template_combinations(options, industries, segments=True))
+    assert SMEBoost.warm_area_templates("key", options, industries, workers=2, segments=True) == (total // 2 - 1, 1, total // 2)
+    assert len(prompts) == total - 1
+
+    store.set(GENERIC, "stale template", "old hash")
+    prompts.clear()
+    SMEBoost.warm_area_templates("key", ["Fund Raising"], industries, workers=1)
+    assert prompts == [SMEBoost.area_template_prompt(*GENERIC)[0]]
+
+
+def test_template_mode_serves_the_template(store, monkeypatch):
+    store.set(GENERIC, "generic guidance", "hash")
+    monkeypatch.setattr(SMEBoost, "AREA_TEMPLATES", "template")
+    monkeypatch.setattr(SMEBoost, "get_openai_response", lambda *args, **kwargs: pytest.fail("unexpected LLM call"))
+    assert SMEBoost.get_specific_suggestions("grow", "Fund Raising", "key", synthetic.PROFILE_INFO) == "generic guidance"
+
+
+def test_personalize_mode_prefixes_the_template(store, monkeypatch):
+    store.set(GENERIC, "generic guidance", "hash")
+    monkeypatch.setattr(SMEBoost, "AREA_TEMPLATES", "personalize")
+    tasks = []
+
+    def fake_response(prompt, system_content, api_key, response_format=None, task="default"):
+        tasks.append(task)
+        return "For your export plans:"
+
+    monkeypatch.setattr(SMEBoost, "get_openai_response", fake_response)
+    analysis = SMEBoost.get_specific_suggestions("grow exports", "Fund Raising", "key", synthetic.PROFILE_INFO)
+    assert analysis == "For your export plans:\n\ngeneric guidance"
+    assert tasks == ["area_personalization"]
@@ -0,0 +1,106 @@
+import SMEBoost
+import synthetic
+
+ANALYSIS = """### 1. Synthesized Company Summary and Priorities
+A distributor of industrial parts aiming to grow exports.
+
+### 2. 5 Specific Reasons for Needing an Advisor/Coach
+1. **Working capital** is thin
+2) Collections are slow
+3 No finance lead
+A1 is not a numbered reason
+
+### 3. Detailed Advisor/Coach Solutions for Key Pain Points
+Financial Advisory
+- Secure a trade line
+* Tighten collections
+**Business Coaching**
+
+Short Term (3 Months)
+• Hire a finance lead
+* Close two export deals
+Medium-term goals
+- Open a Penang warehouse
+Long Term (6-12 Months)
+- Reach 30% export revenue"""
+
+
+def test_completion_tree_follows_paragraphs_and_lines():
+    tree = SMEBoost.parse_completion("# Title\nFirst line\n\n- point\n\n\n3 items")
+    assert [paragraph.text for paragraph in tree] == ["# Title\nFirst line", "- point", "\n3 items"]
+    assert [[block.kind for block in paragraph.blocks] for paragraph in tree] == [["heading", "paragraph"], ["bullet"], ["numbered"]]
+    heading, _ = tree[0].blocks
+    assert heading.text == "Title"
+    assert tree[2].blocks[0].item == "items"
+
+
+def test_line_kinds():
+    kinds = {line: SMEBoost.tokenize_line(line).kind for line in ("## Heading", "• dot", "- dash", "* star", "**Bold**", "1. one", "12 twelve", "Plain")}
+    assert kinds == {
+        "## Heading": "heading", "• dot": "bullet", "- dash": "bullet", "* star": "starred", "**Bold**": "starred",
+        "1. one": "numbered", "12 twelve": "numbered", "Plain": "paragraph",
+    }
+
+
+def test_section_markers():
+    markers = [SMEBoost.tokenize_line(line).marker for line in (
+        "### 1. Synthesized Company Summary", "5 Reasons for needing support", "Advisor/Coach Solutions",
+        "Short Term (3 Months)", "medium term: 3-6 months", "Long Term (6-12 Months)", "Long term goals", "Plain",
+    )]
+    assert markers == ["summary", "reasons", "solutions", "short", "medium", "long", None, None]
+
+
+def test_parse_content_sections():
+    sections = SMEBoost.parse_content_sections(ANALYSIS)
+    assert sections["summary"] == ["A distributor of industrial parts aiming to grow exports."]
+    assert sections["reasons"] == ["**Working capital** is thin", ") Collections are slow", "No finance lead", "A1 is not a numbered reason"]
+    # Starred lines, bold ones included, are points of the current category
+    assert sections["solutions"] == {"Financial Advisory": ["Secure a trade line", "* Tighten collections", "**Business Coaching**"]}
+    # "Medium-term" without a month is not a KPI heading, so its points stay with the short term
+    assert sections["kpis"] == {
+        "short": ["Hire a finance lead", "* Close two export deals", "Open a Penang warehouse"],
+        "medium": [],
+        "long": ["Reach 30% export revenue"],
+    }
+
+
+def test_business_area_section_styles():
+    styles = SMEBoost.create_custom_styles()
+    elements = SMEBoost.create_business_area_section("### 1. Plan\nFocus on **exports**\n- Hire a lead\n* Starred", styles)
+    paragraphs = [(e.style.name, e.text) for e in elements if hasattr(e, "style")]
+    assert paragraphs == [
+        (styles['subheading'].name, "1. Plan"),
+        (styles['content'].name, "Focus on exports"),
+        (styles['bullet'].name, "• Hire a lead"),
+        (styles['content'].name, "Starred"),
+    ]
+
+
+def test_executive_summary_indents_the_first_paragraph():
+    styles = SMEBoost.create_custom_styles()
+    elements = SMEBoost.create_executive_summary_section(synthetic.company_summary(words=200), styles)
+    paragraphs = [e for e in elements if hasattr(e, "style")]
+    assert paragraphs[0].style is styles['indented_content']
+    assert all(p.style is styles['content'] for p in paragraphs[1:])
+
+
+def test_process_section_content_starts_main_sections():
+    styles = SMEBoost.create_custom_styles()
+    elements = []
+    SMEBoost.process_section_content("## Market Analysis\nDemand is *growing*\n• One • Two", styles, elements)
+    texts = [e.text for e in elements if hasattr(e, "text")]
+    assert texts == ["Market Analysis", "Demand is growing", "• One", "• Two"]
+
+
+def test_each_build_gets_its_own_styles():
+    styles = SMEBoost.create_custom_styles()
+    styles['content'].fontSize = 30
+    assert SMEBoost.create_custom_styles()['content'].fontSize != 30
+    section_styles = SMEBoost.get_section_styles()
+    section_styles['body'].leading = 40
+    assert SMEBoost.get_section_styles()['body'].leading == 16
+
+
+def test_clean_text():
+    assert SMEBoost.clean_text("### **Bold**  `code`  snake_case...") == "Bold code snake case."
+    assert SMEBoost.clean_text(None) == ""
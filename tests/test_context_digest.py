@@ -0,0 +1,50 @@
+import SMEBoost
+import synthetic
+
+SUMMARY = (
+    "The company distributes industrial parts to 120 manufacturers across Malaysia. "
+    "Its main strength is fast local delivery backed by certified technicians. "
+    "A key threat is price competition from regional importers with larger stock. "
+    "Revenue grew 18% last year while gross margin held at 32% of sales. "
+    "Cash flow is tight because customers pay on 90 day terms. "
+    "The founder plans to open a second warehouse in Penang next year."
+)
+
+
+def test_extractive_digest_groups_sentences_by_section():
+    digest = SMEBoost.extractive_digest(SUMMARY)
+    lines = digest.splitlines()
+    assert lines[0] == "Key facts:"
+    assert "SWOT:" in lines
+    assert "Financial notes:" in lines
+    assert "- Revenue grew 18% last year while gross margin held at 32% of sales." in lines
+    assert lines.index("- A key threat is price competition from regional importers with larger stock.") > lines.index("SWOT:")
+
+
+def test_extractive_digest_keeps_to_the_word_budget():
+    summary = synthetic.company_summary(words=1500)
+    digest = SMEBoost.extractive_digest(summary, max_words=150)
+    assert len(digest.split()) < 250
+    assert len(digest.split()) < len(summary.split()) / 4
+
+
+def test_text_without_sentences_is_returned_unchanged():
+    assert SMEBoost.extractive_digest("Too short.") == "Too short."
+
+
+def test_extractive_digests_are_cached_in_memory():
+    SMEBoost.extractive_digest.cache_clear()
+    first = SMEBoost.compress_company_summary(SUMMARY, None, "extractive")
+    second = SMEBoost.compress_company_summary(SUMMARY, None, "extractive")
+    assert first == second
+    assert SMEBoost.extractive_digest.cache_info().hits == 1
+
+
+def test_compression_off_passes_the_summary_through():
+    assert SMEBoost.compress_company_summary(SUMMARY, None, "off") == SUMMARY
+    assert SMEBoost.compress_company_summary("", None, "extractive") == ""
+
+
+def test_model_digest_falls_back_to_the_summary(monkeypatch):
+    monkeypatch.setattr(SMEBoost, "get_openai_response", lambda *args, **kwargs: None)
+    assert SMEBoost.compress_company_summary(SUMMARY, "key", "model") == SUMMARY
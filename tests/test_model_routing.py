@@ -0,0 +1,86 @@
+import httpx
+import pytest
+
+import SMEBoost
+
+
+@pytest.fixture
+def routed(monkeypatch):
+    """Route the "test" task to a primary and a backup model, the primary always unavailable"""
+    cache = SMEBoost.MemoryResponseCache()
+    monkeypatch.setattr(SMEBoost, "get_response_cache", lambda: cache)
+    monkeypatch.setitem(SMEBoost.TASK_MODELS, "test", ("primary", "backup"))
+    calls = []
+    call_openai = SMEBoost.call_openai_with_retries
+
+    def fake_call(api_key, messages, stream=False, response_format=None, max_tokens=None, model=SMEBoost.OPENAI_MODEL, max_retries=0):
+        calls.append(model)
+        if model == "primary":
+            raise SMEBoost.APIConnectionError(request=httpx.Request("POST", "https://api.openai.com/v1/chat/completions"))
+        return call_openai(api_key, messages, stream, response_format, max_tokens, model, max_retries=max_retries)
+
+    monkeypatch.setattr(SMEBoost, "call_openai_with_retries", fake_call)
+    return cache, calls
+
+
+def test_requests_fall_back_to_the_next_model(routed):
+    _, calls = routed
+    _, _, served_model = SMEBoost.call_routed_openai("key", [{"role": "user", "content": "hello"}], "test")
+    assert served_model == "backup"
+    assert calls == ["primary", "backup"]
+
+
+def test_fallback_completions_are_cached_under_the_serving_model(routed):
+    cache, calls = routed
+    content = SMEBoost.get_openai_response("prompt", "system", "key", task="test")
+    assert content
+    assert cache.get(SMEBoost.response_cache_key("backup", "system", "prompt")) == content
+    assert cache.get(SMEBoost.response_cache_key("primary", "system", "prompt")) is None
+
+    assert SMEBoost.get_openai_response("prompt", "system", "key", task="test") == content
+    assert calls == ["primary", "backup"]
+
+
+def test_streamed_fallback_completions_are_cached(routed):
+    _, calls = routed
+    content = "".join(SMEBoost.stream_openai_response("prompt", "system", "key", task="test"))
+    assert content
+    assert "".join(SMEBoost.stream_openai_response("prompt", "system", "key", task="test")) == content
+    assert calls == ["primary", "backup"]
+
+
+def test_lookup_prefers_the_primary_model(routed):
+    cache, _ = routed
+    assert SMEBoost.lookup_routed_response("test", "system", "prompt") == (None, None)
+    cache.set(SMEBoost.response_cache_key("backup", "system", "prompt"), "from backup")
+    assert SMEBoost.lookup_routed_response("test", "system", "prompt") == ("backup", "from backup")
+    cache.set(SMEBoost.response_cache_key("primary", "system", "prompt"), "from primary")
+    assert SMEBoost.lookup_routed_response("test", "system", "prompt") == ("primary", "from primary")
+
+
+class RecordingMetrics:
+    def __init__(self):
+        self.records = []
+
+    def record(self, task, model, cache, status, *args, **kwargs):
+        self.records.append((model, status))
+
+    def record_fallback(self, *args):
+        pass
+
+
+@pytest.mark.parametrize("stream", [False, True])
+def test_errors_are_recorded_against_the_last_model_tried(routed, monkeypatch, stream):
+    metrics = RecordingMetrics()
+    monkeypatch.setattr(SMEBoost, "get_llm_metrics", lambda: metrics)
+    monkeypatch.setattr(SMEBoost, "report_error", lambda message: None)
+
+    def unavailable(api_key, messages, stream=False, response_format=None, max_tokens=None, model=None, max_retries=0):
+        raise SMEBoost.APIConnectionError(request=httpx.Request("POST", "https://api.openai.com/v1/chat/completions"))
+
+    monkeypatch.setattr(SMEBoost, "call_openai_with_retries", unavailable)
+    if stream:
+        assert list(SMEBoost.stream_openai_response("prompt", "system", "key", task="test")) == []
+    else:
+        assert SMEBoost.get_openai_response("prompt", "system", "key", task="test") is None
+    assert metrics.records == [("backup", "error")]
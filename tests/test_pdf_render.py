@@ -0,0 +1,54 @@
+import time
+
+import pytest
+
+import SMEBoost
+
+
+def slow_render(job, path=None, timeout=None):
+    # Stands in for render_pdf_job in the worker processes, honouring the same deadline; the job's company
+    # summary is the number of seconds rendering takes
+    with SMEBoost.render_deadline(timeout):
+        time.sleep(float(job.get('company_summary') or 0))
+    return b"%PDF-rendered"
+
+
+@pytest.fixture
+def service():
+    service = SMEBoost.PdfRenderService(workers=1, queue_size=1, timeout=1)
+    service._render = slow_render
+    # Start the worker before timing anything, spawning it imports the whole app
+    assert service.render({}) == b"%PDF-rendered"
+    yield service
+    service._executor.shutdown(wait=True, cancel_futures=True)
+
+
+def test_render_deadline_interrupts_the_block():
+    start = time.monotonic()
+    with pytest.raises(TimeoutError):
+        with SMEBoost.render_deadline(0.1):
+            time.sleep(5)
+    assert time.monotonic() - start < 1
+
+
+def test_render_past_the_deadline_frees_its_slot(service):
+    executor = service._executor
+    start = time.monotonic()
+    with pytest.raises(TimeoutError):
+        service.render({'company_summary': 30})
+    assert time.monotonic() - start < service.timeout + 5
+    # The worker gave up by itself, so the pool is kept and the single queue slot is free for the next job
+    assert service._executor is executor
+    assert service.render({}) == b"%PDF-rendered"
+
+
+def test_report_render_past_the_deadline_returns_the_error_pdf(service, monkeypatch):
+    monkeypatch.setattr(SMEBoost, "PDF_RENDER_WORKERS", 1)
+    monkeypatch.setattr(SMEBoost, "get_pdf_render_service", lambda: service)
+    monkeypatch.setattr(SMEBoost, "report_error", lambda message: None)
+
+    sink = SMEBoost.render_report_pdf(None, {}, [], 30, None, {}, sink=SMEBoost.SpooledPdfSink())
+    assert "longer than 1s" in sink.error
+    assert sink.read().startswith(b"%PDF")
+    assert service._slots.acquire(blocking=False)
+    service._slots.release()
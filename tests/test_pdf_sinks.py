@@ -0,0 +1,66 @@
+import os
+import time
+
+import pytest
+
+import SMEBoost
+
+
+def test_pdf_sink_is_abstract():
+    with pytest.raises(TypeError):
+        SMEBoost.PdfSink()
+
+
+@pytest.mark.parametrize("max_size", [1024, 4])
+def test_spooled_sink_replaces_content(max_size):
+    sink = SMEBoost.SpooledPdfSink(max_size=max_size)
+    with sink.writer() as f:
+        f.write(b"first report")
+    with sink.writer() as f:
+        f.write(b"second")
+    assert sink.read() == b"second"
+    assert sink.path is None
+
+
+def test_file_sink_leaves_no_partial_file_on_failure(tmp_path):
+    sink = SMEBoost.FilePdfSink(str(tmp_path / "report.pdf"))
+    with sink.writer() as f:
+        f.write(b"complete")
+    with pytest.raises(RuntimeError):
+        with sink.writer() as f:
+            f.write(b"partial")
+            raise RuntimeError("render failed")
+    assert sink.read() == b"complete"
+    assert os.listdir(tmp_path) == ["report.pdf"]
+
+
+def test_object_store_sink_lays_out_keys_by_prefix(tmp_path):
+    sink = SMEBoost.ObjectStorePdfSink(str(tmp_path), "abcdef")
+    assert sink.path == str(tmp_path / "ab" / "abcdef.pdf")
+
+
+def test_output_directory_sweeps_expired_objects(tmp_path):
+    directory = SMEBoost.PdfOutputDirectory(str(tmp_path), retention_hours=1, gc_interval=60 * 60)
+    old, new = directory.sink("aa01"), directory.sink("bb02")
+    for sink in (old, new):
+        with sink.writer() as f:
+            f.write(b"pdf")
+    expired = time.time() - 2 * 60 * 60
+    os.utime(old.path, (expired, expired))
+
+    # The sweep ran when the first sink was created and is not due again yet
+    directory.sink("cc03")
+    assert os.path.exists(old.path)
+
+    assert directory.gc() == 1
+    assert not os.path.exists(old.path)
+    assert new.read() == b"pdf"
+
+
+def test_create_pdf_sink_follows_output_setting(tmp_path, monkeypatch):
+    assert isinstance(SMEBoost.create_pdf_sink(), SMEBoost.SpooledPdfSink)
+    monkeypatch.setattr(SMEBoost, "PDF_OUTPUT_SINK", "directory")
+    monkeypatch.setattr(SMEBoost, "get_pdf_output_directory", lambda: SMEBoost.PdfOutputDirectory(str(tmp_path)))
+    sink = SMEBoost.create_pdf_sink("abc123")
+    assert isinstance(sink, SMEBoost.ObjectStorePdfSink)
+    assert sink.key == "abc123"
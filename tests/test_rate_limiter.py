@@ -0,0 +1,112 @@
+import threading
+import time
+
+import httpx
+import pytest
+
+import SMEBoost
+
+
+def test_acquire_takes_a_request_and_tokens():
+    limiter = SMEBoost.RateLimiter(requests_per_minute=60, tokens_per_minute=1000)
+    limiter.acquire(100)
+    assert limiter.available_requests < 60
+    assert 899 <= limiter.available_tokens < 901
+
+
+def test_acquire_waits_for_the_bucket_to_refill():
+    # One request per 0.1 seconds
+    limiter = SMEBoost.RateLimiter(requests_per_minute=600, tokens_per_minute=100000)
+    limiter.available_requests = 0
+    start = time.monotonic()
+    limiter.acquire(1)
+    assert time.monotonic() - start >= 0.05
+
+
+def test_requests_larger_than_the_bucket_are_capped():
+    limiter = SMEBoost.RateLimiter(requests_per_minute=60, tokens_per_minute=1000)
+    limiter.acquire(5000)
+    assert limiter.available_tokens < 1
+
+
+def test_waiters_are_served_in_priority_order():
+    limiter = SMEBoost.RateLimiter(requests_per_minute=600, tokens_per_minute=100000)
+    limiter.available_requests = 0
+    served = []
+
+    def acquire(priority, name):
+        limiter.acquire(1, priority)
+        served.append(name)
+
+    threads = [threading.Thread(target=acquire, args=(SMEBoost.PRIORITY_PREFETCH, "prefetch"))]
+    threads[0].start()
+    time.sleep(0.02)
+    threads.append(threading.Thread(target=acquire, args=(SMEBoost.PRIORITY_INTERACTIVE, "interactive")))
+    threads[1].start()
+    for thread in threads:
+        thread.join(5)
+    assert served == ["interactive", "prefetch"]
+
+
+def test_release_tokens_returns_unused_estimate():
+    limiter = SMEBoost.RateLimiter(requests_per_minute=60, tokens_per_minute=1000)
+    limiter.acquire(500)
+    limiter.release_tokens(500, 200)
+    assert 799 <= limiter.available_tokens <= 801
+
+
+def test_update_from_headers_adopts_server_limits():
+    limiter = SMEBoost.RateLimiter(requests_per_minute=60, tokens_per_minute=1000)
+    limiter.update_from_headers({
+        "x-ratelimit-limit-requests": "30",
+        "x-ratelimit-limit-tokens": "500",
+        "x-ratelimit-remaining-requests": "3",
+        "x-ratelimit-remaining-tokens": "40",
+    })
+    assert limiter.request_capacity == 30
+    assert limiter.token_capacity == 500
+    assert limiter.available_requests == 3
+    assert limiter.available_tokens == 40
+
+
+def test_pause_holds_back_callers():
+    limiter = SMEBoost.RateLimiter(requests_per_minute=60, tokens_per_minute=1000)
+    limiter.pause(0.1)
+    start = time.monotonic()
+    limiter.acquire(1)
+    assert time.monotonic() - start >= 0.09
+
+
+def test_parse_reset_duration():
+    assert SMEBoost.parse_reset_duration("1s") == 1
+    assert SMEBoost.parse_reset_duration("20ms") == 0.02
+    assert SMEBoost.parse_reset_duration("6m0s") == 360
+    assert SMEBoost.parse_reset_duration(None) == 0
+
+
+def test_retry_delay_honours_retry_after():
+    request = httpx.Request("POST", "https://api.openai.com/v1/chat/completions")
+    response = httpx.Response(429, headers={"retry-after": "7"}, request=request)
+    error = SMEBoost.RateLimitError("rate limited", response=response, body=None)
+    assert SMEBoost.retry_delay(0, error) >= 7
+    assert 0 <= SMEBoost.retry_delay(0) <= SMEBoost.OPENAI_RETRY_BASE_DELAY
+
+
+def test_retries_release_the_failed_attempts_tokens(monkeypatch):
+    limiter = SMEBoost.RateLimiter(requests_per_minute=600, tokens_per_minute=10000)
+    monkeypatch.setattr(SMEBoost, "get_rate_limiter", lambda: limiter)
+    monkeypatch.setattr(SMEBoost, "retry_delay", lambda attempt, error=None: 0)
+
+    class FailingClient:
+        def __init__(self):
+            self.chat = self.completions = self.with_raw_response = self
+
+        def create(self, **kwargs):
+            raise SMEBoost.APIConnectionError(request=httpx.Request("POST", "https://api.openai.com/v1/chat/completions"))
+
+    monkeypatch.setattr(SMEBoost, "get_openai_client", lambda api_key: FailingClient())
+    messages = [{"role": "user", "content": "hello"}]
+    with pytest.raises(SMEBoost.APIConnectionError):
+        SMEBoost.call_openai_with_retries("key", messages, max_tokens=1000, max_retries=3)
+    # Four attempts of ~1000 tokens each would have drained 40% of the bucket without the releases
+    assert limiter.available_tokens > 9900
@@ -0,0 +1,59 @@
+import asyncio
+from concurrent.futures import Future
+
+import pytest
+
+import SMEBoost
+import synthetic
+
+
+@pytest.fixture
+def service():
+    service = SMEBoost.SMEBoostService(workers=4)
+    yield service
+    service._executor.shutdown()
+
+
+def test_failed_prefetch_is_requested_again(service, monkeypatch):
+    calls = []
+
+    def fake_suggestions(business_info, suggestion_type, openai_api_key, profile_info=None):
+        calls.append(suggestion_type)
+        return f"{suggestion_type} analysis"
+
+    monkeypatch.setattr(SMEBoost, "get_specific_suggestions", fake_suggestions)
+    failed, ready = Future(), Future()
+    failed.set_exception(RuntimeError("prefetch failed"))
+    ready.set_result("Prefetched analysis")
+    request = SMEBoost.AreaAnalysisRequest(
+        "priorities", ["Fund Raising", "Business Valuation", "Succession Planning"], "key",
+        prefetched={"Fund Raising": failed, "Business Valuation": ready}
+    )
+
+    async def analyse():
+        return {result.area: result.analysis async for result in service.analyse_areas(request)}
+
+    assert asyncio.run(analyse()) == {
+        "Fund Raising": "Fund Raising analysis",
+        "Business Valuation": "Prefetched analysis",
+        "Succession Planning": "Succession Planning analysis",
+    }
+    assert sorted(calls) == ["Fund Raising", "Succession Planning"]
+
+
+def test_strict_generate_report_stops_at_the_first_failed_step(service, monkeypatch):
+    monkeypatch.setattr(SMEBoost, "get_report_store", lambda: None)
+    monkeypatch.setattr(SMEBoost, "business_priority", lambda business_priorities, openai_api_key: "suggestions")
+
+    def failed_suggestions(business_info, suggestion_type, openai_api_key, profile_info=None):
+        SMEBoost.report_error("rate limited")
+        return None
+
+    monkeypatch.setattr(SMEBoost, "get_specific_suggestions", failed_suggestions)
+    monkeypatch.setattr(SMEBoost, "ProfileAnalysisPipeline", lambda *args: pytest.fail("analysis after a failed step"))
+    job = SMEBoost.ReportJob()
+    request = SMEBoost.ReportRequest(synthetic.PROFILE_INFO, "priorities", ["Fund Raising"], "key")
+
+    with pytest.raises(RuntimeError, match="Analysis for Fund Raising failed; rate limited"):
+        asyncio.run(service.generate_report(request, job=job, strict=True))
+    assert job.stage == "Analysing business areas"
@@ -0,0 +1,90 @@
+import os
+import time
+
+import pytest
+
+import SMEBoost
+import synthetic
+
+TEXTS = {"company_summary": "Summary", "comprehensive_summary": "Analysis"}
+
+
+@pytest.fixture
+def store(tmp_path):
+    return SMEBoost.ReportStore(str(tmp_path), retention_days=1, gc_interval=60 * 60)
+
+
+def blob_count(store):
+    blobs = os.path.join(store.directory, "blobs")
+    return sum(len(os.listdir(os.path.join(blobs, prefix))) for prefix in os.listdir(blobs))
+
+
+def test_put_and_get_round_trip(store):
+    store.put("key", "owner", "Fund Raising", TEXTS, b"%PDF report")
+    report = store.get("key")
+    assert report.title == "Fund Raising"
+    assert report.texts == TEXTS
+    assert report.pdf.read() == b"%PDF report"
+    assert store.get("missing") is None
+
+
+def test_identical_blobs_are_stored_once(store):
+    store.put("a", "owner", "Fund Raising", TEXTS, b"%PDF report")
+    store.put("b", "owner", "Fund Raising", TEXTS, b"%PDF report")
+    assert blob_count(store) == 2
+
+
+def test_history_lists_an_owners_reports_newest_first(store):
+    store.put("a", "owner", "First", TEXTS, b"a")
+    store.put("b", "owner", "Second", TEXTS, b"b")
+    store.put("c", "someone else", "Third", TEXTS, b"c")
+    assert [report.title for report in store.history("owner")] == ["Second", "First"]
+    assert [report.title for report in store.history("owner", limit=1)] == ["Second"]
+
+    store.get("c", "owner")
+    assert [report.input_key for report in store.history("owner")][0] == "c"
+
+
+def test_report_with_missing_blob_is_dropped(store):
+    report = store.put("key", "owner", "Fund Raising", TEXTS, b"%PDF report")
+    os.remove(report.pdf.path)
+    assert store.get("key") is None
+    assert store.history("owner") == []
+
+
+def test_gc_removes_reports_not_opened_within_retention(store, monkeypatch):
+    store.put("old", "owner", "Old", TEXTS, b"old pdf")
+    store.put("new", "owner", "New", TEXTS, b"new pdf")
+    now = time.time()
+    store._conn.execute("UPDATE reports SET accessed = ? WHERE input_key = 'old'", (now - 2 * 24 * 60 * 60,))
+    store._conn.commit()
+    monkeypatch.setattr(store, "BLOB_GRACE_PERIOD", -1)
+
+    assert store.gc() == 1
+    assert store.get("old") is None
+    assert store.get("new").pdf.read() == b"new pdf"
+    # The new report's PDF and texts blobs are kept, the old report's PDF blob is removed
+    assert blob_count(store) == 2
+
+
+def test_report_input_key_ignores_area_order_and_extra_fields():
+    key = SMEBoost.report_input_key(synthetic.PROFILE_INFO, "grow", ["Fund Raising", "Business Valuation"])
+    assert key == SMEBoost.report_input_key(
+        dict(synthetic.PROFILE_INFO, unused="x"), "grow", ["Business Valuation", "Fund Raising"]
+    )
+    assert key != SMEBoost.report_input_key(synthetic.PROFILE_INFO, "shrink", ["Fund Raising", "Business Valuation"])
+
+
+def test_store_report_skips_failed_pdfs(store, monkeypatch):
+    monkeypatch.setattr(SMEBoost, "get_report_store", lambda: store)
+    sink = SMEBoost.SpooledPdfSink()
+    with sink.writer() as f:
+        f.write(b"%PDF report")
+    sink.error = "PDF rendering failed"
+    assert SMEBoost.store_report(synthetic.PROFILE_INFO, "grow", ["Fund Raising"], "key", TEXTS, sink) is sink
+    assert SMEBoost.find_stored_report(synthetic.PROFILE_INFO, "grow", ["Fund Raising"], "key") is None
+
+    sink.error = None
+    stored = SMEBoost.store_report(synthetic.PROFILE_INFO, "grow", ["Fund Raising"], "key", TEXTS, sink)
+    assert stored.read() == b"%PDF report"
+    assert SMEBoost.find_stored_report(synthetic.PROFILE_INFO, "grow", ["Fund Raising"], "key").texts == TEXTS
@@ -0,0 +1,71 @@
+import os
+
+import pytest
+
+import SMEBoost
+
+
+@pytest.fixture(params=["memory", "sqlite", "disk"])
+def make_cache(request, tmp_path):
+    def make(**kwargs):
+        if request.param == "sqlite":
+            return SMEBoost.SQLiteResponseCache(str(tmp_path / "cache.sqlite3"), **kwargs)
+        if request.param == "disk":
+            return SMEBoost.DiskResponseCache(str(tmp_path / "cache"), **kwargs)
+        return SMEBoost.MemoryResponseCache(**kwargs)
+    return make
+
+
+def test_round_trip_and_counters(make_cache):
+    cache = make_cache()
+    assert cache.get("a") is None
+    cache.set("a", "answer")
+    assert cache.get("a") == "answer"
+    assert cache.stats() == {"hits": 1, "misses": 1}
+
+
+def test_expired_entries_are_misses(make_cache, monkeypatch):
+    cache = make_cache(ttl=10)
+    now = [1000.0]
+    monkeypatch.setattr(SMEBoost.time, "time", lambda: now[0])
+    cache.set("a", "answer")
+    now[0] += 5
+    assert cache.get("a") == "answer"
+    now[0] += 10
+    assert cache.get("a") is None
+
+
+def test_least_recently_used_entry_is_evicted(make_cache, monkeypatch):
+    cache = make_cache(max_entries=2)
+    now = [1000.0]
+    monkeypatch.setattr(SMEBoost.time, "time", lambda: now[0])
+    cache.set("a", "1")
+    now[0] += 1
+    cache.set("b", "2")
+    now[0] += 1
+    if isinstance(cache, SMEBoost.DiskResponseCache):
+        # Disk entries age by file modification time
+        os.utime(cache._path("a"), (now[0] - 2, now[0] - 2))
+        os.utime(cache._path("b"), (now[0] - 1, now[0] - 1))
+    assert cache.get("a") == "1"
+    now[0] += 1
+    cache.set("c", "3")
+    assert cache.get("b") is None
+    assert cache.get("a") == "1"
+    assert cache.get("c") == "3"
+
+
+def test_none_backend_never_hits():
+    cache = SMEBoost.ResponseCache()
+    cache.set("a", "answer")
+    assert cache.get("a") is None
+
+
+def test_cache_key_depends_on_every_input():
+    key = SMEBoost.response_cache_key("model", "system", "prompt")
+    assert key == SMEBoost.response_cache_key("model", "system", "prompt")
+    assert key != SMEBoost.response_cache_key("other", "system", "prompt")
+    assert key != SMEBoost.response_cache_key("model", "other", "prompt")
+    assert key != SMEBoost.response_cache_key("model", "system", "other")
+    assert key != SMEBoost.response_cache_key("model", "system", "prompt", max_tokens=100)
+    assert key == SMEBoost.response_cache_key("model", "system", "prompt", max_tokens=None)
@@ -0,0 +1,109 @@
+import numpy as np
+
+import SMEBoost
+import synthetic
+
+
+def random_vectors(count, dimensions=64, seed=0):
+    vectors = np.random.default_rng(seed).standard_normal((count, dimensions)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def test_embed_text_is_normalised_and_ignores_case():
+    vector = SMEBoost.embed_text("Precision parts and Maintenance services")
+    assert abs(float(np.linalg.norm(vector)) - 1) < 1e-5
+    assert np.array_equal(vector, SMEBoost.embed_text("precision parts and maintenance services"))
+    assert not SMEBoost.embed_text("the and").any()
+
+
+def test_similar_texts_embed_closer_than_unrelated_ones():
+    base = SMEBoost.embed_text("B2B distribution of industrial components with recurring service contracts")
+    similar = SMEBoost.embed_text("B2B distribution of industrial components with service contracts")
+    unrelated = SMEBoost.embed_text("Boutique bakery selling wedding cakes and pastries")
+    assert float(base @ similar) > float(base @ unrelated)
+
+
+def test_index_brute_force_search_finds_the_nearest_entry():
+    index = SMEBoost.SemanticIndex(dimensions=64, lsh_min_entries=1000)
+    vectors = random_vectors(50)
+    for i, vector in enumerate(vectors):
+        index.add(vector, i)
+    similarity, value = index.search(vectors[17])
+    assert value == 17
+    assert abs(similarity - 1) < 1e-5
+    assert SMEBoost.SemanticIndex(dimensions=64).search(vectors[0]) is None
+
+
+def test_index_lsh_search_finds_exact_matches():
+    index = SMEBoost.SemanticIndex(dimensions=64, lsh_min_entries=10)
+    vectors = random_vectors(200)
+    for i, vector in enumerate(vectors):
+        index.add(vector, i)
+    assert index._buckets is not None
+    assert all(index.search(vectors[i])[1] == i for i in (0, 9, 10, 199))
+
+
+def test_full_index_overwrites_the_oldest_entries():
+    index = SMEBoost.SemanticIndex(dimensions=64, max_entries=3, lsh_min_entries=2)
+    vectors = random_vectors(5)
+    for i, vector in enumerate(vectors):
+        index.add(vector, i)
+    assert len(index) == 3
+    assert sorted(index._values) == [2, 3, 4]
+    assert index.search(vectors[4])[1] == 4
+
+
+def test_cache_serves_near_identical_profiles_only():
+    cache = SMEBoost.SemanticCache(threshold=0.9)
+    cache.set("company_summary", synthetic.PROFILE_INFO, "cached summary")
+
+    near = dict(synthetic.PROFILE_INFO, differentiation=synthetic.PROFILE_INFO["differentiation"] + " Always")
+    value, similarity = cache.get("company_summary", near)
+    assert value == "cached summary"
+    assert similarity >= 0.9
+
+    other = dict(synthetic.PROFILE_INFO, business_model="Retail bakery", industry="Food", products_services="Cakes",
+                 differentiation="Family recipes")
+    assert cache.get("company_summary", other) is None
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_cache_partitions_by_namespace_and_radio_choices():
+    cache = SMEBoost.SemanticCache(threshold=0.9)
+    cache.set("company_summary", synthetic.PROFILE_INFO, "cached summary")
+    assert cache.get("comprehensive_summary", synthetic.PROFILE_INFO) is None
+    assert cache.get("company_summary", dict(synthetic.PROFILE_INFO, staff_strength="51-200")) is None
+
+
+def test_cache_matches_on_extra_text():
+    cache = SMEBoost.SemanticCache(threshold=0.95)
+    cache.set("comprehensive_summary", synthetic.PROFILE_INFO, "analysis", "Grow export revenue by 30%")
+    assert cache.get("comprehensive_summary", synthetic.PROFILE_INFO, "Grow export revenue by 30%")[0] == "analysis"
+    assert cache.get("comprehensive_summary", synthetic.PROFILE_INFO, "Sell the business to a competitor") is None
+
+
+def test_draft_match_is_shown_but_never_used_as_context(monkeypatch):
+    cache = SMEBoost.SemanticCache(threshold=0.9)
+    cache.set("company_summary", synthetic.PROFILE_INFO, "Another company's summary")
+    monkeypatch.setattr(SMEBoost, "SEMANTIC_CACHE", "draft")
+    monkeypatch.setattr(SMEBoost, "get_semantic_cache", lambda: cache)
+
+    prompts = []
+
+    def fake_stream(prompt, system_content, api_key, response_format=None, task="default"):
+        prompts.append((task, prompt))
+        yield "Fresh summary" if task == "company_summary" else "Fresh analysis"
+
+    monkeypatch.setattr(SMEBoost, "stream_openai_response", fake_stream)
+    monkeypatch.setattr(SMEBoost, "compress_company_summary", lambda company_summary, openai_api_key: company_summary)
+
+    pipeline = SMEBoost.ProfileAnalysisPipeline(synthetic.PROFILE_INFO, "suggestions", "key", mode="overlap")
+    assert pipeline.company_summary_draft() == "Another company's summary"
+    assert "".join(pipeline.company_summary_chunks()) == "Fresh summary"
+    assert "".join(pipeline.comprehensive_summary_chunks()) == "Fresh analysis"
+
+    comprehensive_prompt = next(prompt for task, prompt in prompts if task == "comprehensive_summary")
+    assert "Fresh summary" in comprehensive_prompt
+    assert "Another company" not in comprehensive_prompt
+    assert pipeline.company_summary == "Fresh summary"
@@ -0,0 +1,56 @@
+import json
+
+import pytest
+
+import SMEBoost
+
+ANALYSIS = {
+    "summary": "A B2B distributor aiming to grow exports.",
+    "reasons": ["Thin working capital", " ", "No finance lead"],
+    "solutions": [
+        {"category": "Financial Advisory", "points": ["Secure a trade line", "Tighten collections"]},
+        {"category": "Business Coaching", "points": []},
+    ],
+    "kpis": {"short": ["Hire a finance lead"], "medium": ["Open two export markets"], "long": ["30% export revenue"]},
+}
+
+
+def test_parse_structured_analysis_returns_parser_layout():
+    sections = SMEBoost.parse_structured_analysis(json.dumps(ANALYSIS))
+    assert sections == {
+        "summary": ["A B2B distributor aiming to grow exports."],
+        "reasons": ["Thin working capital", "No finance lead"],
+        "solutions": {"Financial Advisory": ["Secure a trade line", "Tighten collections"], "Business Coaching": []},
+        "kpis": {"short": ["Hire a finance lead"], "medium": ["Open two export markets"], "long": ["30% export revenue"]},
+    }
+
+
+@pytest.mark.parametrize("change", [
+    {"summary": None},
+    {"reasons": "one reason"},
+    {"solutions": [{"points": ["no category"]}]},
+    {"kpis": ["short"]},
+])
+def test_parse_structured_analysis_rejects_wrong_types(change):
+    with pytest.raises(ValueError):
+        SMEBoost.parse_structured_analysis(json.dumps({**ANALYSIS, **change}))
+
+
+def test_parse_structured_analysis_rejects_missing_fields():
+    data = dict(ANALYSIS)
+    del data["kpis"]
+    with pytest.raises(ValueError, match="kpis"):
+        SMEBoost.parse_structured_analysis(json.dumps(data))
+
+
+def test_analysis_sections_falls_back_to_text_parsing():
+    text = "{ not json"
+    assert SMEBoost.analysis_sections(text) == SMEBoost.parse_content_sections(text)
+
+
+def test_analysis_markdown_renders_structured_and_passes_text_through():
+    markdown = SMEBoost.analysis_markdown(json.dumps(ANALYSIS))
+    assert "#### Reasons for Advisory Support" in markdown
+    assert "1. Thin working capital" in markdown
+    assert "- Secure a trade line" in markdown
+    assert SMEBoost.analysis_markdown("Plain analysis") == "Plain analysis"
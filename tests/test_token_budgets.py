@@ -0,0 +1,70 @@
+import SMEBoost
+
+
+def build_prompt(text):
+    return f"Analyse this profile:\n{text}\n"
+
+
+def test_prompt_within_budget_is_unchanged(monkeypatch):
+    monkeypatch.setitem(SMEBoost.TASK_PROMPT_BUDGETS, "area_analysis", 1000)
+    assert SMEBoost.fit_prompt_to_budget("area_analysis", build_prompt, "short text") == build_prompt("short text")
+
+
+def test_unbudgeted_task_is_unchanged(monkeypatch):
+    monkeypatch.setitem(SMEBoost.TASK_PROMPT_BUDGETS, "area_analysis", None)
+    text = "word " * 5000
+    assert SMEBoost.fit_prompt_to_budget("area_analysis", build_prompt, text) == build_prompt(text)
+
+
+def test_long_input_is_trimmed_at_a_word_boundary(monkeypatch):
+    monkeypatch.setitem(SMEBoost.TASK_PROMPT_BUDGETS, "area_analysis", 50)
+    text = " ".join(f"word{i}" for i in range(500))
+    prompt = SMEBoost.fit_prompt_to_budget("area_analysis", build_prompt, text)
+    assert SMEBoost.estimate_tokens(prompt) <= 52
+    kept = prompt[len("Analyse this profile:\n"):-len(" ...\n")]
+    assert text.startswith(kept)
+    assert text[len(kept)] == " "
+
+
+def test_input_embedded_twice_shares_the_budget(monkeypatch):
+    monkeypatch.setitem(SMEBoost.TASK_PROMPT_BUDGETS, "area_analysis", 50)
+    text = " ".join(f"word{i}" for i in range(500))
+    prompt = SMEBoost.fit_prompt_to_budget("area_analysis", lambda text: f"{text}\n\n{text}", text)
+    assert SMEBoost.estimate_tokens(prompt) <= 52
+
+
+def test_whitespace_only_input_trims_to_nothing(monkeypatch):
+    monkeypatch.setitem(SMEBoost.TASK_PROMPT_BUDGETS, "area_analysis", 10)
+    prompt = SMEBoost.fit_prompt_to_budget("area_analysis", build_prompt, " " * 400)
+    assert prompt == build_prompt(" ...")
+
+
+def test_completion_cost():
+    assert SMEBoost.completion_cost("gpt-4o", 1_000_000, 1_000_000) == 12.5
+    assert SMEBoost.completion_cost("unknown-model", 10, 10) is None
+
+
+def test_metrics_render_counters_and_histograms():
+    metrics = SMEBoost.LLMMetrics(path="")
+    metrics.record("area_analysis", "gpt-4o", "miss", "ok", 0.3, 0.1, 1000, 200, 4000)
+    metrics.record("area_analysis", "gpt-4o", "hit", "ok", 0.001)
+    text = metrics.render()
+    assert 'smeboost_llm_requests_total{task="area_analysis",model="gpt-4o",cache="miss",status="ok"} 1' in text
+    assert 'smeboost_llm_requests_total{task="area_analysis",model="gpt-4o",cache="hit",status="ok"} 1' in text
+    assert 'smeboost_llm_latency_seconds_bucket{task="area_analysis",model="gpt-4o",cache="miss",le="0.5"} 1' in text
+    assert 'smeboost_llm_prompt_tokens_total{task="area_analysis",model="gpt-4o",cache="miss"} 1000' in text
+
+
+def test_metrics_model_summary_counts_api_calls_only():
+    metrics = SMEBoost.LLMMetrics(path="")
+    metrics.record("area_analysis", "gpt-4o", "miss", "ok", 1.0, None, 1_000_000, 0)
+    metrics.record("area_analysis", "gpt-4o", "miss", "ok", 3.0, None, 1_000_000, 0)
+    metrics.record("area_analysis", "gpt-4o", "hit", "ok", 0.001)
+    assert metrics.model_summary() == {"gpt-4o": (2, 2.0, 5.0)}
+
+
+def test_metrics_are_written_to_the_metrics_file(tmp_path):
+    path = tmp_path / "metrics.prom"
+    metrics = SMEBoost.LLMMetrics(path=str(path))
+    metrics.record("company_summary", "gpt-4o", "miss", "ok", 2.0)
+    assert path.read_text() == metrics.render()